@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of per-token event construction in strands_utils._convert_to_agentcore_event.
+
+Compares the previous implementation (async, datetime.now().isoformat() and a base dict
+spread into a second dict per token) with the slotted records of utils/events.py, for the
+conversion alone and for conversion + consumer access (event.get("event_type"), data).
+
+Usage:
+    python benchmarks/event_construction.py
+    python benchmarks/event_construction.py --tokens 200000 --repeat 7
+"""
+import os
+import sys
+import asyncio
+import argparse
+import timeit
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.strands_sdk_utils import strands_utils
+
+
+async def legacy_convert(strands_event, agent_name, session_id, source=None):
+    """Text path of the previous _convert_to_agentcore_event."""
+    base_event = {
+        "timestamp": datetime.now().isoformat(),
+        "session_id": session_id,
+        "agent_name": agent_name,
+        "source": source or f"{agent_name}_node",
+    }
+    if "data" in strands_event:
+        return {
+            **base_event,
+            "type": "agent_text_stream",
+            "event_type": "text_chunk",
+            "data": strands_event["data"],
+            "chunk_size": len(strands_event["data"])
+        }
+    return None
+
+
+def run(tokens, repeat):
+    chunks = [{"data": f"tok{i % 97} "} for i in range(tokens)]
+    convert = strands_utils._convert_to_agentcore_event
+
+    async def legacy_loop(consume):
+        for chunk in chunks:
+            event = await legacy_convert(chunk, "coder", "bench")
+            if consume and event.get("event_type") == "text_chunk": event.get("data")
+
+    def fast_loop(consume):
+        for chunk in chunks:
+            event = convert(chunk, "coder", "bench")
+            if consume and event.get("event_type") == "text_chunk": event.get("data")
+
+    cases = {
+        "legacy (async, dict)": lambda: asyncio.run(legacy_loop(False)),
+        "record (sync, slotted)": lambda: fast_loop(False),
+        "legacy + consumer .get": lambda: asyncio.run(legacy_loop(True)),
+        "record + consumer .get": lambda: fast_loop(True),
+    }
+    results = {name: min(timeit.repeat(case, number=1, repeat=repeat)) / tokens * 1e9 for name, case in cases.items()}
+
+    print(f"{tokens:,} text chunks, best of {repeat}")
+    for name, ns in results.items():
+        print(f"  {name:<26}{ns:8.0f} ns/token")
+    print(f"  speed-up (conversion)     {results['legacy (async, dict)'] / results['record (sync, slotted)']:8.2f}x")
+    print(f"  speed-up (with consumer)  {results['legacy + consumer .get'] / results['record + consumer .get']:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-token event construction micro-benchmark")
+    parser.add_argument("--tokens", type=int, default=100000, help="Text chunks per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements (best is reported)")
+    args = parser.parse_args()
+    run(args.tokens, args.repeat)
@@ -0,0 +1,198 @@
+"""
+End-to-end benchmark of the coordinator → planner → supervisor graph on the mock Bedrock model.
+
+No AWS access is needed: every agent replays a script from benchmarks/scenarios.py, while the
+tools (write_and_execute_tool, kernels, event bus, agent tools) run for real. Measures:
+
+    - per-node latency       wall time of each graph node (DagGraph timings)
+    - event-loop lag         how late a 10 ms ticker wakes up while the graph runs
+    - queue latency          event creation → consumption by the stream reader
+    - memory                 Python heap peak (tracemalloc) and process max RSS
+
+Usage:
+    python benchmarks/run_benchmark.py
+    python benchmarks/run_benchmark.py --dataset yummy_food --runs 5 --tokens-per-second 80 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import contextlib
+import statistics
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.mock_model import use_mock_script
+from utils.session import GraphSession
+from utils import checkpoint
+from utils.events import AgentEvent
+from utils.strands_sdk_utils import TokenTracker
+from graph.builder import build_graph
+from benchmarks.scenarios import DATASETS, build_script
+
+LAG_INTERVAL = 0.01
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop runs a periodic callback."""
+
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - started - self.interval, 0.0))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _event_age(event):
+    """Seconds between event creation and now (monotonic for records, ISO timestamp for dict events)."""
+    if isinstance(event, AgentEvent):
+        return time.monotonic() - event.created
+    timestamp = event.get("timestamp") if isinstance(event, dict) else None
+    if not timestamp:
+        return None
+    return (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds()
+
+
+async def run_once(dataset, workspace, tokens_per_second, first_token_ms):
+    """One full workflow; returns its metrics."""
+    spec = DATASETS[dataset]
+    script = use_mock_script(build_script(dataset), tokens_per_second=tokens_per_second, first_token_ms=first_token_ms)
+    session = GraphSession.isolated(root=workspace, data_dir=os.path.join(ROOT, "data"), interactive=False)
+    task = {"request": spec["query"], "request_prompt": f"Here is a user request: <user_request>{spec['query']}</user_request>"}
+
+    monitor = LoopLagMonitor()
+    queue_latencies, events = [], 0
+    tracemalloc.start()
+    monitor.start()
+    started = time.perf_counter()
+    try:
+        async for event in build_graph().stream_async(task, session=session):
+            events += 1
+            age = _event_age(event)
+            if age is not None:
+                queue_latencies.append(age)
+    finally:
+        elapsed = time.perf_counter() - started
+        await monitor.stop()
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        session.close()
+
+    node_latency = {}
+    for timing in session.node_timings:
+        node_latency[timing["node"]] = node_latency.get(timing["node"], 0.0) + timing["elapsed"]
+    artifacts = sorted(os.listdir(session.artifacts_dir)) if os.path.isdir(session.artifacts_dir) else []
+
+    return {
+        "dataset": dataset,
+        "total_s": elapsed,
+        "events": events,
+        "model_calls": script.stats["calls"],
+        "output_tokens": script.stats["output_tokens"],
+        "node_latency_s": node_latency,
+        "cache_read_ratio": {agent: ratios["read_ratio"] for agent, ratios in TokenTracker.cache_ratios(session.shared).items()},
+        "loop_lag_ms": {"mean": statistics.fmean(monitor.samples) * 1000 if monitor.samples else 0.0,
+                        "p95": _percentile(monitor.samples, 95) * 1000, "max": max(monitor.samples, default=0.0) * 1000},
+        "queue_latency_ms": {"mean": statistics.fmean(queue_latencies) * 1000 if queue_latencies else 0.0,
+                             "p95": _percentile(queue_latencies, 95) * 1000, "max": max(queue_latencies, default=0.0) * 1000},
+        "heap_peak_mb": heap_peak / 2**20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "artifacts": artifacts,
+    }
+
+
+def _summarize(runs):
+    """Median of every numeric metric across runs."""
+    summary = {"dataset": runs[0]["dataset"], "runs": len(runs)}
+    for key in ("total_s", "events", "model_calls", "output_tokens", "heap_peak_mb", "max_rss_mb"):
+        summary[key] = statistics.median(run[key] for run in runs)
+    for key in ("loop_lag_ms", "queue_latency_ms"):
+        summary[key] = {stat: statistics.median(run[key][stat] for run in runs) for stat in runs[0][key]}
+    summary["node_latency_s"] = {node: statistics.median(run["node_latency_s"].get(node, 0.0) for run in runs)
+                                 for node in runs[0]["node_latency_s"]}
+    summary["cache_read_ratio"] = {agent: statistics.median(run["cache_read_ratio"].get(agent, 0.0) for run in runs)
+                                   for agent in runs[0]["cache_read_ratio"]}
+    summary["artifacts"] = runs[-1]["artifacts"]
+    return summary
+
+
+def _print_summary(summary):
+    print(f"\n=== {summary['dataset']} ({summary['runs']} run(s)) ===")
+    print(f"total          {summary['total_s'] * 1000:10.1f} ms   events {summary['events']:.0f}, "
+          f"model calls {summary['model_calls']:.0f}, output tokens {summary['output_tokens']:.0f}")
+    for node, elapsed in summary["node_latency_s"].items():
+        print(f"  {node:<13}{elapsed * 1000:10.1f} ms")
+    lag, queue = summary["loop_lag_ms"], summary["queue_latency_ms"]
+    print(f"loop lag       mean {lag['mean']:.2f} ms, p95 {lag['p95']:.2f} ms, max {lag['max']:.2f} ms")
+    print(f"queue latency  mean {queue['mean']:.2f} ms, p95 {queue['p95']:.2f} ms, max {queue['max']:.2f} ms")
+    print("cache reads    " + ", ".join(f"{agent} {ratio:.0%}" for agent, ratio in sorted(summary["cache_read_ratio"].items())))
+    print(f"memory         heap peak {summary['heap_peak_mb']:.1f} MB, max RSS {summary['max_rss_mb']:.1f} MB")
+    print(f"artifacts      {', '.join(summary['artifacts'])}")
+
+
+async def main(args):
+    workspace = tempfile.mkdtemp(prefix="graph-bench-")
+    checkpoint.CHECKPOINT_DIR = os.path.join(workspace, "checkpoints")
+    results = []
+    try:
+        for dataset in args.dataset:
+            runs = []
+            for _ in range(args.runs):
+                # Node/agent logging and stdout echo are part of a real run but swamp the report
+                with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+                    runs.append(await run_once(dataset, workspace, args.tokens_per_second, args.first_token_ms))
+            summary = _summarize(runs)
+            _print_summary(summary)
+            results.append({"summary": summary, "runs": runs})
+    finally:
+        use_mock_script(None)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Graph benchmark on the mock Bedrock model")
+    parser.add_argument("--dataset", nargs="+", choices=sorted(DATASETS), default=sorted(DATASETS), help="Datasets to run")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per dataset (median is reported)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock output rate, 0 = unthrottled")
+    parser.add_argument("--first-token-ms", type=float, default=0.0, help="Mock latency before the first event")
+    parser.add_argument("--output", type=str, help="Write raw results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the graph's own logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    asyncio.run(main(args))
@@ -0,0 +1,144 @@
+"""
+Scripted conversations for the mock Bedrock model (utils/mock_model.py).
+
+build_script(dataset) returns a full coordinator → planner → supervisor run for one of the
+bundled datasets: the supervisor calls coder, validator, reporter and tracker like a real
+run, and the sub-agents execute real pandas scripts through write_and_execute_tool, so
+the benchmark covers the tools and kernels as well as the graph plumbing.
+"""
+
+import textwrap
+
+DATASETS = {
+    "yummy_food": {
+        "path": "./data/yummy_food/yummy-food-market.csv",
+        "group": "매체",
+        "value": "매출액",
+        "query": "세일즈 및 마케팅 관점으로 분석해주고 보고서로 만들어줘. 분석대상은 './data/yummy_food/' 디렉토리 입니다.",
+    },
+    "moon_market": {
+        "path": "./data/moon_market/kr/moon-market-fresh-food-sales.csv",
+        "group": "Category",
+        "value": "Amount",
+        "query": "moon market 판매 현황을 분석해서 보고서로 만들어줘. 분석대상은 './data/moon_market/kr/' 입니다.",
+    },
+}
+
+PLAN_TEMPLATE = """# Plan
+## thought
+벤치마크용 고정 계획입니다.
+
+## title
+{title}
+
+## steps
+### 1. Coder: {group}별 {value} 분석 (depends_on: none)
+- [{c}] 데이터 로드 및 {group}별 {value} 집계
+- [{c}] 계산 메타데이터 생성
+
+### 2. Validator: 계산 검증 (depends_on: 1)
+- [{v}] 계산 재검증 및 인용 메타데이터 생성
+
+### 3. Reporter: 보고서 작성 (depends_on: 2)
+- [{r}] 검증된 결과로 Markdown 보고서 작성
+"""
+
+CODER_SCRIPT = '''
+import os, json
+from utils.data_loader import load_table
+
+df = load_table("{path}", columns=["{group}", "{value}"])
+summary = df.groupby("{group}")["{value}"].sum().sort_values(ascending=False)
+
+os.makedirs("./artifacts", exist_ok=True)
+with open("./artifacts/all_results.txt", "a", encoding="utf-8") as f:
+    f.write("## {group}별 {value}\\n" + summary.to_string() + "\\n")
+calculations = [{{"id": "calc_001", "value": float(summary.sum()), "description": "Total {value}",
+                 "formula": "SUM({value})", "source_file": "{path}", "source_columns": ["{value}"],
+                 "importance": "high"}}]
+for i, (key, val) in enumerate(summary.items(), start=2):
+    calculations.append({{"id": f"calc_{{i:03d}}", "value": float(val), "description": f"{value} of {{key}}",
+                         "formula": "SUM({value}) WHERE {group}=" + str(key), "source_file": "{path}",
+                         "source_columns": ["{group}", "{value}"], "importance": "medium"}})
+with open("./artifacts/calculation_metadata.json", "w", encoding="utf-8") as f:
+    json.dump({{"generated_at": "benchmark", "calculations": calculations}}, f, ensure_ascii=False, indent=2)
+print(summary.head().to_string())
+'''
+
+VALIDATOR_SCRIPT = '''
+import json
+from utils.data_loader import load_table
+
+df = load_table("{path}", columns=["{value}"])
+with open("./artifacts/calculation_metadata.json", encoding="utf-8") as f:
+    calculations = json.load(f)["calculations"]
+expected = float(df["{value}"].sum())
+citations = [{{"citation_id": f"[{{i}}]", "calculation_id": c["id"], "value": c["value"]}}
+             for i, c in enumerate(calculations, start=1)]
+with open("./artifacts/citations.json", "w", encoding="utf-8") as f:
+    json.dump({{"citations": citations}}, f, ensure_ascii=False, indent=2)
+print("total ok" if abs(calculations[0]["value"] - expected) < 1e-6 else "total mismatch")
+'''
+
+REPORTER_SCRIPT = '''
+with open("./artifacts/all_results.txt", encoding="utf-8") as f:
+    results = f.read()
+with open("./artifacts/final_report.md", "w", encoding="utf-8") as f:
+    f.write("# {title}\\n\\n" + results)
+print("report written")
+'''
+
+
+def _tool(name, **tool_input):
+    return {"name": name, "input": tool_input}
+
+
+def _write_and_execute(file_path, content):
+    return _tool("write_and_execute_tool", file_path=file_path, content=textwrap.dedent(content).strip() + "\n")
+
+
+def build_script(dataset: str) -> dict:
+    """Mock-model script for one full workflow over `dataset` (a key of DATASETS)."""
+    spec = DATASETS[dataset]
+    title = f"{dataset} 벤치마크 분석"
+    fmt = dict(spec, title=title)
+
+    def plan(c=" ", v=" ", r=" "):
+        return PLAN_TEMPLATE.format(c=c, v=v, r=r, **fmt)
+
+    def tracker(plan_text):
+        return [{"text": plan_text}]
+
+    coder_task = f"{spec['path']}를 로드해서 {spec['group']}별 {spec['value']}를 집계하고 계산 메타데이터를 생성하세요."
+    return {
+        "agents": {
+            "coordinator": [[{"text": "handoff_to_planner: I'll need to consult our planning system for this request."}]],
+            "planner": [[{"reasoning": "데이터 분석 요청이므로 Coder → Validator → Reporter 순서로 계획합니다.", "text": plan()}]],
+            "supervisor": [[
+                {"text": "Tool calling → Coder", "tool_use": [_tool("coder_agent_tool", task=coder_task)]},
+                {"text": "Tool calling → Tracker", "tool_use": [_tool("tracker_agent_tool", completed_agent="coder", completion_summary="집계 완료")]},
+                {"text": "Tool calling → Validator", "tool_use": [_tool("validator_agent_tool", task="Coder 계산을 검증하고 citations.json을 생성하세요.")]},
+                {"text": "Tool calling → Tracker", "tool_use": [_tool("tracker_agent_tool", completed_agent="validator", completion_summary="검증 완료")]},
+                {"text": "Tool calling → Reporter", "tool_use": [_tool("reporter_agent_tool", task="검증된 결과로 Markdown 보고서를 작성하세요.")]},
+                {"text": "Tool calling → Tracker", "tool_use": [_tool("tracker_agent_tool", completed_agent="reporter", completion_summary="보고서 완료")]},
+                {"text": "All tasks completed. Final deliverables ready."},
+            ]],
+            "coder": [[
+                {"text": "데이터를 집계합니다.", "tool_use": [_write_and_execute("./artifacts/code/coder_analysis.py", CODER_SCRIPT.format(**fmt))]},
+                {"text": f"## 완료\n- {spec['group']}별 {spec['value']} 집계\n- ./artifacts/all_results.txt\n- ./artifacts/calculation_metadata.json"},
+            ]],
+            "validator": [[
+                {"text": "계산을 검증합니다.", "tool_use": [_write_and_execute("./artifacts/code/validator.py", VALIDATOR_SCRIPT.format(**fmt))]},
+                {"text": "## 검증 완료\n- ./artifacts/citations.json"},
+            ]],
+            "reporter": [[
+                {"text": "보고서를 작성합니다.", "tool_use": [_write_and_execute("./artifacts/code/reporter.py", REPORTER_SCRIPT.format(**fmt))]},
+                {"text": "## 보고서 완료\n- ./artifacts/final_report.md"},
+            ]],
+            "tracker": [
+                tracker(plan(c="x")),
+                tracker(plan(c="x", v="x")),
+                tracker(plan(c="x", v="x", r="x")),
+            ],
+        }
+    }
@@ -1,8 +1,8 @@
 
 import asyncio
-from strands.multiagent import GraphBuilder
-from utils.strands_sdk_utils import FunctionNode
-from utils.event_queue import has_events, get_event
+from utils.session import GraphSession, activate_session, current_session
+from utils import checkpoint
+from .dag import TASK, DagGraph, DagNode
 from .nodes import (
     supervisor_node,
     coordinator_node,
@@ -19,9 +19,11 @@ class StreamableGraph:
     def __init__(self, graph):
         self.graph = graph
     
-    async def invoke_async(self, task):
+    async def invoke_async(self, task, session: GraphSession = None, start_from=None):
         """Original non-streaming invoke method."""
-        return await self.graph.invoke_async(task)
+        session = session or current_session()
+        with activate_session(session):
+            return await self.graph.invoke_async(task, invocation_state={"session": session}, start_from=start_from)
     
     async def _cleanup_workflow(self, workflow_task):
         """Handle workflow completion and cleanup."""
@@ -35,38 +37,47 @@ class StreamableGraph:
                 except asyncio.CancelledError: 
                     pass
     
-    async def _yield_pending_events(self):
-        """Yield any pending events from queue."""
-        while has_events():
-            event = get_event()
-            if event: 
-                yield event
-    
-    async def stream_async(self, task):
-        """Stream events from graph execution using background task + event queue pattern."""
-        
-        # Step 1: Run graph backgound and put event into the global queue
+    async def stream_async(self, task, session: GraphSession = None, start_from=None):
+        """Stream events from graph execution using background task + event bus pattern.
+
+        Args:
+            task: Graph input (request / request_prompt dictionary)
+            session: GraphSession holding this execution's shared state and event bus.
+                Defaults to the current session, so concurrent callers should pass their own.
+            start_from: Re-run only this node (or list of nodes) and the nodes after it, keeping the
+                session's earlier results (e.g. "planner" to re-plan without calling the coordinator
+                again, or the node a checkpointed run failed in)
+        """
+        session = session or current_session()
+        bus = session.event_bus
+
+        # Step 1: Run graph backgound and put event into the session's event bus
         async def run_workflow():
             try:
-                return await self.graph.invoke_async(task)
+                return await self.graph.invoke_async(task, invocation_state={"session": session}, start_from=start_from)
             except Exception as e:
                 print(f"Workflow error: {e}")
                 raise
-        
-        workflow_task = asyncio.create_task(run_workflow())
-        
-        # Step 2: Consuming event in the global queue
+
+        # The task copies the current context, so nodes, tool threads and sub-agents inside it see this session
+        with activate_session(session):
+            workflow_task = asyncio.create_task(run_workflow())
+
+        # Step 2: Await events from the bus until the workflow finishes
         try:
-            while not workflow_task.done():
-                async for event in self._yield_pending_events():
-                    yield event
-                await asyncio.sleep(0.005)
+            async for event in bus.stream_until(workflow_task):
+                yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            # Consumer went away (e.g. client disconnected) - stop the workflow instead of running it unobserved
+            workflow_task.cancel()
+            raise
         finally:
             await self._cleanup_workflow(workflow_task)
-            async for event in self._yield_pending_events():
-                yield event
-        
-        yield {"type": "workflow_complete", "message": "All events processed through global queue"}
+
+        for event in bus.drain():
+            yield event
+
+        yield {"type": "workflow_complete", "message": "All events processed through event bus"}
 
 def build_graph():
     """Build and return the agent workflow graph with streaming capability.
@@ -75,33 +86,39 @@ def build_graph():
         Coordinator → Planner → PlanReviewer → Supervisor
                          ↑          │
                          └──────────┘ (feedback loop if user requests revision)
-    """
-    builder = GraphBuilder()
-
-    # Add nodes
-    coordinator = FunctionNode(func=coordinator_node, name="coordinator")
-    planner = FunctionNode(func=planner_node, name="planner")
-    plan_reviewer = FunctionNode(func=plan_reviewer_node, name="plan_reviewer")
-    supervisor = FunctionNode(func=supervisor_node, name="supervisor")
 
-    builder.add_node(coordinator, "coordinator")
-    builder.add_node(planner, "planner")
-    builder.add_node(plan_reviewer, "plan_reviewer")
-    builder.add_node(supervisor, "supervisor")
-
-    # Set entry point and edges
-    builder.set_entry_point("coordinator")
-    builder.add_edge("coordinator", "planner", condition=should_handoff_to_planner)
-    builder.add_edge("planner", "plan_reviewer")
-    # Conditional edges from plan_reviewer:
-    # - If user requests revision → go back to planner
-    # - If user approves plan → proceed to supervisor
-    builder.add_edge("plan_reviewer", "planner", condition=should_revise_plan)
-    builder.add_edge("plan_reviewer", "supervisor", condition=should_proceed_to_supervisor)
-
-    # Set execution limits to prevent infinite loops (max 10 plan revisions + normal flow)
-    # Max node executions: planner can run up to 11 times (initial + 10 revisions)
-    builder.set_max_node_executions(25)
+    Edges follow from the shared-state keys each node reads and writes (graph/dag.py).
+    The feedback loop re-runs the planner and everything after it; the coordinator's
+    result is kept.
+    """
+    coordinator = DagNode(
+        "coordinator", coordinator_node,
+        inputs=[TASK],
+        outputs=["messages", "request", "request_prompt"],
+        memoize=True,
+    )
+    planner = DagNode(
+        "planner", planner_node,
+        inputs=["request", "messages", "full_plan", "plan_feedback", "plan_revision_requested", "plan_revision_count"],
+        outputs=["messages", "full_plan", "plan_revision_requested"],
+        when=should_handoff_to_planner,
+        memoize=True,
+    )
+    # If the user requests a revision → back to planner; if approved → supervisor
+    plan_reviewer = DagNode(
+        "plan_reviewer", plan_reviewer_node,
+        inputs=["full_plan", "plan_revision_count"],
+        outputs=["plan_revision_requested", "plan_feedback", "plan_revision_count"],
+        repeat=("planner", should_revise_plan),
+    )
+    supervisor = DagNode(
+        "supervisor", supervisor_node,
+        inputs=["messages", "full_plan", "clues", "plan_revision_requested"],
+        outputs=["clues"],
+        when=should_proceed_to_supervisor,
+    )
 
-    # Return graph with streaming capability
-    return StreamableGraph(builder.build())
+    # Execution limit (GRAPH_MAX_NODE_EXECUTIONS, default 25) guards the feedback loop:
+    # planner can run up to 11 times (initial + 10 revisions)
+    # Checkpoint when a node starts and finishes (utils/checkpoint.py, --resume)
+    return StreamableGraph(DagGraph([coordinator, planner, plan_reviewer, supervisor], on_node=checkpoint.on_node))
@@ -0,0 +1,246 @@
+"""
+Dependency-aware executor for the workflow graph.
+
+Nodes declare which shared-state keys they read (`inputs`) and write (`outputs`); for each
+input, a node depends on the nearest node declared before it that writes it. Ready nodes -
+all dependencies done and their `when` condition true - run concurrently, and a node
+whose dependency was skipped is skipped as well.
+
+    coordinator = DagNode("coordinator", coordinator_node, inputs=["task"], outputs=["messages", ...])
+    graph = DagGraph([coordinator, planner, ...])
+    await graph.invoke_async(task, invocation_state={"session": session})
+    await graph.invoke_async(task, invocation_state={"session": session}, start_from="planner")
+
+Feedback loops are expressed with `repeat=(target, condition)`: when the condition holds
+after the node finished, `target` and everything downstream of it runs again while the
+nodes upstream of it keep their results. `start_from` does the same for a new invocation
+(e.g. re-planning on a session whose coordinator already ran).
+
+Nodes marked `memoize` store their response and outputs in the session, keyed by a hash of
+their node name and input values; a later run with identical inputs restores them instead
+of calling the model again. Per-node timings of every execution are appended to
+session.node_timings and returned in the DagResult. `on_node(session, name, state)` (sync or
+async) is called when a node starts ("running") and finishes ("done"), e.g. to checkpoint.
+
+Environment:
+    GRAPH_MAX_NODE_EXECUTIONS  Node runs allowed per invocation, loops included (default 25)
+    GRAPH_MEMOIZE              "false" disables node memoization
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from utils.session import GraphSession, activate_session, current_session
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+GRAPH_MAX_NODE_EXECUTIONS = int(os.getenv("GRAPH_MAX_NODE_EXECUTIONS", "25"))
+GRAPH_MEMOIZE = os.getenv("GRAPH_MEMOIZE", "true").lower() == "true"
+
+TASK = "task"  # input name of the invocation task (not a shared-state key)
+PENDING, RUNNING, DONE, SKIPPED = "pending", "running", "done", "skipped"
+
+
+class DagNode:
+    """One graph node: an (async) function of the session's shared state."""
+
+    __slots__ = ("name", "func", "inputs", "outputs", "when", "repeat", "memoize")
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+                 when: Optional[Callable] = None, repeat: Optional[Tuple[str, Callable]] = None,
+                 memoize: bool = False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.when = when        # condition(shared_state) -> bool, checked once the node is ready
+        self.repeat = repeat    # (target node, condition(shared_state)) evaluated after the node ran
+        self.memoize = memoize  # only for nodes whose effect is fully described by their outputs
+
+
+class DagResult:
+    """Outcome of one invocation: node responses, execution order and timings."""
+
+    __slots__ = ("status", "results", "order", "timings", "elapsed")
+
+    def __init__(self):
+        self.status = "completed"
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self.timings: List[Dict[str, Any]] = []
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return f"DagResult(status={self.status!r}, order={self.order}, elapsed={self.elapsed:.2f}s)"
+
+
+def _encode(value: Any) -> Any:
+    """JSON fallback for the input hash: stores expose to_dict(), anything else its type."""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return f"<{type(value).__name__}>"
+
+
+def input_hash(node: DagNode, values: Dict[str, Any]) -> str:
+    payload = json.dumps({"node": node.name, "inputs": values}, sort_keys=True, ensure_ascii=False, default=_encode)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DagGraph:
+    """Executes DagNodes in dependency order with the session as shared state."""
+
+    def __init__(self, nodes: Sequence[DagNode], max_node_executions: int = GRAPH_MAX_NODE_EXECUTIONS,
+                 memoize: bool = GRAPH_MEMOIZE, on_node: Optional[Callable[[GraphSession, str, str], Any]] = None):
+        self.nodes: Dict[str, DagNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate graph node: {node.name}")
+            self.nodes[node.name] = node
+        self.max_node_executions = max_node_executions
+        self.memoize = memoize
+        self.on_node = on_node
+        self.dependencies = self._dependencies()
+        for node in self.nodes.values():
+            if node.repeat and node.repeat[0] not in self.nodes:
+                raise ValueError(f"{node.name} repeats unknown node {node.repeat[0]}")
+
+    def _dependencies(self) -> Dict[str, List[str]]:
+        """name -> nearest earlier writer of each of its inputs (declaration order breaks cycles)."""
+        dependencies, producers = {}, {}
+        for name, node in self.nodes.items():
+            dependencies[name] = list(dict.fromkeys(producers[key] for key in node.inputs if key in producers))
+            for key in node.outputs:
+                producers[key] = name
+        return dependencies
+
+    def downstream(self, name: str) -> List[str]:
+        """`name` and every node that (transitively) depends on it, in declaration order."""
+        reached = {name}
+        for other in self.nodes:
+            if any(dependency in reached for dependency in self.dependencies[other]):
+                reached.add(other)
+        return [other for other in self.nodes if other in reached]
+
+    async def invoke_async(self, task: Any = None, invocation_state: Optional[Dict[str, Any]] = None,
+                           start_from: Union[str, Sequence[str], None] = None) -> DagResult:
+        """
+        Run the graph for `task`.
+
+        Args:
+            task: Invocation input, passed to every node function as `task`
+            invocation_state: {"session": GraphSession} (defaults to the current session)
+            start_from: Only these nodes (a name or a list) and their downstream nodes run; the
+                others count as done with the results already in the session's shared state
+        """
+        session = (invocation_state or {}).get("session") or current_session()
+        starts = [start_from] if isinstance(start_from, str) else list(start_from or [])
+        unknown = [name for name in starts if name not in self.nodes]
+        if unknown:
+            raise ValueError(f"Unknown graph node: {', '.join(unknown)}")
+        rerun = {name for start in starts for name in self.downstream(start)} if starts else set(self.nodes)
+        status = {name: PENDING if name in rerun else DONE for name in self.nodes}
+        result = DagResult()
+        started = time.perf_counter()
+        running: Dict[asyncio.Task, DagNode] = {}
+
+        with activate_session(session):
+            try:
+                while True:
+                    for node in self._ready(status, session.shared):
+                        if len(result.order) >= self.max_node_executions:
+                            logger.warning(f"Graph stopped: max node executions ({self.max_node_executions}) reached")
+                            result.status = "failed"
+                            break
+                        status[node.name] = RUNNING
+                        result.order.append(node.name)
+                        await self._notify(session, node.name, RUNNING)
+                        running[asyncio.create_task(self._execute(node, task, session, result))] = node
+                    if not running or result.status == "failed":
+                        break
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        node = running.pop(finished)
+                        result.results[node.name] = finished.result()
+                        status[node.name] = DONE
+                        await self._notify(session, node.name, DONE)
+                        if node.repeat and node.repeat[1](session.shared):
+                            logger.info(f"{node.name}: re-running from {node.repeat[0]}")
+                            for name in self.downstream(node.repeat[0]):
+                                if status[name] != RUNNING:
+                                    status[name] = PENDING
+                if running:
+                    await asyncio.gather(*running)  # let nodes already started finish
+            except BaseException:
+                for pending in running:
+                    pending.cancel()
+                raise
+
+        result.elapsed = time.perf_counter() - started
+        logger.info(f"Graph {result.status}: {' -> '.join(result.order)} in {result.elapsed:.2f}s")
+        return result
+
+    async def _notify(self, session: GraphSession, name: str, state: str) -> None:
+        if self.on_node is None:
+            return
+        if asyncio.iscoroutinefunction(self.on_node):
+            await self.on_node(session, name, state)
+        else:
+            self.on_node(session, name, state)
+
+    def _ready(self, status: Dict[str, str], shared_state: Dict[str, Any]) -> List[DagNode]:
+        """Pending nodes that can start now; nodes that can no longer run are marked skipped."""
+        ready: Dict[str, DagNode] = {}
+        changed = True
+        while changed:  # a skip can decide the nodes behind it in the same pass
+            changed = False
+            for name, node in self.nodes.items():
+                if status[name] != PENDING or name in ready:
+                    continue
+                states = [status[dependency] for dependency in self.dependencies[name]]
+                if any(state in (PENDING, RUNNING) for state in states):
+                    continue
+                if SKIPPED in states or (node.when is not None and not node.when(shared_state)):
+                    status[name] = SKIPPED
+                    changed = True
+                else:
+                    ready[name] = node
+        return list(ready.values())
+
+    async def _execute(self, node: DagNode, task: Any, session: GraphSession, result: DagResult) -> Dict[str, Any]:
+        shared_state = session.shared
+        memo_key = None
+        if self.memoize and node.memoize:
+            values = {key: task if key == TASK else shared_state.get(key) for key in node.inputs}
+            memo_key = input_hash(node, values)
+            memo = session.node_memo.get(memo_key)
+            if memo is not None:
+                shared_state.update(copy.deepcopy(memo["outputs"]))
+                shared_state.setdefault("history", []).append({"agent": node.name, "message": memo["response"]["text"]})
+                logger.info(f"{node.name}: inputs unchanged, memoized result reused")
+                self._record(node, session, result, 0.0, cached=True)
+                return memo["response"]
+
+        started = time.perf_counter()
+        if asyncio.iscoroutinefunction(node.func):
+            response = await node.func(task=task)
+        else:
+            response = node.func(task=task)
+        self._record(node, session, result, time.perf_counter() - started, cached=False)
+
+        if memo_key is not None and isinstance(response, dict):
+            outputs = {key: shared_state[key] for key in node.outputs if key in shared_state}
+            session.node_memo[memo_key] = {"response": response, "outputs": copy.deepcopy(outputs)}
+        return response
+
+    @staticmethod
+    def _record(node: DagNode, session: GraphSession, result: DagResult, elapsed: float, cached: bool) -> None:
+        timing = {"node": node.name, "elapsed": elapsed, "cached": cached, "execution": len(result.timings) + 1}
+        result.timings.append(timing)
+        session.node_timings.append(timing)
@@ -1,16 +1,21 @@
 import logging
 import os
+import asyncio
 from dotenv import load_dotenv
 from strands.types.content import ContentBlock
 from utils.strands_sdk_utils import strands_utils, TokenTracker
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
+from utils.session import get_shared_state, current_session
+from utils.clues import get_clue_store
+from utils.dataset_profile import get_data_profile
 
 # Load environment variables
 load_dotenv()
 
 # Tools - import PythonAgentTool instances directly
 from tools.coder_agent_tool import coder_agent_tool
+from tools.parallel_coder_agent_tool import parallel_coder_agent_tool
 from tools.reporter_agent_tool import reporter_agent_tool
 from tools.tracker_agent_tool import tracker_agent_tool
 from tools.validator_agent_tool import validator_agent_tool
@@ -36,23 +41,17 @@ def log_node_complete(node_name: str):
     logger.info(f"{Colors.GREEN}===== {node_name} completed ====={Colors.END}")
 
     # Print token usage using TokenTracker
-    global _global_node_states
-    shared_state = _global_node_states.get('shared', {})
-    TokenTracker.print_current(shared_state)
-
-# Global state storage for sharing between nodes
-_global_node_states = {}
+    TokenTracker.print_current(get_shared_state())
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 FULL_PLAN_FORMAT = "Here is full plan :\n\n<full_plan>\n{}\n</full_plan>\n\n*Please consider this to select the next step.*"
-CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
+RESUME_FORMAT = "This workflow was resumed after an interruption. These agent-tool calls already completed (their results are in the plan and clues above):\n\n<completed_steps>\n{}\n</completed_steps>\n\n*Do not repeat them - continue with the first unfinished step.*"
 
 def should_handoff_to_planner(_):
     """Check if coordinator requested handoff to planner."""
 
     # Check coordinator's response for handoff request
-    global _global_node_states
-    shared_state = _global_node_states.get('shared', {})
+    shared_state = get_shared_state()
     history = shared_state.get('history', [])
 
     # Look for coordinator's last message
@@ -65,18 +64,16 @@ def should_handoff_to_planner(_):
 
 
 def _check_plan_revision_state():
-    """Helper to get plan revision state from global storage."""
-    global _global_node_states
-    shared_state = _global_node_states.get('shared', {})
+    """Helper to get plan revision state from session storage."""
+    shared_state = get_shared_state()
     return shared_state.get('plan_revision_requested', False)
 
 
 def should_revise_plan(_):
     """Check if user requested plan revision in plan_reviewer.
 
-    Note: Strands SDK requires explicit conditions on both outgoing edges from a node
-    to ensure only one destination becomes "ready". This is why we have two opposite
-    condition functions (should_revise_plan and should_proceed_to_supervisor).
+    Note: Used as plan_reviewer's repeat condition - when it holds, the planner and
+    every node after it run again (see graph/dag.py).
     """
     result = _check_plan_revision_state()
     logger.info(f"should_revise_plan: {result}")
@@ -86,9 +83,9 @@ def should_revise_plan(_):
 def should_proceed_to_supervisor(_):
     """Check if plan was approved and should proceed to supervisor.
 
-    Note: This is the logical negation of should_revise_plan. Both conditions are needed
-    because Strands SDK evaluates all edges and marks destination nodes as "ready"
-    if their incoming edge conditions are satisfied.
+    Note: This is the logical negation of should_revise_plan. It is the supervisor's `when`
+    condition, so the supervisor is skipped (and re-evaluated after the next plan review)
+    while a revision is pending.
     """
     result = not _check_plan_revision_state()
     logger.info(f"should_proceed_to_supervisor: {result}")
@@ -97,7 +94,6 @@ def should_proceed_to_supervisor(_):
 async def coordinator_node(task=None, **kwargs):
     
     """Coordinator node that communicate with customers."""
-    global _global_node_states
 
     log_node_start("Coordinator")
 
@@ -119,9 +115,8 @@ async def coordinator_node(task=None, **kwargs):
         streaming=True,
     )
 
-    # Store data directly in shared global storage
-    if 'shared' not in _global_node_states: _global_node_states['shared'] = {}
-    shared_state = _global_node_states['shared']
+    # Store data directly in the session's shared storage
+    shared_state = get_shared_state()
 
     # Process streaming response and collect text in one pass
     full_text = ""
@@ -134,7 +129,7 @@ async def coordinator_node(task=None, **kwargs):
         TokenTracker.accumulate(event, shared_state)
     response = {"text": full_text}
 
-    # Update shared global state
+    # Update shared session state
     shared_state['messages'] = agent.messages
     shared_state['request'] = request
     shared_state['request_prompt'] = request_prompt
@@ -152,16 +147,15 @@ async def planner_node(task=None, **kwargs):
 
     """Planner node that generates detailed plans for task execution."""
     log_node_start("Planner")
-    global _global_node_states
 
-    # Extract shared state from global storage
-    shared_state = _global_node_states.get('shared', None)
+    # Extract shared state from session storage
+    shared_state = get_shared_state()
 
     # Get request from shared state (task parameter not used in planner)
     request = shared_state.get("request", "") if shared_state else ""
 
     if not shared_state:
-        logger.warning("No shared state found in global storage")
+        logger.warning("No shared state found in session storage")
         return None, {"text": "No shared state available"}
 
     # Check if this is a revision request
@@ -170,11 +164,15 @@ async def planner_node(task=None, **kwargs):
     previous_plan = shared_state.get('full_plan', '')
     revision_count = shared_state.get('plan_revision_count', 0)
 
+    # Profiling the data files reads them - keep it off the event loop
+    data_profile = await asyncio.to_thread(get_data_profile, shared_state)
+
     # Select appropriate prompt based on whether this is initial planning or revision
     if is_revision and plan_feedback:
         # Use revision prompt with feedback context
         prompt_context = {
             "USER_REQUEST": request,
+            "DATA_PROFILE": data_profile,
             "PREVIOUS_PLAN": previous_plan,
             "USER_FEEDBACK": plan_feedback,
             "REVISION_COUNT": revision_count,
@@ -183,7 +181,7 @@ async def planner_node(task=None, **kwargs):
         prompt_name = "planner_revise"
         logger.info(f"{Colors.YELLOW}Revising plan based on user feedback (revision {revision_count}){Colors.END}")
     else:
-        prompt_context = {"USER_REQUEST": request}
+        prompt_context = {"USER_REQUEST": request, "DATA_PROFILE": data_profile}
         prompt_name = "planner"
 
     agent = strands_utils.get_agent(
@@ -216,7 +214,7 @@ async def planner_node(task=None, **kwargs):
         TokenTracker.accumulate(event, shared_state)
     response = {"text": full_text}
 
-    # Update shared global state
+    # Update shared session state
     shared_state['messages'] = [get_message_from_string(role="user", string=response["text"], imgs=[])]
     shared_state['full_plan'] = response["text"]
     shared_state['history'].append({"agent":"planner", "message": response["text"]})
@@ -240,12 +238,11 @@ async def plan_reviewer_node(task=None, **kwargs):
     4. If approved or max revisions reached, proceeds to supervisor
     """
     log_node_start("PlanReviewer")
-    global _global_node_states
 
-    shared_state = _global_node_states.get('shared', {})
+    shared_state = get_shared_state()
 
     if not shared_state:
-        logger.warning("No shared state found in global storage")
+        logger.warning("No shared state found in session storage")
         return {"text": "No shared state available"}
 
     # Get current plan and revision count
@@ -278,13 +275,17 @@ async def plan_reviewer_node(task=None, **kwargs):
     print(f"  - Type your {Colors.YELLOW}feedback{Colors.END} to request revisions ({MAX_PLAN_REVISIONS - revision_count} revision(s) remaining)")
     print()
 
-    try:
-        # Import readline for proper terminal input handling (backspace, delete, arrow keys)
-        import readline  # noqa: F401
-        user_input = input("Your response: ").strip()
-    except EOFError:
-        # Non-interactive mode - auto-approve
+    if not current_session().interactive:
+        # Non-interactive session (e.g. server) - auto-approve without touching stdin
         user_input = "yes"
+    else:
+        try:
+            # Import readline for proper terminal input handling (backspace, delete, arrow keys)
+            import readline  # noqa: F401
+            user_input = input("Your response: ").strip()
+        except EOFError:
+            # Non-interactive mode - auto-approve
+            user_input = "yes"
 
     # Process user response
     if user_input.lower() in ['', 'yes', 'y', 'approve', 'ok', 'proceed']:
@@ -313,14 +314,13 @@ async def plan_reviewer_node(task=None, **kwargs):
 async def supervisor_node(task=None, **kwargs):
     """Supervisor node that decides which agent should act next."""
     log_node_start("Supervisor")
-    global _global_node_states
 
-    # task and kwargs parameters are unused - supervisor relies on global state
-    # Extract shared state from global storage
-    shared_state = _global_node_states.get('shared', None)
+    # task and kwargs parameters are unused - supervisor relies on session state
+    # Extract shared state from session storage
+    shared_state = get_shared_state()
 
     if not shared_state:
-        logger.warning("No shared state found in global storage")
+        logger.warning("No shared state found in session storage")
         return None, {"text": "No shared state available"}
 
     agent = strands_utils.get_agent(
@@ -330,12 +330,16 @@ async def supervisor_node(task=None, **kwargs):
         enable_reasoning=False,
         prompt_cache_info=(True, "default"),  # enable prompt caching for reasoning agent
         tool_cache=True,
-        tools=[coder_agent_tool, reporter_agent_tool, tracker_agent_tool, validator_agent_tool],  # Add coder, reporter, tracker and validator agents as tools
+        tools=[coder_agent_tool, parallel_coder_agent_tool, reporter_agent_tool, tracker_agent_tool, validator_agent_tool],  # Add coder (single/parallel), reporter, tracker and validator agents as tools
         streaming=True,
     )
 
-    clues, full_plan, messages = shared_state.get("clues", ""), shared_state.get("full_plan", ""), shared_state["messages"]
-    message_text = '\n\n'.join([messages[-1]["content"][-1]["text"], FULL_PLAN_FORMAT.format(full_plan), clues])
+    clue_store, full_plan, messages = get_clue_store(shared_state), shared_state.get("full_plan", ""), shared_state["messages"]
+    message_text = '\n\n'.join([messages[-1]["content"][-1]["text"], FULL_PLAN_FORMAT.format(full_plan), clue_store.render("supervisor")])
+    if shared_state.get("resumed_steps"):
+        # Resumed from a checkpoint (utils/checkpoint.py) - point the supervisor past the finished work
+        completed = [f"- {step['tool']}: {str(step['input'])[:200]}" for step in shared_state.get("completed_steps", [])]
+        message_text = '\n\n'.join([message_text, RESUME_FORMAT.format('\n'.join(completed))])
 
     # Create message with cache point for messages caching
     # This caches the large context (full_plan, clues) for cost savings
@@ -352,7 +356,7 @@ async def supervisor_node(task=None, **kwargs):
         TokenTracker.accumulate(event, shared_state)
     response = {"text": full_text}
 
-    # Update shared global state
+    # Update shared session state
     shared_state['history'].append({"agent":"supervisor", "message": response["text"]})
 
     log_node_complete("Supervisor")
@@ -10,13 +10,14 @@ import textwrap
 from dotenv import load_dotenv
 from utils.strands_sdk_utils import strands_utils
 from graph.builder import build_graph
+from utils.session import GraphSession, current_session
+from utils import checkpoint
+from utils.clues import ClueStore
+from utils.display import display_sink
 
 # Load environment variables
 load_dotenv()
 
-# Import event queue for unified event processing
-from utils.event_queue import clear_queue 
-
 def remove_artifact_folder(folder_path="./artifacts/"):
     """
     ./artifhowact/ 폴더가 존재하면 삭제하는 함수
@@ -33,17 +34,17 @@ def remove_artifact_folder(folder_path="./artifacts/"):
     else:
         print(f"'{folder_path}' 폴더가 존재하지 않습니다. 생성하겠습니다.")
 
-def _setup_execution():
-    """Initialize execution environment"""
-    remove_artifact_folder()
-    clear_queue()
+def _setup_execution(session, resume=False):
+    """Initialize execution environment (a resumed session keeps its artifacts)"""
+    if not resume:
+        remove_artifact_folder(session.artifacts_dir)
+    session.event_bus.clear()
     print("\n=== Starting Queue-Only Event Stream ===")
 
-def _print_conversation_history():
+def _print_conversation_history(session):
     """Print final conversation history"""
     print("\n=== Conversation History ===")
-    from graph.nodes import _global_node_states
-    shared_state = _global_node_states.get('shared', {})
+    shared_state = session.shared
     history = shared_state.get('history', [])
 
     if history:
@@ -52,18 +53,33 @@ def _print_conversation_history():
     else:
         print("No conversation history found")
 
-def _print_token_usage_summary():
+def _print_token_usage_summary(session):
     """Print final token usage statistics"""
-    from graph.nodes import _global_node_states
     from utils.strands_sdk_utils import TokenTracker
 
-    shared_state = _global_node_states.get('shared', {})
-    TokenTracker.print_summary(shared_state)
+    TokenTracker.print_summary(session.shared)
+    print(f"Model pool: {strands_utils.get_model_pool_stats()}")
+    for model_id, stats in strands_utils.get_scheduler_stats().items():
+        print(f"Bedrock scheduler [{model_id}]: admitted {stats['admitted']}, queued {stats['waited']}, "
+              f"max wait {stats['max_wait_seconds']:.1f}s, throttled {stats['throttled']}")
+
+    clues = session.shared.get("clues")
+    if isinstance(clues, ClueStore) and clues.stats["renders"]:
+        stats = clues.stats
+        print(f"Clues: {len(clues)} records, {stats['rendered_bytes']:,} of {stats['full_bytes']:,} bytes sent "
+              f"across {stats['renders']} prompts (saved {stats['saved_bytes']:,} bytes, ~{stats['saved_tokens']:,} tokens)")
+
+async def graph_streaming_execution(payload, session=None, start_from=None):
+    """Execute full graph streaming workflow using new graph.stream_async method
 
-async def graph_streaming_execution(payload):
-    """Execute full graph streaming workflow using new graph.stream_async method"""
+    Args:
+        payload: Request payload with "user_query"
+        session: GraphSession to run in (defaults to the current/CLI session)
+        start_from: Graph node(s) to resume from; earlier results are taken from the session
+    """
 
-    _setup_execution()
+    session = session or current_session()
+    _setup_execution(session, resume=start_from is not None)
 
     # Get user query from payload
     user_query = payload.get("user_query", "")
@@ -80,22 +96,30 @@ async def graph_streaming_execution(payload):
         {
             "request": user_query,
             "request_prompt": f"Here is a user request: <user_request>{user_query}</user_request>"
-        }
+        },
+        session=session,
+        start_from=start_from
     ):
         yield event
 
+    if await checkpoint.finish(session) == "failed" and checkpoint.CHECKPOINT_ENABLED and session.checkpointed:
+        print(f"Workflow failed - resume with: python main.py --resume {session.session_id}")
+
     #########################
     ## modification END    ##
     #########################
     
-    _print_conversation_history()
-    _print_token_usage_summary()
+    display_sink.flush()
+    _print_conversation_history(session)
+    _print_token_usage_summary(session)
     print("=== Queue-Only Event Stream Complete ===")
 
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Strands Agent Demo')
     parser.add_argument('--user_query', type=str, help='User query for the agent')
+    parser.add_argument('--headless', action='store_true', help='Do not render the event stream in the terminal')
+    parser.add_argument('--resume', type=str, metavar='SESSION_ID', help='Resume a failed run from its checkpoint')
     
     args, unknown = parser.parse_known_args()
 
@@ -104,7 +128,21 @@ if __name__ == "__main__":
     #########################
 
     # Use argparse values if provided, otherwise use predefined values
-    if args.user_query:
+    start_from = None
+    if args.resume:
+        # 체크포인트에서 세션 복원 - 완료된 노드/에이전트 툴 단계는 건너뜀
+        try:
+            session, saved = checkpoint.restore(args.resume)
+        except FileNotFoundError:
+            print(f"No checkpoint for session {args.resume} - completed runs remove theirs, nothing to resume.")
+            raise SystemExit(0)
+        start_from = checkpoint.resume_nodes(saved)
+        if not start_from:
+            print(f"Session {args.resume} already completed - nothing to resume.")
+            raise SystemExit(0)
+        payload = {"user_query": session.shared.get("request", "")}
+        print(f"Resuming session {args.resume} from {', '.join(start_from)}")
+    elif args.user_query:
         payload = {
             "user_query": args.user_query,
         }
@@ -126,9 +164,22 @@ if __name__ == "__main__":
     ## modification END    ##
     #########################
 
+    if args.headless:
+        display_sink.enabled = False
+
+    if not args.resume:
+        session = GraphSession()
+        print(f"Session {session.session_id} (resume after a failure with: python main.py --resume {session.session_id})")
+
     # Use full graph streaming execution for real-time streaming with graph structure
     async def run_streaming():
-        async for event in graph_streaming_execution(payload):
+        async for event in graph_streaming_execution(payload, session=session, start_from=start_from):
             strands_utils.process_event_for_display(event)
 
-    asyncio.run(run_streaming())
\ No newline at end of file
+    try:
+        asyncio.run(run_streaming())
+    except BaseException:
+        if checkpoint.CHECKPOINT_ENABLED:
+            print(f"Run interrupted - checkpoint kept at {checkpoint.checkpoint_path(session.session_id)}. "
+                  f"Resume with: python main.py --resume {session.session_id}")
+        raise
\ No newline at end of file
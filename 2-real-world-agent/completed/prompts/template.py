@@ -1,11 +1,167 @@
 import os
+import string
+import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PROMPT_DIR = os.path.dirname(__file__) ## Template.py가 있는 dir이 기준
+PROMPT_HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "false").lower() == "true"  # 개발 중 .md 수정 즉시 반영
+PROMPT_RENDER_CACHE_SIZE = int(os.getenv("PROMPT_RENDER_CACHE_SIZE", "256"))
+# "split": prompts also carry their static instructions and per-request front matter as separate
+# parts, which cached agents send as separate system blocks (see PromptBlocks)
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "split").lower()
+# Minute precision: a per-second clock would change the prompt on every agent creation
+PROMPT_TIME_FORMAT = os.getenv("PROMPT_TIME_FORMAT", "%a %b %d %Y %H:%M %z")
+FRONT_MATTER = "---\n"
+
+
+class PromptBlocks(str):
+    """A rendered prompt that also knows its static and dynamic parts.
+
+    It is the prompt in the template's own order (`text`, front matter first) everywhere a
+    str is expected. Only strands_utils.get_agent with prompt caching on sends the parts
+    instead - static instructions, cachePoint, front matter - so agents without cache
+    points keep the original prompt.
+    """
+
+    def __new__(cls, static: str, dynamic: str, text: str = None):
+        prompt = super().__new__(cls, static + dynamic if text is None else text)
+        prompt.static = static
+        prompt.dynamic = dynamic
+        return prompt
+
+
+class CompiledTemplate:
+    """A prompt .md file parsed once into literal text and {FIELD} slots."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.source = f.read()
+        self.mtime = os.path.getmtime(path)
+        self.parts = self._parse(self.source)
+        self.fields = tuple(sorted({field for _, field, _, _ in self.parts if field is not None}))
+
+        # Front matter (--- CURRENT_TIME / USER_REQUEST / ... ---) holds the per-request values.
+        # A template whose body has no fields can be sent as static body + dynamic front matter.
+        self.header = self.header_parts = self.body = None
+        end = self.source.find("\n" + FRONT_MATTER, len(FRONT_MATTER)) if self.source.startswith(FRONT_MATTER) else -1
+        if end != -1:
+            header, body = self.source[:end + 1 + len(FRONT_MATTER)], self.source[end + 1 + len(FRONT_MATTER):]
+            if all(field is None for _, field, _, _ in self._parse(body)):
+                self.header, self.header_parts, self.body = header, self._parse(header), body.format()
+
+    @staticmethod
+    def _parse(text: str) -> list:
+        # [(literal, field, format_spec, conversion)] - literals already have {{ }} unescaped
+        return list(string.Formatter().parse(text))
+
+    @staticmethod
+    def _render(text: str, parts: list, context: dict) -> str:
+        # Plain {NAME} slots render by concatenation; anything fancier goes through str.format
+        if any(spec or conversion or (field is not None and not field.isidentifier())
+               for _, field, spec, conversion in parts):
+            return text.format(**context)
+        pieces = []
+        for literal, field, _, _ in parts:
+            pieces.append(literal)
+            if field is not None:
+                pieces.append(str(context[field]))
+        return "".join(pieces)
+
+    def render(self, context: dict) -> str:
+        return self._render(self.source, self.parts, context)
+
+    def render_blocks(self, context: dict) -> PromptBlocks:
+        """The rendered prompt with its static body and rendered front matter as parts (one dynamic block if it has no front matter)."""
+        if self.body is None:
+            return PromptBlocks("", self.render(context))
+        return PromptBlocks(self.body, "\n" + self._render(self.header, self.header_parts, context), self.render(context))
+
+
+class PromptRegistry:
+    """Preloaded prompt templates with a memo of rendered prompts.
+
+    Identical contexts return the identical string, so system prompts sent with a cachePoint
+    stay byte-for-byte stable between agent creations. Only the fields a template actually
+    uses are part of the memo key.
+    """
+
+    def __init__(self, prompt_dir: str = PROMPT_DIR, hot_reload: bool = PROMPT_HOT_RELOAD,
+                 cache_size: int = PROMPT_RENDER_CACHE_SIZE):
+        self.prompt_dir = prompt_dir
+        self.hot_reload = hot_reload
+        self.cache_size = cache_size
+        self._templates = {}
+        self._rendered = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"renders": 0, "hits": 0, "reloads": 0}
+
+    def preload(self) -> None:
+        """Compile every .md file in the prompt directory."""
+        for file_name in sorted(os.listdir(self.prompt_dir)):
+            if file_name.endswith(".md"):
+                self.get(file_name[:-3])
+        logger.info(f"Prompt registry: {len(self._templates)} templates preloaded")
+
+    def get(self, prompt_name: str) -> CompiledTemplate:
+        template = self._templates.get(prompt_name)
+        if template is None:
+            template = CompiledTemplate(prompt_name, os.path.join(self.prompt_dir, f"{prompt_name}.md"))
+            with self._lock:
+                self._templates[prompt_name] = template
+        elif self.hot_reload and os.path.getmtime(template.path) != template.mtime:
+            template = CompiledTemplate(prompt_name, template.path)
+            with self._lock:
+                self._templates[prompt_name] = template
+                # Rendered prompts of the old version must not be served again
+                for key in [key for key in self._rendered if key[0] == prompt_name]:
+                    del self._rendered[key]
+                self.stats["reloads"] += 1
+            logger.info(f"Prompt template reloaded: {prompt_name}")
+        return template
+
+    def render(self, prompt_name: str, context: dict, layout: str = PROMPT_LAYOUT) -> str:
+        template = self.get(prompt_name)
+        self.stats["renders"] += 1
+        try:
+            key = (prompt_name, template.mtime, layout) + tuple(context.get(field) for field in template.fields)
+            hash(key)
+        except TypeError:  # unhashable context value: render without memo
+            return self._render(template, context, layout)
+
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                self.stats["hits"] += 1
+                return rendered
+
+        rendered = self._render(template, context, layout)
+        with self._lock:
+            self._rendered[key] = rendered
+            while len(self._rendered) > self.cache_size:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    @staticmethod
+    def _render(template: CompiledTemplate, context: dict, layout: str) -> str:
+        return template.render_blocks(context) if layout == "split" else template.render(context)
+
+
+prompt_registry = PromptRegistry()
+prompt_registry.preload()
+
+
 def apply_prompt_template(prompt_name: str, prompt_context={}) -> str:
-    
-    system_prompts = open(os.path.join(os.path.dirname(__file__), f"{prompt_name}.md")).read() ## Template.py가 있는 dir이 기준
-    context = {"CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z")}
+
+    context = {"CURRENT_TIME": datetime.now().strftime(PROMPT_TIME_FORMAT)}
     context.update(prompt_context)
-    system_prompts = system_prompts.format(**context)
-        
-    return system_prompts
\ No newline at end of file
+    system_prompts = prompt_registry.render(prompt_name, context)
+
+    return system_prompts
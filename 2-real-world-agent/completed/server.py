@@ -0,0 +1,184 @@
+"""
+Long-lived HTTP server that streams graph_streaming_execution events over Server-Sent Events.
+
+Usage:
+    python server.py --host 0.0.0.0 --port 8080
+
+    curl -N -X POST localhost:8080/research \
+         -H "Content-Type: application/json" \
+         -d '{"user_query": "..."}'
+
+Each request runs in its own GraphSession with an isolated `./sessions/<id>/artifacts/`
+workspace. At most MAX_CONCURRENT_SESSIONS workflows run at once; up to MAX_QUEUED_REQUESTS
+more wait in line, beyond that requests are rejected with 503. A client disconnect cancels
+its workflow. Server sessions write no checkpoints (there is no resume endpoint), and
+finished workspaces are pruned after every session (SESSIONS_MAX_KEPT / SESSIONS_TTL_HOURS,
+utils/session.py).
+"""
+import os
+import json
+import asyncio
+import contextlib
+import functools
+import logging
+import argparse
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from utils.session import GraphSession, prune_sessions
+from utils.kernel_pool import kernel_pool
+from utils.events import event_to_dict
+from utils.tool_use_map import tool_use_map_stats
+from utils import checkpoint, cube, dataset_profile
+from utils.strands_sdk_utils import strands_utils
+
+# Load environment variables
+load_dotenv()
+
+from main import graph_streaming_execution
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_CONCURRENT_SESSIONS = int(os.getenv("MAX_CONCURRENT_SESSIONS", "4"))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "32"))
+
+class SessionScheduler:
+    """Admission control: a fixed number of running sessions plus a bounded wait queue."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_SESSIONS, max_queued=MAX_QUEUED_REQUESTS):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.running = 0
+        self.queued = 0
+
+    def is_full(self):
+        return self.running >= self.max_concurrent and self.queued >= self.max_queued
+
+    async def acquire(self):
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+
+    def release(self):
+        self.running -= 1
+        self._slots.release()
+
+    def stats(self):
+        return {"running": self.running, "queued": self.queued,
+                "max_concurrent": self.max_concurrent, "max_queued": self.max_queued}
+
+scheduler = SessionScheduler()
+_active_sessions = set()
+
+def _prune_workspaces():
+    """Remove old finished workspaces in a worker thread (never blocks the event loop)."""
+    asyncio.get_running_loop().run_in_executor(None, functools.partial(prune_sessions, active=frozenset(_active_sessions)))
+
+def _format_sse(event, event_name=None):
+    """Serialize one event as an SSE frame."""
+    lines = [f"event: {event_name}"] if event_name else []
+    lines.append(f"data: {json.dumps(event_to_dict(event), ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+async def _stream_session(payload, session):
+    """Wait for a slot, run the workflow and yield SSE frames until it completes."""
+    _active_sessions.add(session.session_id)
+    yield _format_sse({"session_id": session.session_id, **scheduler.stats()}, "queued")
+
+    try:
+        await scheduler.acquire()
+    except asyncio.CancelledError:
+        session.close()
+        _active_sessions.discard(session.session_id)
+        raise
+
+    try:
+        yield _format_sse({"session_id": session.session_id, "workdir": session.workdir}, "started")
+        async for event in graph_streaming_execution(payload, session=session):
+            yield _format_sse(event)
+
+        artifacts = []
+        for root, _, files in os.walk(session.artifacts_dir):
+            artifacts.extend(os.path.relpath(os.path.join(root, name), session.workdir) for name in files)
+        yield _format_sse({"session_id": session.session_id, "artifacts": sorted(artifacts)}, "done")
+    except asyncio.CancelledError:
+        # Raised when the client disconnects; graph.stream_async cancels the workflow on the way out
+        logger.info(f"Session {session.session_id} cancelled (client disconnected)")
+        raise
+    finally:
+        scheduler.release()
+        session.close()
+        _active_sessions.discard(session.session_id)
+        _prune_workspaces()
+
+async def research(request: Request):
+    """POST /research {"user_query": "..."} -> text/event-stream"""
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        return JSONResponse({"error": "Request body must be JSON"}, status_code=400)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+    if not payload.get("user_query"):
+        return JSONResponse({"error": "user_query is required"}, status_code=400)
+    if scheduler.is_full():
+        return JSONResponse({"error": "Server busy, try again later", **scheduler.stats()}, status_code=503)
+
+    session = GraphSession.isolated(interactive=False, checkpointed=False)
+    return StreamingResponse(
+        _stream_session(payload, session),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Session-Id": session.session_id},
+    )
+
+async def health(_request: Request):
+    """GET /health -> scheduler, model pool and kernel pool stats"""
+    return JSONResponse({"status": "ok", **scheduler.stats(), "model_pool": strands_utils.get_model_pool_stats(),
+                         "kernel_pool": kernel_pool.stats(),
+                         "bedrock_scheduler": strands_utils.get_scheduler_stats(),
+                         "tool_use_map": tool_use_map_stats(),
+                         "dataset_profiles": dataset_profile.stats,
+                         "cube": cube.stats,
+                         "checkpoints": checkpoint.stats})
+
+def _warm_data_caches():
+    dataset_profile.warm_up()
+    cube.warm_up()
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    """Pre-warm Python kernels so the first tool call of a session skips interpreter startup,
+    prune workspaces left by earlier runs, and profile ./data (and build its cubes) in the background so the first planner prompt and
+    validator call do not wait for it."""
+    kernel_pool.warm_up()
+    _prune_workspaces()
+    profiling = asyncio.create_task(asyncio.to_thread(_warm_data_caches))
+    try:
+        yield
+    finally:
+        if not profiling.done():
+            profiling.cancel()
+        kernel_pool.shutdown()
+
+app = Starlette(routes=[
+    Route("/research", research, methods=["POST"]),
+    Route("/health", health, methods=["GET"]),
+], lifespan=lifespan)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Strands Agent SSE Server')
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Bind address')
+    parser.add_argument('--port', type=int, default=8080, help='Bind port')
+    args = parser.parse_args()
+
+    uvicorn.run(app, host=args.host, port=args.port)
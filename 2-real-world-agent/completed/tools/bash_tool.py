@@ -4,6 +4,10 @@ from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
 from tools.decorators import log_io
+from utils.session import current_session
+from utils.output_stream import ToolOutputStreamer, stream_process
+from utils.kernel_pool import script_env
+from utils.result_shaper import shape_tool_result
 
 
 # Simple logger setup
@@ -38,11 +42,14 @@ def _handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."]):
 
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Executing Bash: {cmd}{Colors.END}")
+    # Output lines are streamed to the event bus as they appear; only a bounded tail is returned
+    streamer = ToolOutputStreamer("bash_tool")
     try:
-        # Execute the command and capture output
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True
-        )
+        # Execute the command in the session workdir and capture output
+        result = stream_process(cmd, shell=True, cwd=current_session().workdir, on_output=streamer.line,
+                                env=script_env())
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
         # Return stdout as the result
         results = "||".join([cmd, result.stdout])
         return results + "\n"
@@ -59,6 +66,9 @@ def _handle_bash_tool(cmd: Annotated[str, "The bash command to be executed."]):
         logger.error(f"{Colors.RED}Error: {str(e)}{Colors.END}")
         return error_message
 
+    finally:
+        streamer.close()
+
 # Function name must match tool name
 def _bash_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
@@ -82,7 +92,7 @@ def _bash_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-bash_tool = PythonAgentTool("bash_tool", TOOL_SPEC, _bash_tool)
+bash_tool = PythonAgentTool("bash_tool", TOOL_SPEC, shape_tool_result("bash_tool")(_bash_tool))
 
 if __name__ == "__main__":
     # Test example using the handle_bash_tool function directly
@@ -11,8 +11,12 @@ from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
 from tools.bash_tool import bash_tool
 from tools.write_and_execute_tool import write_and_execute_tool
-from strands_tools import file_read
+from tools.file_read_tool import file_read_tool
 from utils.strands_sdk_utils import TokenTracker
+from utils.session import get_shared_state
+from utils.clues import get_clue_store, current_step
+from utils.dataset_profile import get_data_profile
+from utils.checkpoint import checkpoint_tool
 
 load_dotenv()
 
@@ -39,14 +43,13 @@ TOOL_SPEC = {
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 FULL_PLAN_FORMAT = "Here is full plan :\n\n<full_plan>\n{}\n</full_plan>\n\n*Please consider this to select the next step.*"
-CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
 
 class Colors:
     GREEN = '\033[92m'
     YELLOW = '\033[93m'
     END = '\033[0m'
 
-def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question that needs to be executed by the coder agent."]):
+async def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question that needs to be executed by the coder agent."]):
     """
     Execute Python code and bash commands using a specialized coder agent.
 
@@ -64,31 +67,33 @@ def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question t
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Coder Agent Tool starting task{Colors.END}")
 
-    # Try to extract shared state from global storage
-    from graph.nodes import _global_node_states
-    shared_state = _global_node_states.get('shared', None)
+    # Try to extract shared state from the active session
+    shared_state = get_shared_state()
 
     if not shared_state:
         logger.warning("No shared state found")
         return "Error: No shared state available"
 
     request_prompt, full_plan = shared_state.get("request_prompt", ""), shared_state.get("full_plan", "")
-    clues, messages = shared_state.get("clues", ""), shared_state.get("messages", [])
+    clue_store, messages = get_clue_store(shared_state), shared_state.get("messages", [])
+    step = shared_state.get("current_step") or current_step(full_plan, "Coder")
+    data_profile = await asyncio.to_thread(get_data_profile, shared_state)  # reads the data files on first use
 
     # Create coder agent with specialized tools using consistent pattern
     coder_agent = strands_utils.get_agent(
         agent_name="coder",
-        system_prompts=apply_prompt_template(prompt_name="coder", prompt_context={"USER_REQUEST": request_prompt, "FULL_PLAN": full_plan}),
+        system_prompts=apply_prompt_template(prompt_name="coder", prompt_context={"USER_REQUEST": request_prompt, "FULL_PLAN": full_plan, "DATA_PROFILE": data_profile}),
         model_id=os.getenv("CODER_MODEL_ID", os.getenv("DEFAULT_MODEL_ID")),
         enable_reasoning=False,
         prompt_cache_info=(True, "default"),  # reasoning agent uses prompt caching
         tool_cache=True,
-        tools=[write_and_execute_tool, bash_tool, file_read],
+        tools=[write_and_execute_tool, bash_tool, file_read_tool],
         streaming=True  # Enable streaming for consistency
     )
 
     # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    # Clues are projected per agent (relevant records, size-budgeted) - see utils/clues.py
+    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clue_store.render("coder")])
 
     # Create message with cache point for messages caching
     # This caches the large context (clues) for cost savings
@@ -106,11 +111,11 @@ def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question t
             TokenTracker.accumulate(event, shared_state)
         return {"text": full_text}
 
-    response = asyncio.run(process_coder_stream())
+    response = await process_coder_stream()
     result_text = response['text']
 
     # Update clues
-    clues = '\n\n'.join([clues, CLUES_FORMAT.format("coder", response["text"])])
+    clue_store.add("coder", response["text"], step=step)
 
     # Update history
     history = shared_state.get("history", [])
@@ -118,7 +123,6 @@ def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question t
 
     # Update shared state
     shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("coder", response["text"]), imgs=[])]
-    shared_state['clues'] = clues
     shared_state['history'] = history
 
     logger.info(f"\n{Colors.GREEN}Coder Agent Tool completed successfully{Colors.END}")
@@ -127,12 +131,12 @@ def _handle_coder_agent_tool(task: Annotated[str, "The coding task or question t
     return result_text
 
 # Function name must match tool name
-def _coder_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
+async def _coder_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     task = tool["input"]["task"]
 
     # Use the existing handle_coder_agent_tool function
-    result = _handle_coder_agent_tool(task)
+    result = await _handle_coder_agent_tool(task)
 
     # Check if execution was successful based on the result string
     if "Error in coder agent tool" in result:
@@ -149,4 +153,4 @@ def _coder_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-coder_agent_tool = PythonAgentTool("coder_agent_tool", TOOL_SPEC, _coder_agent_tool)
+coder_agent_tool = PythonAgentTool("coder_agent_tool", TOOL_SPEC, checkpoint_tool("coder_agent_tool")(_coder_agent_tool))
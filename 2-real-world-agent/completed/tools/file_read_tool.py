@@ -0,0 +1,36 @@
+import re
+import logging
+from typing import Any
+from strands.types.tools import ToolResult, ToolUse
+from strands.tools.tools import PythonAgentTool
+from strands_tools import file_read
+from utils.session import current_session
+from utils.result_shaper import shape_tool_result
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Same spec and name as strands_tools.file_read, so prompts referring to `file_read` are unchanged
+TOOL_SPEC = file_read.TOOL_SPEC
+
+# Analysis results (e.g. ./artifacts/all_results.txt) must reach the reporter complete; spilled tool outputs stay budgeted
+_ARTIFACT_TEXT = re.compile(r"(?:^|/)artifacts/(?!tool_outputs/)[^*?]+\.txt$")
+
+def _reads_artifact_text(tool: ToolUse) -> bool:
+    path = tool["input"].get("path")
+    return isinstance(path, str) and all(_ARTIFACT_TEXT.search(part.strip()) for part in path.split(","))
+
+def _file_read_tool(tool: ToolUse, **kwargs: Any) -> ToolResult:
+    """Run strands_tools.file_read with relative paths resolved against the session workdir."""
+    session = current_session()
+    tool_input = dict(tool["input"])
+
+    # file_read accepts comma-separated paths/patterns
+    if isinstance(tool_input.get("path"), str):
+        tool_input["path"] = ",".join(session.resolve_path(path.strip()) for path in tool_input["path"].split(","))
+
+    return file_read.file_read({**tool, "input": tool_input}, **kwargs)
+
+# Wrap with PythonAgentTool for proper Strands SDK registration
+file_read_tool = PythonAgentTool(TOOL_SPEC["name"], TOOL_SPEC, shape_tool_result(TOOL_SPEC["name"], spill=False, exempt=_reads_artifact_text)(_file_read_tool))
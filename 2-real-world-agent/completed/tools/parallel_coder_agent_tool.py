@@ -0,0 +1,177 @@
+import os
+import shutil
+import asyncio
+import logging
+from typing import Any, Dict, List
+from strands.types.tools import ToolResult, ToolUse
+from strands.tools.tools import PythonAgentTool
+from dotenv import load_dotenv
+from utils.common_utils import get_message_from_string
+from utils.strands_sdk_utils import TokenTracker
+from utils.session import current_session, activate_session
+from utils.clues import get_clue_store
+from utils.fanout import parse_plan_steps, dependency_layers, fork_artifacts, merge_artifacts
+from utils.checkpoint import checkpoint_tool
+from tools.coder_agent_tool import _handle_coder_agent_tool, RESPONSE_FORMAT
+
+load_dotenv()
+
+# Simple logger setup
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Upper bound on coder agents running at the same time (Bedrock throughput, CPU for scripts)
+MAX_PARALLEL_CODERS = int(os.getenv("MAX_PARALLEL_CODERS", "3"))
+
+TOOL_SPEC = {
+    "name": "parallel_coder_agent_tool",
+    "description": "Run several independent Coder steps of the plan at the same time. Each task runs in its own workspace; results, clues and artifacts are merged back in step order. Use only for Coder steps whose dependencies are already complete and that do not depend on each other.",
+    "inputSchema": {
+        "json": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "description": "Coder tasks to execute concurrently.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "step": {
+                                "type": "integer",
+                                "description": "Step number in full_plan (### N. Coder: ...)."
+                            },
+                            "task": {
+                                "type": "string",
+                                "description": "The complete, self-contained coding task for this step."
+                            },
+                            "depends_on": {
+                                "type": "array",
+                                "items": {"type": "integer"},
+                                "description": "Step numbers this task needs first. Defaults to the plan's (depends_on: ...) annotation."
+                            }
+                        },
+                        "required": ["step", "task"]
+                    }
+                }
+            },
+            "required": ["tasks"]
+        }
+    }
+}
+
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    END = '\033[0m'
+
+async def _run_forked_step(parent, task: Dict[str, Any], limiter: asyncio.Semaphore) -> Dict[str, Any]:
+    """Run one coder task in a child session with its own copy of the artifacts."""
+    child = parent.fork(f"step{task['id']}")
+    fork = {"id": task["id"], "session": child, "artifacts_dir": child.artifacts_dir,
+            "snapshot": fork_artifacts(parent.artifacts_dir, child.artifacts_dir)}
+    child.shared["messages"] = [get_message_from_string(role="user", string=task["task"], imgs=[])]
+    child.shared["clues"] = get_clue_store(parent.shared).fork()
+    fork["clue_base"] = len(child.shared["clues"])
+    child.shared["current_step"] = task["id"]
+
+    async with limiter:
+        logger.info(f"{Colors.GREEN}Parallel coder: step {task['id']} started{Colors.END}")
+        try:
+            with activate_session(child):
+                fork["text"] = await _handle_coder_agent_tool(task["task"])
+        except Exception as e:
+            logger.error(f"{Colors.RED}Parallel coder: step {task['id']} failed: {e}{Colors.END}")
+            fork["error"] = str(e)
+    return fork
+
+def _merge_forks(parent, forks: List[Dict[str, Any]]) -> None:
+    """Fold child sessions back into the parent in step order."""
+    shared_state = parent.shared
+    clue_store = get_clue_store(shared_state)
+    succeeded = [fork for fork in forks if "error" not in fork]
+
+    written = merge_artifacts(parent.artifacts_dir, succeeded)
+    for fork in succeeded:
+        child_state = fork["session"].shared
+        # Children start from the parent's clues; keep only the records each step added
+        child_clues = child_state["clues"]
+        clue_store.extend(child_clues.since(fork["clue_base"]))
+        for key, value in child_clues.stats.items():
+            clue_store.stats[key] += value
+        shared_state.setdefault("history", []).extend(child_state.get("history", []))
+    logger.info(f"{Colors.GREEN}Parallel coder: merged {len(written)} artifact(s) from {len(succeeded)} step(s){Colors.END}")
+
+    for fork in forks:
+        fork["session"].close()
+        shutil.rmtree(fork["session"].workdir, ignore_errors=True)
+
+async def _handle_parallel_coder_agent_tool(tasks: List[Dict[str, Any]]) -> str:
+    """
+    Execute independent Coder steps concurrently.
+
+    Tasks are grouped into waves by their dependencies (explicit `depends_on`, otherwise the
+    plan annotation). Each wave runs concurrently; a wave is merged into the session before
+    the next one starts, so dependent steps see their inputs.
+
+    Returns:
+        Per-step coder responses, in step order
+    """
+    print()  # Add newline before log
+    parent = current_session()
+    shared_state = parent.shared
+    if not shared_state:
+        logger.warning("No shared state found")
+        return "Error: No shared state available"
+
+    plan_dependencies = {step["step"]: step["depends_on"] for step in parse_plan_steps(shared_state.get("full_plan", ""))}
+    normalized = [{"id": int(task["step"]), "task": task["task"],
+                   "depends_on": task.get("depends_on", plan_dependencies.get(int(task["step"]), []))} for task in tasks]
+    try:
+        layers = dependency_layers(normalized)
+    except ValueError as e:
+        return f"Error in parallel coder agent tool: {e}"
+
+    TokenTracker.initialize(shared_state)  # children accumulate into the same token_usage dict
+    logger.info(f"\n{Colors.GREEN}Parallel Coder Agent Tool: {len(normalized)} task(s) in {len(layers)} wave(s){Colors.END}")
+    limiter = asyncio.Semaphore(MAX_PARALLEL_CODERS)
+    results = []
+    for layer in layers:
+        forks = await asyncio.gather(*(_run_forked_step(parent, task, limiter) for task in layer))
+        _merge_forks(parent, forks)
+        results.extend(forks)
+
+    responses = [
+        f"## Step {fork['id']}\n" + (f"Error in coder agent tool: {fork['error']}" if "error" in fork else fork["text"])
+        for fork in results
+    ]
+    result_text = "\n\n".join(responses)
+    shared_state["messages"] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("coder", result_text), imgs=[])]
+
+    logger.info(f"\n{Colors.GREEN}Parallel Coder Agent Tool completed{Colors.END}")
+    if all("error" in fork for fork in results):
+        return f"Error in parallel coder agent tool:\n\n{result_text}"
+    return result_text
+
+# Function name must match tool name
+async def _parallel_coder_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
+    tool_use_id = tool["toolUseId"]
+    tasks = tool["input"]["tasks"]
+
+    result = await _handle_parallel_coder_agent_tool(tasks)
+
+    if result.startswith("Error"):
+        return {
+            "toolUseId": tool_use_id,
+            "status": "error",
+            "content": [{"text": result}]
+        }
+    else:
+        return {
+            "toolUseId": tool_use_id,
+            "status": "success",
+            "content": [{"text": result}]
+        }
+
+# Wrap with PythonAgentTool for proper Strands SDK registration
+parallel_coder_agent_tool = PythonAgentTool("parallel_coder_agent_tool", TOOL_SPEC, checkpoint_tool("parallel_coder_agent_tool")(_parallel_coder_agent_tool))
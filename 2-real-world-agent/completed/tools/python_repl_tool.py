@@ -1,10 +1,11 @@
-import sys
 import logging
-import subprocess
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
 from tools.decorators import log_io
+from utils.session import current_session
+from utils.kernel_pool import run_python
+from utils.result_shaper import shape_tool_result
 
 
 # Simple logger setup
@@ -44,11 +45,13 @@ class PythonREPL:
     def run(self, command):
         try:
             # 입력된 명령어 실행
-            result = subprocess.run(
-                [sys.executable, "-c", command],
-                capture_output=True,
-                text=True,
-                timeout=600  # 타임아웃 설정
+            session = current_session()
+            result = run_python(
+                command,
+                cwd=session.workdir,
+                timeout=600,  # 타임아웃 설정
+                session_id=session.session_id,
+                persistent=True  # REPL 변수는 호출 간 유지
             )
             # 결과 반환
             if result.returncode == 0:
@@ -110,4 +113,4 @@ def _python_repl_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-python_repl_tool = PythonAgentTool("python_repl_tool", TOOL_SPEC, _python_repl_tool)
+python_repl_tool = PythonAgentTool("python_repl_tool", TOOL_SPEC, shape_tool_result("python_repl_tool")(_python_repl_tool))
@@ -1,6 +1,5 @@
 import logging
 import os
-import asyncio
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
@@ -11,8 +10,11 @@ from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
 from tools.bash_tool import bash_tool
 from tools.write_and_execute_tool import write_and_execute_tool
-from strands_tools import file_read
+from tools.file_read_tool import file_read_tool
 from utils.strands_sdk_utils import TokenTracker
+from utils.session import get_shared_state
+from utils.clues import get_clue_store, current_step
+from utils.checkpoint import checkpoint_tool
 
 load_dotenv()
 
@@ -44,13 +46,12 @@ TOOL_SPEC = {
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 FULL_PLAN_FORMAT = "Here is full plan :\n\n<full_plan>\n{}\n</full_plan>\n\n*Please consider this to select the next step.*"
-CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
 
 class Colors:
     GREEN = '\033[92m'
     END = '\033[0m'
 
-def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or instruction for generating the report."]):
+async def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or instruction for generating the report."]):
     """
     Generate comprehensive reports based on analysis results using a specialized reporter agent.
 
@@ -70,16 +71,16 @@ def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or ins
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Reporter Agent Tool starting{Colors.END}")
 
-    # Try to extract shared state from global storage
-    from graph.nodes import _global_node_states
-    shared_state = _global_node_states.get('shared', None)
+    # Try to extract shared state from the active session
+    shared_state = get_shared_state()
 
     if not shared_state:
         logger.warning("No shared state found")
         return "Error: No shared state available"
 
     request_prompt, full_plan = shared_state.get("request_prompt", ""), shared_state.get("full_plan", "")
-    clues, messages = shared_state.get("clues", ""), shared_state.get("messages", [])
+    clue_store, messages = get_clue_store(shared_state), shared_state.get("messages", [])
+    step = shared_state.get("current_step") or current_step(full_plan, "Reporter")
 
     # Create reporter agent with specialized tools using consistent pattern
     reporter_agent = strands_utils.get_agent(
@@ -89,12 +90,12 @@ def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or ins
         enable_reasoning=False,
         prompt_cache_info=(True, "default"), # reasoning agent uses prompt caching
         tool_cache=True,
-        tools=[write_and_execute_tool, bash_tool, file_read],
+        tools=[write_and_execute_tool, bash_tool, file_read_tool],
         streaming=True  # Enable streaming for consistency
     )
 
     # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clue_store.render("reporter")])
 
     # Create message with cache point for messages caching
     # This caches the large context (clues) for cost savings
@@ -112,11 +113,11 @@ def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or ins
             TokenTracker.accumulate(event, shared_state)
         return {"text": full_text}
 
-    response = asyncio.run(process_reporter_stream())
+    response = await process_reporter_stream()
     result_text = response['text']
 
     # Update clues
-    clues = '\n\n'.join([clues, CLUES_FORMAT.format("reporter", response["text"])])
+    clue_store.add("reporter", response["text"], step=step)
 
     # Update history
     history = shared_state.get("history", [])
@@ -124,7 +125,6 @@ def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or ins
 
     # Update shared state
     shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("reporter", response["text"]), imgs=[])]
-    shared_state['clues'] = clues
     shared_state['history'] = history
 
     logger.info(f"\n{Colors.GREEN}Reporter Agent Tool completed{Colors.END}")
@@ -133,12 +133,12 @@ def _handle_reporter_agent_tool(_task: Annotated[str, "The reporting task or ins
     return result_text
 
 # Function name must match tool name
-def _reporter_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
+async def _reporter_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     task = tool["input"]["task"]
 
     # Use the existing handle_reporter_agent_tool function
-    result = _handle_reporter_agent_tool(task)
+    result = await _handle_reporter_agent_tool(task)
 
     # Check if execution was successful based on the result string
     if "Error in reporter agent tool" in result or "Error: " in result:
@@ -155,4 +155,4 @@ def _reporter_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-reporter_agent_tool = PythonAgentTool("reporter_agent_tool", TOOL_SPEC, _reporter_agent_tool)
\ No newline at end of file
+reporter_agent_tool = PythonAgentTool("reporter_agent_tool", TOOL_SPEC, checkpoint_tool("reporter_agent_tool")(_reporter_agent_tool))
\ No newline at end of file
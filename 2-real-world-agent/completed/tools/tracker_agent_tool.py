@@ -1,6 +1,5 @@
 import logging
 import os
-import asyncio
 from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
@@ -9,6 +8,9 @@ from utils.strands_sdk_utils import strands_utils
 from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
 from utils.strands_sdk_utils import TokenTracker
+from utils.session import get_shared_state
+from utils.clues import get_clue_store
+from utils.checkpoint import checkpoint_tool
 
 load_dotenv()
 
@@ -43,14 +45,13 @@ TOOL_SPEC = {
 }
 
 RESPONSE_FORMAT = "Updated task tracking from {}:\n\n<tracking_update>\n{}\n</tracking_update>\n\n*Task status has been updated.*"
-CLUES_FORMAT = "Here is updated tracking status:\n\n<tracking_clues>\n{}\n</tracking_clues>\n\n"
 
 class Colors:
     GREEN = '\033[92m'
     BLUE = '\033[94m'
     END = '\033[0m'
 
-def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the agent that just completed its task"],
+async def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the agent that just completed its task"],
                               completion_summary: Annotated[str, "Summary of what was completed by the agent"]):
     """
     Track and update task completion status based on agent results.
@@ -70,9 +71,8 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Tracker Agent Tool starting{Colors.END}")
     
-    # Try to extract shared state from global storage
-    from graph.nodes import _global_node_states
-    shared_state = _global_node_states.get('shared', None)
+    # Try to extract shared state from the active session
+    shared_state = get_shared_state()
     
     if not shared_state:
         logger.warning("No shared state found")
@@ -80,7 +80,7 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
                     
     request_prompt = shared_state.get("request_prompt", "")
     full_plan = shared_state.get("full_plan", "")
-    clues = shared_state.get("clues", "")
+    clue_store = get_clue_store(shared_state)
     messages = shared_state.get("messages", [])
     
     # Create tracker agent - uses reasoning LLM like planner and supervisor
@@ -105,7 +105,7 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
     tracking_message = f"Agent '{completed_agent}' has completed its task. Here's what was accomplished:\n\n{completion_summary}\n\nPlease update the task completion status accordingly."
 
     # Add context from previous messages and clues if available
-    if messages: tracking_message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues, tracking_message])
+    if messages: tracking_message = '\n\n'.join([messages[-1]["content"][-1]["text"], clue_store.render("tracker"), tracking_message])
 
     # Process streaming response and collect text in one pass
     async def process_tracker_stream():
@@ -119,12 +119,12 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
             TokenTracker.accumulate(event, shared_state)
         return {"text": full_text}
     
-    response = asyncio.run(process_tracker_stream())
+    response = await process_tracker_stream()
     
     result_text = response['text']
     
     # Update clues with tracking information
-    clues = '\n\n'.join([clues, CLUES_FORMAT.format(response["text"])])
+    clue_store.add("tracker", response["text"])
     
     # Update history
     history = shared_state.get("history", [])
@@ -132,7 +132,6 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
     
     # Update shared state with tracking results
     shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("tracker", response["text"]), imgs=[])]
-    shared_state['clues'] = clues
     shared_state['history'] = history
     
     # Update the full_plan with the tracked version if the response contains an updated plan
@@ -147,13 +146,13 @@ def _handle_tracker_agent_tool(completed_agent: Annotated[str, "The name of the
     return result_text
 
 # Function name must match tool name
-def _tracker_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
+async def _tracker_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     completed_agent = tool["input"]["completed_agent"]
     completion_summary = tool["input"]["completion_summary"]
 
     # Use the existing handle_tracker_agent_tool function
-    result = _handle_tracker_agent_tool(completed_agent, completion_summary)
+    result = await _handle_tracker_agent_tool(completed_agent, completion_summary)
 
     # Check if execution was successful based on the result string
     if "Error" in result:
@@ -170,4 +169,4 @@ def _tracker_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-tracker_agent_tool = PythonAgentTool("tracker_agent_tool", TOOL_SPEC, _tracker_agent_tool)
\ No newline at end of file
+tracker_agent_tool = PythonAgentTool("tracker_agent_tool", TOOL_SPEC, checkpoint_tool("tracker_agent_tool")(_tracker_agent_tool))
\ No newline at end of file
@@ -1,7 +1,9 @@
 import logging
 import os
+import json
 import asyncio
-from typing import Any, Annotated, Dict, List
+import threading
+from typing import Any, Annotated, Dict, List, Optional
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
 from strands.types.content import ContentBlock
@@ -11,10 +13,15 @@ from prompts.template import apply_prompt_template
 from utils.common_utils import get_message_from_string
 import pandas as pd
 from utils.strands_sdk_utils import TokenTracker
+from utils.session import get_shared_state, current_session
+from utils.clues import get_clue_store, current_step
+from utils.data_loader import load_table, file_digest
+from utils.validation_engine import validate_batch
 
 from tools.bash_tool import bash_tool
 from tools.write_and_execute_tool import write_and_execute_tool
-from strands_tools import file_read
+from tools.file_read_tool import file_read_tool
+from utils.checkpoint import checkpoint_tool
 
 load_dotenv()
 
@@ -46,7 +53,10 @@ TOOL_SPEC = {
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 FULL_PLAN_FORMAT = "Here is full plan :\n\n<full_plan>\n{}\n</full_plan>\n\n*Please consider this to select the next step.*"
-CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
+BATCH_VALIDATION_FORMAT = "Here is the batch pre-validation of calculation_metadata.json:\n\n<batch_validation>\n{}\n</batch_validation>\n\n"
+CALCULATION_METADATA_PATH = "./artifacts/calculation_metadata.json"
+BATCH_RESULTS_PATH = "./artifacts/batch_validation.json"
+BATCH_LIST_LIMIT = 20  # mismatches/errors listed in the message; the rest are in BATCH_RESULTS_PATH
 
 class Colors:
     GREEN = '\033[92m'
@@ -55,31 +65,94 @@ class Colors:
 class OptimizedValidator:
     """
     Performance-optimized validator for large datasets with many calculations
+
+    One instance lives for the whole session (get_validator), so loaded DataFrames and
+    batch validation results are reused by every validator call. Entries are invalidated
+    when the source file changes (mtime/size, confirmed by content hash). Validation runs in a
+    worker thread (asyncio.to_thread), so the caches are only touched under self._lock.
     """
     
     def __init__(self):
+        self._lock = threading.RLock()
         self.data_cache: Dict[str, pd.DataFrame] = {}
-        self.validation_results = {}
+        self.data_versions: Dict[str, tuple] = {}  # path -> (mtime_ns, size, sha256)
+        self.validation_results = {}  # (id, formula, reported value, source sha256) -> result
+        self.stats = {"data_hits": 0, "data_loads": 0, "invalidations": 0, "result_hits": 0, "results_computed": 0}
+
+    def _version(self, file_path: str) -> tuple:
+        """(mtime_ns, size, sha256) of a file; the hash is only recomputed when mtime or size moved."""
+        st = os.stat(file_path)
+        cached = self.data_versions.get(file_path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached
+        return st.st_mtime_ns, st.st_size, file_digest(file_path)
         
     def load_data_once(self, file_path: str) -> pd.DataFrame:
         """Cache data loading to avoid repeated I/O operations"""
-        if file_path not in self.data_cache:
-            logger.info(f"📁 Loading data from {file_path}")
-            try:
-                if file_path.endswith('.csv'):
-                    self.data_cache[file_path] = pd.read_csv(file_path)
-                elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                    self.data_cache[file_path] = pd.read_excel(file_path)
-                else:
-                    # Try CSV as default
-                    self.data_cache[file_path] = pd.read_csv(file_path)
-                    
-                logger.info(f"✅ Loaded {len(self.data_cache[file_path])} rows from {file_path}")
-            except Exception as e:
-                logger.error(f"❌ Failed to load data from {file_path}: {e}")
-                raise
+        with self._lock:
+            return self._load_data(file_path)
+
+    def _load_data(self, file_path: str) -> pd.DataFrame:
+        version = self._version(file_path)
+        cached = self.data_versions.get(file_path)
+        if file_path in self.data_cache and cached and cached[2] == version[2]:
+            self.data_versions[file_path] = version  # touched but unchanged: keep the DataFrame
+            self.stats["data_hits"] += 1
+            return self.data_cache[file_path]
+        if file_path in self.data_cache:
+            logger.info(f"🔄 Source changed, reloading {file_path}")
+            self.stats["invalidations"] += 1
+        logger.info(f"📁 Loading data from {file_path}")
+        try:
+            # Columnar cache shared with the agent scripts (parsed once per file content)
+            self.data_cache[file_path] = load_table(file_path)
+            self.data_versions[file_path] = version
+            self.stats["data_loads"] += 1
+            logger.info(f"✅ Loaded {len(self.data_cache[file_path])} rows from {file_path}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load data from {file_path}: {e}")
+            raise
         return self.data_cache[file_path]
-    
+
+    def _result_key(self, calc: Dict, resolve) -> Optional[tuple]:
+        try:
+            source_hash = self._version(resolve(calc["source_file"]))[2]
+            return calc.get("id"), calc.get("formula"), json.dumps(calc.get("value"), default=str), source_hash
+        except (KeyError, TypeError, OSError):
+            return None
+
+    def validate_calculations(self, calculations: List[Dict], resolve=os.path.abspath) -> tuple:
+        """
+        Re-compute every calculation whose formula the batch engine can parse (utils/validation_engine.py)
+        Results of unchanged calculations on unchanged sources are reused from earlier calls
+        Returns: (results, unparsed) - only `unparsed` needs the validator agent
+        """
+        with self._lock:
+            return self._validate(calculations, resolve)
+
+    def _validate(self, calculations: List[Dict], resolve) -> tuple:
+        def load(path, columns=None):
+            df = self._load_data(path)
+            return df if columns is None else df[columns]
+
+        results, pending, keys = [], [], []
+        for calc in calculations:
+            key = self._result_key(calc, resolve)
+            if key is not None and key in self.validation_results:
+                results.append(self.validation_results[key])
+                self.stats["result_hits"] += 1
+            else:
+                pending.append(calc)
+                keys.append(key)  # aligned with pending; results point back through their "index"
+
+        computed, unparsed = validate_batch(pending, resolve=resolve, load=load) if pending else ([], [])
+        for result in computed:
+            key = keys[result.pop("index")]
+            if key is not None and result["status"] != "error":
+                self.validation_results[key] = result
+        self.stats["results_computed"] += len(computed)
+        return results + computed, unparsed
+
     def filter_calculations_by_priority(self, calculations: List[Dict]) -> tuple:
         """
         Filter calculations by importance to optimize processing time
@@ -115,7 +188,51 @@ class OptimizedValidator:
         
         return priority_calcs, stats
 
-def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or instruction for validating calculations and generating citations."]):
+
+def get_validator(shared_state: Dict[str, Any]) -> OptimizedValidator:
+    """The session's OptimizedValidator, created on first use and kept across validator calls."""
+    validator = shared_state.get("optimized_validator")
+    if not isinstance(validator, OptimizedValidator):
+        validator = OptimizedValidator()
+        shared_state["optimized_validator"] = validator
+    return validator
+
+
+def _load_calculations(path: str) -> List[Dict]:
+    """Entries of calculation_metadata.json in either of its two formats."""
+    with open(path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    if isinstance(metadata, dict) and "calculations" in metadata:
+        return metadata["calculations"]
+    return [{"id": key, **value} for key, value in metadata.items() if isinstance(value, dict)]
+
+
+def _run_batch_validation(validator: OptimizedValidator) -> str:
+    """Verify every parseable calculation in-process; returns the summary for the validator agent ("" if none)."""
+    session = current_session()
+    try:
+        calculations = _load_calculations(session.resolve_path(CALCULATION_METADATA_PATH))
+    except (OSError, ValueError, AttributeError) as e:
+        logger.info(f"Batch validation skipped: {e}")
+        return ""
+
+    results, unparsed = validator.validate_calculations(calculations, resolve=session.resolve_path)
+    with open(session.resolve_path(BATCH_RESULTS_PATH), "w", encoding="utf-8") as f:
+        json.dump({"results": results, "unparsed": [calc.get("id") for calc in unparsed]}, f, ensure_ascii=False, indent=2)
+
+    by_status = {status: [r for r in results if r["status"] == status] for status in ("verified", "mismatch", "error")}
+    lines = [f"{len(calculations)} calculations: {len(by_status['verified'])} verified, {len(by_status['mismatch'])} mismatch, "
+             f"{len(by_status['error'])} error, {len(unparsed)} not machine-verifiable. Full results: {BATCH_RESULTS_PATH}"]
+    for result in (by_status["mismatch"] + by_status["error"])[:BATCH_LIST_LIMIT]:
+        detail = f"actual {result['actual']}" if result["status"] == "mismatch" else result.get("error", "")
+        lines.append(f"- {result['id']} {result['status']}: reported {result['reported']}, {detail} ({result['formula']})")
+    if unparsed:
+        priority, _ = validator.filter_calculations_by_priority(unparsed)
+        lines.append("Verify manually: " + ", ".join(str(calc.get("id")) for calc in priority))
+    return BATCH_VALIDATION_FORMAT.format("\n".join(lines))
+
+
+async def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or instruction for validating calculations and generating citations."]):
     """
     Validate numerical calculations and generate citation metadata for reports.
 
@@ -135,16 +252,16 @@ def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or i
     print()  # Add newline before log
     logger.info(f"\n{Colors.GREEN}Validator Agent Tool starting{Colors.END}")
 
-    # Try to extract shared state from global storage
-    from graph.nodes import _global_node_states
-    shared_state = _global_node_states.get('shared', None)
+    # Try to extract shared state from the active session
+    shared_state = get_shared_state()
 
     if not shared_state:
         logger.warning("No shared state found")
         return "Error: No shared state available"
 
     request_prompt, full_plan = shared_state.get("request_prompt", ""), shared_state.get("full_plan", "")
-    clues, messages = shared_state.get("clues", ""), shared_state.get("messages", [])
+    clue_store, messages = get_clue_store(shared_state), shared_state.get("messages", [])
+    step = shared_state.get("current_step") or current_step(full_plan, "Validator")
 
     # Create validator agent with specialized tools using consistent pattern
     validator_agent = strands_utils.get_agent(
@@ -154,12 +271,16 @@ def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or i
         enable_reasoning=False,
         prompt_cache_info=(False, None), # reasoning agent uses prompt caching
         tool_cache=False,
-        tools=[write_and_execute_tool, bash_tool, file_read],
+        tools=[write_and_execute_tool, bash_tool, file_read_tool],
         streaming=True  # Enable streaming for consistency
     )
 
+    # Deterministic pre-pass: the agent only has to look at what the engine could not confirm
+    validator = get_validator(shared_state)
+    batch_summary = await asyncio.to_thread(_run_batch_validation, validator)  # pandas work, off the event loop
+
     # Prepare message with context if available
-    message = '\n\n'.join([messages[-1]["content"][-1]["text"], clues])
+    message = '\n\n'.join(part for part in [messages[-1]["content"][-1]["text"], batch_summary, clue_store.render("validator")] if part)
 
     # Create message with cache point for messages caching
     # This caches the large context (clues) for cost savings
@@ -178,11 +299,11 @@ def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or i
 
         return validator_agent, {"text": full_text}
 
-    validator_agent, response = asyncio.run(process_validator_stream())
+    validator_agent, response = await process_validator_stream()
     result_text = response['text']
 
     # Update clues
-    clues = '\n\n'.join([clues, CLUES_FORMAT.format("validator", response["text"])])
+    clue_store.add("validator", response["text"], step=step)
 
     # Update history
     history = shared_state.get("history", [])
@@ -190,21 +311,22 @@ def _handle_validator_agent_tool(_task: Annotated[str, "The validation task or i
 
     # Update shared state
     shared_state['messages'] = [get_message_from_string(role="user", string=RESPONSE_FORMAT.format("validator", response["text"]), imgs=[])]
-    shared_state['clues'] = clues
     shared_state['history'] = history
 
     logger.info(f"\n{Colors.GREEN}Validator Agent Tool completed{Colors.END}")
     # Print token usage using TokenTracker
     TokenTracker.print_current(shared_state)
-    return result_text
+    cache = validator.stats
+    return (f"{result_text}\n\n[Validation cache: data {cache['data_hits']} hits / {cache['data_loads']} loads / "
+            f"{cache['invalidations']} invalidated, results {cache['result_hits']} reused / {cache['results_computed']} computed]")
 
 # Function name must match tool name
-def _validator_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
+async def _validator_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
     tool_use_id = tool["toolUseId"]
     task = tool["input"]["task"]
 
     # Use the existing handle_validator_agent_tool function
-    result = _handle_validator_agent_tool(task)
+    result = await _handle_validator_agent_tool(task)
 
     # Check if execution was successful based on the result string
     if "Error" in result:
@@ -221,4 +343,4 @@ def _validator_agent_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
         }
 
 # Wrap with PythonAgentTool for proper Strands SDK registration
-validator_agent_tool = PythonAgentTool("validator_agent_tool", TOOL_SPEC, _validator_agent_tool)
\ No newline at end of file
+validator_agent_tool = PythonAgentTool("validator_agent_tool", TOOL_SPEC, checkpoint_tool("validator_agent_tool")(_validator_agent_tool))
\ No newline at end of file
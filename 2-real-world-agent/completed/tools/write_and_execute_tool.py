@@ -5,6 +5,10 @@ from typing import Any, Annotated
 from strands.types.tools import ToolResult, ToolUse
 from strands.tools.tools import PythonAgentTool
 from tools.decorators import log_io
+from utils.session import current_session
+from utils.kernel_pool import run_python
+from utils.output_stream import ToolOutputStreamer
+from utils.result_shaper import shape_tool_result
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -56,20 +60,22 @@ def _handle_write_and_execute_tool(
     logger.info(f"\n{Colors.GREEN}[Write & Execute] Writing to: {file_path}{Colors.END}")
 
     results = []
+    session = current_session()
+    local_path = session.resolve_path(file_path)  # file_path is relative to the session workdir
 
     # Step 1: Write the file
     try:
         # Create directory if it doesn't exist
-        dir_path = os.path.dirname(file_path)
+        dir_path = os.path.dirname(local_path)
         if dir_path:
             os.makedirs(dir_path, exist_ok=True)
 
         # Write content to file
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with open(local_path, 'w', encoding='utf-8') as f:
             f.write(content)
 
         # Get file info
-        file_size = os.path.getsize(file_path)
+        file_size = os.path.getsize(local_path)
         num_lines = len(content.split('\n'))
 
         write_result = f"✓ Written {num_lines} lines ({file_size} bytes) to {file_path}"
@@ -85,15 +91,14 @@ def _handle_write_and_execute_tool(
     cmd = f"python {file_path}"
     logger.info(f"\n{Colors.GREEN}[Write & Execute] Executing: {cmd}{Colors.END}")
 
+    # Output lines are streamed to the event bus while the script runs; the result keeps a bounded tail
+    streamer = ToolOutputStreamer("write_and_execute_tool")
     try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            check=True,
-            text=True,
-            capture_output=True,
-            timeout=timeout
-        )
+        # Runs in the session's warm kernel (pandas/matplotlib already imported)
+        result = run_python(content, path=file_path, cwd=session.workdir, timeout=timeout,
+                            session_id=session.session_id, on_output=streamer.line)
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
 
         exec_result = f"✓ Execution successful"
         logger.info(f"{Colors.GREEN}{exec_result}{Colors.END}")
@@ -107,10 +112,12 @@ def _handle_write_and_execute_tool(
         if result.stderr.strip():
             results.append(f"Stderr:\n{result.stderr}")
 
-    except subprocess.TimeoutExpired:
+    except subprocess.TimeoutExpired as e:
         error_msg = f"✗ Execution timed out after {timeout} seconds"
         logger.error(f"{Colors.RED}{error_msg}{Colors.END}")
         results.append(error_msg)
+        if e.stdout:
+            results.append(f"Stdout (last lines): {e.stdout}")
         return "\n".join(results)
 
     except subprocess.CalledProcessError as e:
@@ -129,6 +136,9 @@ def _handle_write_and_execute_tool(
         results.append(error_msg)
         return "\n".join(results)
 
+    finally:
+        streamer.close()
+
     return "\n".join(results)
 
 
@@ -154,5 +164,5 @@ def _write_and_execute_tool(tool: ToolUse, **_kwargs: Any) -> ToolResult:
             "content": [{"text": result}]
         }
 
-# Wrap with PythonAgentTool for proper Strands SDK registration
-write_and_execute_tool = PythonAgentTool("write_and_execute_tool", TOOL_SPEC, _write_and_execute_tool)
+# Wrap with PythonAgentTool for proper Strands SDK registration (result text is kept within the tool's token budget)
+write_and_execute_tool = PythonAgentTool("write_and_execute_tool", TOOL_SPEC, shape_tool_result("write_and_execute_tool")(_write_and_execute_tool))
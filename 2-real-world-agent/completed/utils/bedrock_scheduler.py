@@ -0,0 +1,319 @@
+"""
+Process-wide admission control for Bedrock model calls.
+
+Throttling used to be handled only after the fact (_retry_agent_streaming backoff of
+10-160 s plus boto's adaptive retries). The scheduler keeps a sliding one-minute window of
+requests and tokens per model_id and admits a model call only when it fits the configured
+RPM/TPM budgets and concurrency cap. Waiting calls are served by priority - interactive
+agents (coordinator, supervisor) before batch sub-agents - then in arrival order.
+
+Every model returned by strands_utils.get_model is wrapped in a ScheduledModel, so each
+Bedrock call (including the extra calls of a tool-use loop) goes through admission.
+
+Environment (0 = unlimited):
+    BEDROCK_RPM_LIMIT                  Requests per minute per model
+    BEDROCK_TPM_LIMIT                  Tokens per minute per model
+    BEDROCK_MAX_CONCURRENT_REQUESTS    Concurrent streams per model
+    BEDROCK_RATE_LIMITS                JSON per-model overrides: {"<model_id>": {"rpm": .., "tpm": .., "concurrency": ..}}
+    BEDROCK_INTERACTIVE_AGENTS         Agents scheduled first (default "coordinator,supervisor")
+    BEDROCK_ESTIMATED_OUTPUT_TOKENS    Output reserved per call until actual usage is known (default 2000)
+    BEDROCK_OUTPUT_TOKEN_WEIGHT        Quota cost of one output token (some models burn down output faster)
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+from strands.models.model import Model
+from strands.types.exceptions import ModelThrottledException
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+WINDOW_SECONDS = 60.0
+PRIORITY_INTERACTIVE, PRIORITY_BATCH = 0, 1
+
+DEFAULT_RPM = int(os.getenv("BEDROCK_RPM_LIMIT", "0"))
+DEFAULT_TPM = int(os.getenv("BEDROCK_TPM_LIMIT", "0"))
+DEFAULT_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENT_REQUESTS", "0"))
+MODEL_LIMITS = json.loads(os.getenv("BEDROCK_RATE_LIMITS", "{}"))
+INTERACTIVE_AGENTS = {name.strip() for name in os.getenv("BEDROCK_INTERACTIVE_AGENTS", "coordinator,supervisor").split(",") if name.strip()}
+ESTIMATED_OUTPUT_TOKENS = int(os.getenv("BEDROCK_ESTIMATED_OUTPUT_TOKENS", "2000"))
+OUTPUT_TOKEN_WEIGHT = float(os.getenv("BEDROCK_OUTPUT_TOKEN_WEIGHT", "1"))
+THROTTLE_COOLDOWN_SECONDS = 2.0
+CHARS_PER_TOKEN = 4
+
+
+def priority_for(agent_name: str) -> int:
+    return PRIORITY_INTERACTIVE if agent_name in INTERACTIVE_AGENTS else PRIORITY_BATCH
+
+
+class _Reservation:
+    """Tokens held in a model's window for one call (estimated until the call finishes)."""
+
+    __slots__ = ("started", "tokens")
+
+    def __init__(self, started: float, tokens: int):
+        self.started = started
+        self.tokens = tokens
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "enqueued", "future", "loop", "reservation")
+
+    def __init__(self, priority, seq, tokens, future, loop):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.future = future
+        self.loop = loop
+        self.reservation = None  # set under the scheduler lock once admitted
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ModelBudget:
+    """Sliding-window RPM/TPM accounting and the wait queue of one model_id."""
+
+    def __init__(self, model_id: str):
+        limits = MODEL_LIMITS.get(model_id, {})
+        self.model_id = model_id
+        self.rpm = int(limits.get("rpm", DEFAULT_RPM))
+        self.tpm = int(limits.get("tpm", DEFAULT_TPM))
+        self.concurrency = int(limits.get("concurrency", DEFAULT_CONCURRENCY))
+        self.window: deque = deque()
+        self.in_flight = 0
+        self.waiters: list = []
+        self.cooldown_until = 0.0
+        self.timer_at: Optional[float] = None
+        self.stats = {"admitted": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "throttled": 0, "tokens": 0}
+
+    def _prune(self, now: float) -> None:
+        while self.window and now - self.window[0].started >= WINDOW_SECONDS:
+            self.window.popleft()
+
+    def wait_time(self, tokens: int, now: float) -> Optional[float]:
+        """Seconds until a call of `tokens` fits; 0 = now, None = only after a running call ends."""
+        self._prune(now)
+        if self.concurrency and self.in_flight >= self.concurrency:
+            return None
+        waits = [self.cooldown_until - now]
+        if self.rpm and len(self.window) >= self.rpm:
+            waits.append(self.window[len(self.window) - self.rpm].started + WINDOW_SECONDS - now)
+        if self.tpm and self.window:
+            used = sum(entry.tokens for entry in self.window)
+            # A single call larger than the whole budget is admitted into an empty window
+            excess = used + min(tokens, self.tpm) - self.tpm
+            for entry in self.window:
+                if excess <= 0:
+                    break
+                excess -= entry.tokens
+                waits.append(entry.started + WINDOW_SECONDS - now)
+        return max(max(waits), 0.0)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {"interactive": 0, "batch": 0}
+        for waiter in self.waiters:
+            depth["interactive" if waiter.priority == PRIORITY_INTERACTIVE else "batch"] += 1
+        return depth
+
+
+class BedrockScheduler:
+    """Priority admission queue per model_id, safe to use from any thread or event loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, _ModelBudget] = {}
+        self._seq = itertools.count()
+
+    def _budget(self, model_id: str) -> _ModelBudget:
+        budget = self._budgets.get(model_id)
+        if budget is None:
+            budget = self._budgets[model_id] = _ModelBudget(model_id)
+        return budget
+
+    def _admit(self, budget: _ModelBudget, tokens: int, now: float) -> _Reservation:
+        reservation = _Reservation(now, tokens)
+        budget.window.append(reservation)
+        budget.in_flight += 1
+        budget.stats["admitted"] += 1
+        return reservation
+
+    def _dispatch(self, model_id: str) -> None:
+        """Admit queued calls in priority order while they fit (called with the lock held)."""
+        budget = self._budgets[model_id]
+        while budget.waiters:
+            waiter = budget.waiters[0]
+            if waiter.future.done():  # cancelled while waiting
+                heapq.heappop(budget.waiters)
+                continue
+            now = time.monotonic()
+            wait = budget.wait_time(waiter.tokens, now)
+            if wait is None:
+                return  # a release will dispatch again
+            if wait > 0:
+                self._schedule_retry(budget, waiter.loop, now + wait)
+                return
+            heapq.heappop(budget.waiters)
+            waited = now - waiter.enqueued
+            budget.stats["wait_seconds"] += waited
+            budget.stats["max_wait_seconds"] = max(budget.stats["max_wait_seconds"], waited)
+            reservation = waiter.reservation = self._admit(budget, waiter.tokens, now)
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future, reservation)
+
+    def _schedule_retry(self, budget: _ModelBudget, loop, at: float) -> None:
+        if budget.timer_at is not None and budget.timer_at <= at:
+            return
+        budget.timer_at = at
+
+        def fire():
+            with self._lock:
+                budget.timer_at = None
+                self._dispatch(budget.model_id)
+
+        loop.call_soon_threadsafe(loop.call_later, max(at - time.monotonic(), 0.0), fire)
+
+    async def acquire(self, model_id: str, tokens: int, priority: int = PRIORITY_BATCH) -> _Reservation:
+        """Wait until a call of about `tokens` may start for `model_id`."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            budget = self._budget(model_id)
+            now = time.monotonic()
+            # Only bypass the queue when nobody is waiting (keeps priority/FIFO order)
+            if not budget.waiters and budget.wait_time(tokens, now) == 0:
+                return self._admit(budget, tokens, now)
+            waiter = _Waiter(priority, next(self._seq), tokens, loop.create_future(), loop)
+            heapq.heappush(budget.waiters, waiter)
+            budget.stats["waited"] += 1
+            self._dispatch(model_id)
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                # Admitted before the cancel landed (the future may be cancelled before _resolve ran)
+                if waiter.reservation is not None:
+                    self._release_locked(budget, waiter.reservation, None)
+            raise
+
+    def _release_locked(self, budget: _ModelBudget, reservation: _Reservation, actual_tokens: Optional[int]) -> None:
+        budget.in_flight -= 1
+        if actual_tokens is not None:
+            reservation.tokens = actual_tokens
+            budget.stats["tokens"] += actual_tokens
+        self._dispatch(budget.model_id)
+
+    def release(self, model_id: str, reservation: _Reservation, actual_tokens: Optional[int] = None) -> None:
+        """End a call; `actual_tokens` replaces the estimate held in the window."""
+        with self._lock:
+            self._release_locked(self._budget(model_id), reservation, actual_tokens)
+
+    def report_throttle(self, model_id: str) -> None:
+        """Bedrock throttled a call anyway: hold new admissions for this model briefly."""
+        with self._lock:
+            budget = self._budget(model_id)
+            budget.stats["throttled"] += 1
+            budget.cooldown_until = max(budget.cooldown_until, time.monotonic() + THROTTLE_COOLDOWN_SECONDS)
+        logger.info(f"Bedrock throttled {model_id}; pausing admissions for {THROTTLE_COOLDOWN_SECONDS:.0f}s")
+
+    @asynccontextmanager
+    async def admit(self, model_id: str, tokens: int, priority: int = PRIORITY_BATCH):
+        """`async with scheduler.admit(...) as usage:` - set usage["tokens"] to report actual usage."""
+        reservation = await self.acquire(model_id, tokens, priority)
+        usage: Dict[str, Any] = {"tokens": None}
+        try:
+            yield usage
+        finally:
+            self.release(model_id, reservation, usage["tokens"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls and window usage per model."""
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for model_id, budget in self._budgets.items():
+                budget._prune(now)
+                result[model_id] = {
+                    **budget.stats,
+                    "queue_depth": budget.queue_depth(),
+                    "in_flight": budget.in_flight,
+                    "window_requests": len(budget.window),
+                    "window_tokens": sum(entry.tokens for entry in budget.window),
+                    "limits": {"rpm": budget.rpm, "tpm": budget.tpm, "concurrency": budget.concurrency},
+                }
+            return result
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+def _is_throttling(error: Exception) -> bool:
+    if isinstance(error, ModelThrottledException):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code", "") == "ThrottlingException"
+    message = str(error).lower()
+    return "throttling" in message or "too many requests" in message
+
+
+def estimate_tokens(messages, system_prompt: Optional[str]) -> int:
+    prompt_chars = len(json.dumps(messages, ensure_ascii=False, default=str)) + len(system_prompt or "")
+    return prompt_chars // CHARS_PER_TOKEN + int(ESTIMATED_OUTPUT_TOKENS * OUTPUT_TOKEN_WEIGHT)
+
+
+class ScheduledModel(Model):
+    """Runs every stream() of the wrapped model through the scheduler."""
+
+    def __init__(self, model: Model, agent_name: str, scheduler: BedrockScheduler):
+        self.model = model
+        self.agent_name = agent_name
+        self.priority = priority_for(agent_name)
+        self.scheduler = scheduler
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        model_id = self.config.get("model_id", "unknown")
+        async with self.scheduler.admit(model_id, estimate_tokens(messages, system_prompt), self.priority) as usage:
+            try:
+                async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                    if "metadata" in event:
+                        tokens = event["metadata"].get("usage", {})
+                        usage["tokens"] = tokens.get("inputTokens", 0) + tokens.get("cacheWriteInputTokens", 0) + \
+                            int(tokens.get("outputTokens", 0) * OUTPUT_TOKEN_WEIGHT)
+                    yield event
+            except Exception as e:
+                if _is_throttling(e):
+                    self.scheduler.report_throttle(model_id)
+                raise
+
+
+bedrock_scheduler = BedrockScheduler()
+
+
+def scheduled(model: Model, agent_name: str) -> ScheduledModel:
+    """Wrap a model so its calls are admitted by the process-wide scheduler."""
+    return ScheduledModel(model, agent_name, bedrock_scheduler)
@@ -0,0 +1,303 @@
+"""
+Durable checkpoints of a graph run, so a failure late in the supervisor loop can be resumed.
+
+A checkpoint (`<CHECKPOINT_DIR>/<session_id>.json`) is written when a graph node starts or
+finishes and after every agent-tool call. It holds:
+
+    shared      the session's shared state - messages, full_plan, clues, history,
+                token_usage, ... (live objects such as the OptimizedValidator are left out)
+    node_memo   memoized node results (graph/dag.py)
+    artifacts   manifest of ./artifacts (path, size, sha256)
+
+Successful agent-tool calls are recorded in shared["completed_steps"]. `restore()` rebuilds
+the session; the graph then re-runs from the node that was running, and the completed calls
+are replayed in order per tool: a call returns the saved result of the first completed step
+of that tool with the same input, else of the next one (the re-run supervisor may word the
+call differently), instead of running the agent again. The first call with nothing left to
+replay ends the replay, so later calls always run.
+
+The state is deep-copied on the event loop; hashing ./artifacts, serializing the copy and
+writing the file happen in a worker thread (`save_async`), so a checkpoint never stalls the
+event loop of other sessions and never sees a half-applied change. Checkpoints of completed runs
+are removed; failed or interrupted runs keep theirs for --resume.
+
+    python main.py --resume <session_id>
+
+Environment:
+    CHECKPOINT_ENABLED  "false" disables checkpoints (sessions created with checkpointed=False never write one)
+    CHECKPOINT_DIR      Where checkpoints are written (default ./checkpoints)
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import base64
+import hashlib
+import logging
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.clues import ClueStore
+from utils.data_loader import file_digest
+from utils.session import GraphSession, current_session
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "./checkpoints")
+CHECKPOINT_VERSION = 1
+
+# Live objects and per-run bookkeeping; rebuilt on demand after a resume
+EXCLUDED_KEYS = ("optimized_validator", "resumed_steps")
+
+stats = {"saves": 0, "bytes": 0, "skipped_keys": 0, "resumed_steps": 0, "removed": 0}
+_lock = threading.Lock()
+
+
+class Colors:
+    YELLOW = '\033[93m'
+    END = '\033[0m'
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, ClueStore):
+        return {"__clues__": value.to_dict()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"{type(value).__name__} is not checkpointable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__clues__" in obj:
+        return ClueStore.from_dict(obj["__clues__"])
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_encode)
+
+
+def _object(fields: Dict[str, str]) -> str:
+    """JSON object from already encoded values."""
+    return "{" + ", ".join(f"{_dump(key)}: {value}" for key, value in fields.items()) + "}"
+
+
+def _state_copy(shared: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep copy of the checkpointed entries, taken on the thread that owns the state."""
+    state = {}
+    for key, value in shared.items():
+        if key in EXCLUDED_KEYS:
+            continue
+        try:
+            state[key] = copy.deepcopy(value)
+        except Exception as e:
+            stats["skipped_keys"] += 1
+            logger.debug(f"Checkpoint skips shared['{key}']: {e}")
+    return state
+
+
+def _shared_json(shared: Dict[str, Any]) -> str:
+    """Shared state as one JSON object; keys whose values cannot be serialized are dropped."""
+    fields = {}
+    for key, value in shared.items():
+        try:
+            fields[key] = _dump(value)
+        except (TypeError, ValueError) as e:
+            stats["skipped_keys"] += 1
+            logger.debug(f"Checkpoint skips shared['{key}']: {e}")
+    return _object(fields)
+
+
+def artifacts_manifest(artifacts_dir: str) -> List[Dict[str, Any]]:
+    manifest = []
+    for root, _, names in sorted(os.walk(artifacts_dir)):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                manifest.append({"path": os.path.relpath(path, artifacts_dir), "size": os.path.getsize(path),
+                                 "sha256": file_digest(path)})
+            except OSError:  # removed while walking
+                continue
+    return manifest
+
+
+def checkpoint_path(session_id: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or CHECKPOINT_DIR, f"{session_id}.json")
+
+
+def _snapshot(session: GraphSession, status: str) -> Dict[str, Any]:
+    """Everything a checkpoint holds except the artifacts manifest, detached from the live session."""
+    return {"header": {"version": CHECKPOINT_VERSION, "session_id": session.session_id, "status": status,
+                       "updated": time.time(), "workdir": os.path.abspath(session.workdir),
+                       "interactive": session.interactive},
+            "artifacts_dir": session.artifacts_dir,
+            "node_memo": _state_copy(session.node_memo),
+            "shared": _state_copy(session.shared)}
+
+
+def _write(snapshot: Dict[str, Any], directory: Optional[str] = None) -> Optional[str]:
+    """Hash ./artifacts, serialize the snapshot and write it atomically (safe in a worker thread)."""
+    header = snapshot["header"]
+    with _lock:
+        fields = {key: _dump(value) for key, value in header.items()}
+        fields["node_memo"] = _shared_json(snapshot["node_memo"])
+        fields["artifacts"] = _dump(artifacts_manifest(snapshot["artifacts_dir"]))
+        fields["shared"] = _shared_json(snapshot["shared"])
+        text = _object(fields)
+        target = checkpoint_path(header["session_id"], directory)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, target)
+        except OSError as e:
+            logger.warning(f"Checkpoint not written: {e}")
+            return None
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    stats["saves"] += 1
+    stats["bytes"] += len(text)
+    return target
+
+
+def save(session: GraphSession, status: str = "running", directory: Optional[str] = None) -> Optional[str]:
+    """Write the session's checkpoint (atomically); returns its path."""
+    if not CHECKPOINT_ENABLED or not session.checkpointed:
+        return None
+    return _write(_snapshot(session, status), directory)
+
+
+async def save_async(session: GraphSession, status: str = "running") -> Optional[str]:
+    """save() with the state copied here, on the event loop, and the rest done in a worker thread."""
+    if not CHECKPOINT_ENABLED or not session.checkpointed:
+        return None
+    return await asyncio.to_thread(_write, _snapshot(session, status))
+
+
+def remove(session_id: str, directory: Optional[str] = None) -> None:
+    try:
+        os.remove(checkpoint_path(session_id, directory))
+        stats["removed"] += 1
+    except FileNotFoundError:
+        pass
+
+
+def load(session_id: str, directory: Optional[str] = None) -> Dict[str, Any]:
+    with open(checkpoint_path(session_id, directory), encoding="utf-8") as f:
+        data = json.load(f, object_hook=_decode)
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {session_id} has version {data.get('version')}, expected {CHECKPOINT_VERSION}")
+    return data
+
+
+def verify_artifacts(session: GraphSession, manifest: List[Dict[str, Any]]) -> List[str]:
+    """Artifacts of the manifest that are missing or changed since the checkpoint."""
+    changed = []
+    for entry in manifest:
+        path = os.path.join(session.artifacts_dir, entry["path"])
+        if not os.path.isfile(path) or os.path.getsize(path) != entry["size"] or file_digest(path) != entry["sha256"]:
+            changed.append(entry["path"])
+    return changed
+
+
+def restore(session_id: str, directory: Optional[str] = None) -> Tuple[GraphSession, Dict[str, Any]]:
+    """
+    Rebuild a checkpointed session.
+
+    Returns:
+        (session, checkpoint) - the session has the saved shared state and node memo, and
+        shared["resumed_steps"] maps each tool to its completed calls ({"key", "text"}) in order.
+    """
+    data = load(session_id, directory)
+    session = GraphSession(session_id=session_id, workdir=data["workdir"], interactive=data.get("interactive", True))
+    session.shared = data["shared"]
+    session.node_memo = data.get("node_memo", {})
+    resumed: Dict[str, List[Dict[str, str]]] = {}
+    for step in session.shared.get("completed_steps", []):
+        resumed.setdefault(step["tool"], []).append({"key": step["key"], "text": step["text"]})
+    session.shared["resumed_steps"] = resumed
+
+    changed = verify_artifacts(session, data.get("artifacts", []))
+    if changed:
+        logger.warning(f"{Colors.YELLOW}Artifacts changed since the checkpoint: {', '.join(changed)}{Colors.END}")
+    position = session.shared.get("graph_position", {})
+    logger.info(f"Checkpoint {session_id} restored: completed nodes {position.get('completed', [])}, "
+                f"{sum(map(len, resumed.values()))} completed agent-tool steps")
+    return session, data
+
+
+def resume_nodes(checkpoint: Dict[str, Any]) -> List[str]:
+    """Nodes to re-run: those that were running, else the last one that finished ([] if the run completed)."""
+    if checkpoint.get("status") == "completed":
+        return []
+    position = checkpoint["shared"].get("graph_position", {})
+    return list(dict.fromkeys(position.get("running", []))) or position.get("completed", [])[-1:]
+
+
+async def on_node(session: GraphSession, name: str, state: str) -> None:
+    """DagGraph hook: track the graph position and checkpoint when a node starts or finishes."""
+    position = session.shared.setdefault("graph_position", {"running": [], "completed": []})
+    if state == "running":
+        if name not in position["running"]:  # already listed when resuming from this node
+            position["running"].append(name)
+    else:
+        if name in position["running"]:
+            position["running"].remove(name)
+        position["completed"].append(name)
+    await save_async(session)
+
+
+async def finish(session: GraphSession) -> str:
+    """End of a run: "completed" removes the checkpoint, "failed" (a node never finished) saves the final one."""
+    status = "failed" if session.shared.get("graph_position", {}).get("running") else "completed"
+    if status == "completed":
+        remove(session.session_id)
+    else:
+        await save_async(session, status=status)
+    return status
+
+
+def step_key(tool_name: str, tool_input: Any) -> str:
+    payload = json.dumps({"tool": tool_name, "input": tool_input}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def checkpoint_tool(tool_name: str) -> Callable:
+    """Decorate an async agent-tool function: checkpoint after every call, replay completed calls on resume."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(tool, **kwargs: Any) -> Dict[str, Any]:
+            session = current_session()
+            key = step_key(tool_name, tool.get("input"))
+            queue = (session.shared.get("resumed_steps") or {}).get(tool_name)
+            if queue:
+                # Same input first; otherwise the next completed call of this tool, in the original order
+                index = next((i for i, step in enumerate(queue) if step["key"] == key), 0)
+                step = queue.pop(index)
+                stats["resumed_steps"] += 1
+                reworded = "" if step["key"] == key else " (input differs from the original call)"
+                logger.info(f"{Colors.YELLOW}{tool_name}: completed before the resume, saved result reused{reworded}{Colors.END}")
+                return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": step["text"]}]}
+
+            # A call with nothing to replay is new work: the completed prefix of the run is over
+            session.shared.pop("resumed_steps", None)
+            result = await func(tool, **kwargs)
+            if isinstance(result, dict) and result.get("status") == "success":
+                text = "\n".join(item["text"] for item in result.get("content", []) if "text" in item)
+                session.shared.setdefault("completed_steps", []).append(
+                    {"key": key, "tool": tool_name, "input": tool.get("input"), "text": text})
+            await save_async(session)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,211 @@
+"""
+Structured, append-only clue store shared by the supervisor and the agent tools.
+
+Agent tools used to append every response to one `clues` string and send the whole string
+to the next agent, so prompts grew with every step. Clues are now records (agent, plan
+step, summary, artifact references, full text); each agent gets a projection that keeps
+the records relevant to it, in full while they fit its budget and as summaries after that.
+"""
+
+import os
+import re
+import logging
+from typing import Dict, List, Any, Optional
+
+from utils.fanout import parse_plan_steps
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CLUES_FORMAT = "Here is clues from {}:\n\n<clues>\n{}\n</clues>\n\n"
+TRACKING_FORMAT = "Here is updated tracking status:\n\n<tracking_clues>\n{}\n</tracking_clues>\n\n"
+SUMMARY_FORMAT = "Here is a summary of earlier clues from {}:\n\n<clues_summary>\n{}\n</clues_summary>\n\n"
+
+# Which agents' records each consumer needs; tracker records are plan snapshots, so
+# only the latest one is ever relevant
+CLUE_RELEVANCE = {
+    "coder": ("coder",),
+    "validator": ("coder", "validator"),
+    "reporter": ("coder", "validator", "reporter"),
+    "tracker": ("coder", "validator", "reporter", "tracker"),
+    "supervisor": ("coder", "validator", "reporter", "tracker"),
+}
+
+# Character budget of the rendered clues per agent (CLUES_BUDGET_CHARS for the rest)
+DEFAULT_BUDGET_CHARS = int(os.getenv("CLUES_BUDGET_CHARS", "24000"))
+AGENT_BUDGET_CHARS = {
+    "supervisor": int(os.getenv("CLUES_BUDGET_CHARS_SUPERVISOR", "8000")),
+    "tracker": int(os.getenv("CLUES_BUDGET_CHARS_TRACKER", "6000")),
+}
+SUMMARY_CHARS = 600
+
+ARTIFACT_PATTERN = re.compile(r"\./artifacts/[\w\-./가-힣]+\.\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~3 characters per token for mixed Korean/English text)."""
+    return (len(text) + 2) // 3
+
+
+def summarize(text: str, limit: int = SUMMARY_CHARS) -> str:
+    """Leading non-empty lines of a response, cut at a line boundary."""
+    lines, size = [], 0
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        if size + len(line) > limit:
+            if not lines:
+                lines.append(line[:limit] + "...")
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def current_step(full_plan: str, agent: str) -> Optional[int]:
+    """First incomplete plan step assigned to `agent` (the step it is most likely working on)."""
+    for step in parse_plan_steps(full_plan):
+        if step["agent"].lower() == agent.lower() and not step["done"]:
+            return step["step"]
+    return None
+
+
+class ClueRecord:
+    """One agent response kept as context for later agents."""
+
+    __slots__ = ("seq", "agent", "step", "summary", "text", "artifacts")
+
+    def __init__(self, seq: int, agent: str, text: str, step: Optional[int] = None,
+                 summary: Optional[str] = None, artifacts: Optional[List[str]] = None):
+        self.seq = seq
+        self.agent = agent
+        self.step = step
+        self.text = text
+        self.summary = summary if summary is not None else summarize(text)
+        self.artifacts = artifacts if artifacts is not None else sorted(set(ARTIFACT_PATTERN.findall(text)))
+
+    def label(self) -> str:
+        return self.agent if self.step is None else f"{self.agent} (step {self.step})"
+
+    def render_full(self) -> str:
+        if self.agent == "tracker":
+            return TRACKING_FORMAT.format(self.text)
+        return CLUES_FORMAT.format(self.label(), self.text)
+
+    def render_summary(self) -> str:
+        body = self.summary
+        if self.artifacts:
+            body += "\nArtifacts: " + ", ".join(self.artifacts)
+        return SUMMARY_FORMAT.format(self.label(), body)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClueRecord":
+        return cls(**data)
+
+
+class ClueStore:
+    """Append-only list of ClueRecords with per-agent, size-budgeted projections."""
+
+    def __init__(self, records: Optional[List[ClueRecord]] = None):
+        self.records: List[ClueRecord] = []
+        self.stats = {"renders": 0, "full_bytes": 0, "rendered_bytes": 0, "saved_bytes": 0, "saved_tokens": 0}
+        self._full_chars = self._full_bytes = 0  # size of full_text(), kept up to date by _append
+        for record in records or []:
+            self._append(record)
+
+    def _append(self, record: ClueRecord) -> None:
+        block = record.render_full()
+        separator = 2 if self.records else 0  # "\n\n" between records
+        self._full_chars += len(block) + separator
+        self._full_bytes += len(block.encode("utf-8")) + separator
+        self.records.append(record)
+
+    def add(self, agent: str, text: str, step: Optional[int] = None) -> ClueRecord:
+        record = ClueRecord(len(self.records), agent, text, step=step)
+        self._append(record)
+        return record
+
+    def extend(self, records: List[ClueRecord]) -> None:
+        """Append records produced elsewhere (e.g. a parallel step), renumbering them."""
+        for record in records:
+            self._append(ClueRecord(len(self.records), record.agent, record.text, step=record.step,
+                                    summary=record.summary, artifacts=record.artifacts))
+
+    def since(self, seq: int) -> List[ClueRecord]:
+        return self.records[seq:]
+
+    def fork(self) -> "ClueStore":
+        """Copy for a child session; records are immutable so they are shared."""
+        return ClueStore(self.records)
+
+    def full_text(self) -> str:
+        """What the old string concatenation would have sent."""
+        return "\n\n".join(record.render_full() for record in self.records)
+
+    def render(self, agent: str, budget: Optional[int] = None) -> str:
+        """
+        Clues for `agent`: relevant records newest first, in full while they fit the budget,
+        then as summaries; returned in chronological order.
+        """
+        budget = budget if budget is not None else AGENT_BUDGET_CHARS.get(agent, DEFAULT_BUDGET_CHARS)
+        relevant_agents = CLUE_RELEVANCE.get(agent, tuple(CLUE_RELEVANCE["supervisor"]))
+        latest_tracker = max((r.seq for r in self.records if r.agent == "tracker"), default=None)
+        relevant = [r for r in self.records
+                    if r.agent in relevant_agents and (r.agent != "tracker" or r.seq == latest_tracker)]
+
+        selected, used, omitted = [], 0, 0
+        for record in reversed(relevant):
+            for block in (record.render_full(), record.render_summary()):
+                if used + len(block) <= budget:
+                    selected.append((record.seq, block))
+                    used += len(block)
+                    break
+            else:
+                omitted += 1
+        selected.sort()
+        rendered = "".join(block for _, block in selected)
+        if omitted:
+            rendered = f"({omitted} older clue(s) omitted to fit the context budget)\n\n" + rendered
+
+        self._record_savings(agent, rendered)
+        return rendered
+
+    def _record_savings(self, agent: str, rendered: str) -> None:
+        full_bytes = self._full_bytes
+        rendered_bytes = len(rendered.encode("utf-8"))
+        saved_bytes = max(full_bytes - rendered_bytes, 0)
+        saved_tokens = max((self._full_chars + 2) // 3 - estimate_tokens(rendered), 0)  # estimate_tokens(full_text())
+        self.stats["renders"] += 1
+        self.stats["full_bytes"] += full_bytes
+        self.stats["rendered_bytes"] += rendered_bytes
+        self.stats["saved_bytes"] += saved_bytes
+        self.stats["saved_tokens"] += saved_tokens
+        if saved_bytes:
+            logger.info(f"Clues for {agent}: {rendered_bytes:,} of {full_bytes:,} bytes (~{saved_tokens:,} tokens saved)")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"records": [record.to_dict() for record in self.records], "stats": dict(self.stats)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClueStore":
+        store = cls([ClueRecord.from_dict(record) for record in data.get("records", [])])
+        store.stats.update(data.get("stats", {}))
+        return store
+
+    def __len__(self):
+        return len(self.records)
+
+    def __str__(self):
+        return self.full_text()
+
+
+def get_clue_store(shared_state: Dict[str, Any]) -> ClueStore:
+    """The session's ClueStore, created on first use."""
+    store = shared_state.get("clues")
+    if not isinstance(store, ClueStore):
+        store = ClueStore()
+        shared_state["clues"] = store
+    return store
@@ -0,0 +1,312 @@
+"""
+Precomputed aggregate cube over the sales datasets.
+
+The sample analyses group the same file by the same dimensions over and over (매체별, 카테고리별,
+매체 x 연령 ...). A cube stores, once per dataset version (sha256 of the file), the sums of
+every additive measure plus the row count for every combination of up to CUBE_MAX_DIMS
+dimensions, and for all dimensions together. Queries become a filter on an already
+aggregated cuboid instead of a scan of the raw rows; other combinations are rolled up from
+the all-dimensions cuboid on first use.
+
+A cuboid is only precomputed when it actually aggregates: its estimated cell count (product
+of the member counts) must stay under CUBE_MAX_CELL_RATIO of the source rows, and the whole
+cube under the source row count. Combinations left out (날짜 x 상품명 ...) are grouped from
+the source when queried, and the validation engine leaves them to its row pass.
+
+Dimensions and measures are taken from the file's own columns (DIMENSIONS / MEASURES
+below, both datasets' schemas); derived ratios are computed from the summed measures, so
+a rolled-up CTR is SUM(클릭수) / SUM(노출수) * 100, not the mean of per-row CTRs.
+
+    from utils.cube import get_cube
+    cube = get_cube('./data/yummy_food/yummy-food-market.csv')
+    cube.query(by=['매체'], where={'카테고리': '간편식'}, measures=['매출액', 'ROAS'])
+    cube.value('매출액', where={'매체': '쿠빵', '주요구매연령': ['20대', '30대']})
+
+Environment:
+    CUBE_ENABLED      "false" disables the cube (get_cube returns None)
+    CUBE_MAX_DIMS     Largest dimension combination that is precomputed (default 3)
+    CUBE_MAX_CELL_RATIO  Largest cuboid precomputed, as a share of the source rows (default 0.5)
+    CUBE_DIMENSIONS   Comma-separated dimension columns (overrides DIMENSIONS)
+    CUBE_MEASURES     Comma-separated additive measure columns (overrides MEASURES)
+"""
+
+import os
+import math
+import logging
+import threading
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from utils.data_loader import DATA_CACHE_ROOT, feather, file_digest, load_table
+from utils.dataset_profile import TABULAR_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CUBE_ENABLED = os.getenv("CUBE_ENABLED", "true").lower() == "true"
+CUBE_MAX_DIMS = int(os.getenv("CUBE_MAX_DIMS", "3"))
+CUBE_MAX_CELL_RATIO = float(os.getenv("CUBE_MAX_CELL_RATIO", "0.5"))
+CUBE_DIR = os.path.join(DATA_CACHE_ROOT, "cubes")
+CUBE_VERSION = 2  # part of the file name: bump when the stored layout changes
+
+DIMENSIONS = [column.strip() for column in os.getenv("CUBE_DIMENSIONS", "").split(",") if column.strip()] or [
+    "날짜", "매체", "카테고리", "상품명", "주요구매연령", "주요구매성별",              # yummy_food
+    "Date", "Product", "Category", "Size", "ship-city", "Gender", "Age Group",  # moon_market
+]
+MEASURES = [column.strip() for column in os.getenv("CUBE_MEASURES", "").split(",") if column.strip()] or [
+    "노출수", "클릭수", "전환수", "광고비용", "매출액",
+    "Qty", "Amount",
+]
+# name -> (numerator, denominator, scale); evaluated on summed measures
+DERIVED = {
+    "CTR": ("클릭수", "노출수", 100),
+    "전환율": ("전환수", "클릭수", 100),
+    "ROAS": ("매출액", "광고비용", 1),
+}
+ROWS = "rows"
+GROUPING = "_grouping"  # which dimensions a cube row is grouped by, "|"-joined ("" = grand total)
+
+stats = {"builds": 0, "loads": 0, "queries": 0, "cuboid_hits": 0, "rollups": 0, "source_groupbys": 0}
+_cubes: Dict[str, "Cube"] = {}
+_lock = threading.Lock()
+
+
+class Cube:
+    """Rollups of one dataset version: sums of `measures` and row counts per dimension combination."""
+
+    def __init__(self, source: str, table: pd.DataFrame, dimensions: List[str], measures: List[str]):
+        self.source = source
+        self.table = table
+        self.dimensions = dimensions
+        self.measures = measures
+        self.derived = {name: spec for name, spec in DERIVED.items() if spec[0] in measures and spec[1] in measures}
+        self._cuboids: Dict[Tuple[str, ...], pd.DataFrame] = {}
+        self._indexes: Dict[Tuple[str, ...], Dict[tuple, int]] = {}  # member values (as text) -> cuboid row
+        self._arrays: Dict[Tuple[str, ...], Dict[str, Any]] = {}     # measure/rows columns of a cuboid as ndarrays
+        self._groupings = set(table[GROUPING].unique())
+
+    @classmethod
+    def build(cls, source: str, dimensions: List[str], measures: List[str], max_dims: int = CUBE_MAX_DIMS,
+              max_cell_ratio: float = CUBE_MAX_CELL_RATIO) -> "Cube":
+        """Aggregate the combinations of up to `max_dims` dimensions (plus all of them) that pay off.
+
+        Coarse combinations are taken first; one whose estimated cell count exceeds
+        `max_cell_ratio` of the source rows, or would push the cube past the source row count,
+        is skipped. When the finest cuboid (all dimensions) is kept, the others are rolled up
+        from it instead of from the rows.
+        """
+        df = load_table(source, columns=dimensions + measures).assign(**{ROWS: 1})
+        members = {d: df[d].nunique(dropna=False) for d in dimensions}
+        candidates = [dims for size in range(0, min(max_dims, len(dimensions)) + 1) for dims in combinations(dimensions, size)]
+        if tuple(dimensions) not in candidates:
+            candidates.append(tuple(dimensions))
+        groupings, cells = [], 0
+        for dims in candidates:
+            estimate = min(math.prod(members[d] for d in dims), len(df))
+            if dims and (estimate > max_cell_ratio * len(df) or cells + estimate > len(df)):
+                continue
+            groupings.append(dims)
+            cells += estimate
+
+        base = df
+        if tuple(dimensions) in groupings:
+            base = df.groupby(dimensions, dropna=False, observed=True, sort=False)[measures + [ROWS]].sum().reset_index()
+        parts = []
+        for dims in groupings:
+            if len(dims) == len(dimensions):
+                part = base.copy()
+            elif dims:
+                part = base.groupby(list(dims), dropna=False, observed=True, sort=False)[measures + [ROWS]].sum().reset_index()
+            else:
+                part = base[measures + [ROWS]].sum().to_frame().T
+            part[GROUPING] = "|".join(dims)
+            parts.append(part)
+        table = pd.concat(parts, ignore_index=True)[[GROUPING] + dimensions + measures + [ROWS]]
+        return cls(source, table, dimensions, measures)
+
+    def _cuboid(self, dims: Tuple[str, ...]) -> pd.DataFrame:
+        """Aggregated rows for exactly `dims` (in dimension order), from the cube or from the source."""
+        cuboid = self._cuboids.get(dims)
+        if cuboid is not None:
+            stats["cuboid_hits"] += 1
+            return cuboid
+        key = "|".join(dims)
+        if key in self._groupings:
+            stats["cuboid_hits"] += 1
+            cuboid = self.table.loc[self.table[GROUPING] == key, list(dims) + self.measures + [ROWS]]
+        elif "|".join(self.dimensions) in self._groupings:
+            # Combination wider than CUBE_MAX_DIMS: roll it up once from the finest cuboid and keep it
+            stats["rollups"] += 1
+            finest = self._cuboid(tuple(self.dimensions))
+            cuboid = finest.groupby(list(dims), dropna=False, observed=True)[self.measures + [ROWS]].sum().reset_index()
+        else:
+            # Not precomputed (too many cells to pay off): group the source rows directly
+            stats["source_groupbys"] += 1
+            rows = load_table(self.source, columns=self.dimensions + self.measures).assign(**{ROWS: 1})
+            if dims:
+                cuboid = rows.groupby(list(dims), dropna=False, observed=True)[self.measures + [ROWS]].sum().reset_index()
+            else:
+                cuboid = rows[self.measures + [ROWS]].sum().to_frame().T
+        self._cuboids[dims] = cuboid.reset_index(drop=True)
+        return self._cuboids[dims]
+
+    def _index(self, dims: Tuple[str, ...]) -> Dict[tuple, int]:
+        index = self._indexes.get(dims)
+        if index is None:
+            frame = self._cuboid(dims)
+            keys = zip(*(frame[d].astype(str) for d in dims)) if dims else [()]
+            index = self._indexes[dims] = {key: position for position, key in enumerate(keys)}
+        return index
+
+    def _point(self, where: Dict[str, Any]) -> Dict[str, float]:
+        """Summed measures and row count of the single member combination pinned by `where` (zeros if absent)."""
+        dims = tuple(d for d in self.dimensions if d in where)
+        position = self._index(dims).get(tuple(str(where[d]) for d in dims))
+        arrays = self._arrays.get(dims)
+        if arrays is None:
+            frame = self._cuboid(dims)
+            arrays = self._arrays[dims] = {name: frame[name].to_numpy() for name in self.measures + [ROWS]}
+        return {name: 0.0 if position is None else float(values[position]) for name, values in arrays.items()}
+
+    def _check(self, names: Sequence[str], measures: Sequence[str]) -> None:
+        unknown = [name for name in names if name not in self.dimensions]
+        unknown += [name for name in measures if name not in self.measures and name not in self.derived and name != ROWS]
+        if unknown:
+            raise KeyError(f"Not in the cube of {self.source}: {unknown}")
+
+    def _derive(self, frame: pd.DataFrame, measures: Sequence[str]) -> pd.DataFrame:
+        for name in measures:
+            if name in self.derived:
+                numerator, denominator, scale = self.derived[name]
+                frame[name] = frame[numerator] / frame[denominator].where(frame[denominator] != 0) * scale
+        return frame
+
+    def query(self, by: Sequence[str] = (), where: Optional[Dict[str, Any]] = None,
+              measures: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Aggregated measures grouped by `by` over the rows matching `where`.
+
+        Args:
+            by: Dimensions to group by (empty for a single total row)
+            where: {dimension: value or list of values}
+            measures: Measure, derived (CTR, ROAS, ...) or "rows" columns (all measures + rows if omitted)
+        """
+        stats["queries"] += 1
+        where = where or {}
+        by = list(by)
+        measures = list(measures) if measures is not None else self.measures + [ROWS]
+        self._check(by + list(where), measures)
+
+        dims = tuple(d for d in self.dimensions if d in set(by) | set(where))
+        frame = self._cuboid(dims)
+        base = sorted({m for m in measures if m in self.measures or m == ROWS}
+                      | {part for m in measures if m in self.derived for part in self.derived[m][:2]})
+        scalar_where = all(not isinstance(value, (list, tuple, set)) for value in where.values())
+        if not by and scalar_where:
+            result = pd.DataFrame([self._point(where)])
+            return self._derive(result, measures)[measures]
+        for dim, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            column = frame[dim]
+            # Text dimensions compare as text, so 3 and "3" find the same member
+            frame = frame[column.isin(values) if pd.api.types.is_numeric_dtype(column) else column.astype(str).isin([str(v) for v in values])]
+
+        if by and scalar_where:
+            # Every other cuboid dimension is pinned to one member: rows are already unique per `by`
+            result = frame[by + base].reset_index(drop=True)
+        elif by:
+            result = frame.groupby(by, dropna=False, observed=True)[base].sum().reset_index()
+        else:
+            result = frame[base].sum().to_frame().T
+        result = self._derive(result, measures)
+        return result[by + measures]
+
+    def value(self, measure: str, where: Optional[Dict[str, Any]] = None, agg: str = "sum") -> float:
+        """One number: SUM (or MEAN = sum / rows) of a measure, a derived ratio, or the row count."""
+        where = where or {}
+        if agg not in ("sum", "mean"):
+            raise ValueError(f"Unsupported cube aggregation: {agg}")
+        self._check(list(where), [measure])
+        stats["queries"] += 1
+        if all(not isinstance(value, (list, tuple, set)) for value in where.values()):
+            totals = self._point(where)  # member index lookup, no DataFrame work
+        else:
+            totals = self.query(where=where).iloc[0].to_dict()
+        if measure in self.derived:
+            numerator, denominator, scale = self.derived[measure]
+            return totals[numerator] / totals[denominator] * scale if totals[denominator] else float("nan")
+        if agg == "mean":
+            return totals[measure] / totals[ROWS] if totals[ROWS] else float("nan")
+        return float(totals[measure])
+
+    def precomputed(self, dims: Sequence[str]) -> bool:
+        """Whether the cuboid of `dims` (in dimension order) is stored in the cube."""
+        return "|".join(dims) in self._groupings
+
+    def covers(self, columns: Sequence[str]) -> bool:
+        return all(c in self.dimensions or c in self.measures or c in self.derived or c == ROWS for c in columns)
+
+
+def _schema(source: str) -> Tuple[List[str], List[str]]:
+    """Cube dimensions and measures available in the file (numeric measures only)."""
+    head = load_table(source)
+    dimensions = [column for column in DIMENSIONS if column in head.columns]
+    measures = [column for column in MEASURES if column in head.columns and pd.api.types.is_numeric_dtype(head[column])]
+    return dimensions, measures
+
+
+def get_cube(source: str, max_dims: int = CUBE_MAX_DIMS) -> Optional[Cube]:
+    """
+    The cube of a dataset, built on first use per file content and stored under DATA_CACHE_ROOT.
+
+    Returns None when the file has no known dimension or measure columns, or CUBE_ENABLED is off.
+    """
+    if not CUBE_ENABLED:
+        return None
+    path = os.path.abspath(source)
+    digest = file_digest(path)
+    cube = _cubes.get(digest)
+    if cube is not None:
+        return cube
+    with _lock:
+        cube = _cubes.get(digest)
+        if cube is not None:
+            return cube
+        dimensions, measures = _schema(path)
+        if not dimensions or not measures:
+            return None
+        target = os.path.join(CUBE_DIR, f"{digest}.v{CUBE_VERSION}.d{max_dims}.r{CUBE_MAX_CELL_RATIO:g}.feather")
+        if feather is not None and os.path.exists(target):
+            cube = Cube(path, feather.read_table(target, memory_map=True).to_pandas(), dimensions, measures)
+            stats["loads"] += 1
+        else:
+            cube = Cube.build(path, dimensions, measures, max_dims)
+            stats["builds"] += 1
+            logger.info(f"Cube built for {source}: {len(cube.table):,} rows, {len(cube._groupings)} cuboids "
+                        f"over {len(dimensions)} dimensions")
+            if feather is not None:
+                try:
+                    os.makedirs(CUBE_DIR, exist_ok=True)
+                    tmp = f"{target}.{os.getpid()}.tmp"
+                    feather.write_feather(cube.table, tmp, compression="uncompressed")
+                    os.replace(tmp, target)
+                except OSError as e:
+                    logger.warning(f"Cube not stored: {e}")
+        _cubes[digest] = cube
+        return cube
+
+
+def warm_up(data_dir: str = "./data") -> int:
+    """Build (or load) the cube of every tabular file under `data_dir`; returns how many have one."""
+    count = 0
+    for root, _, names in sorted(os.walk(data_dir)):
+        for name in sorted(names):
+            if not name.lower().endswith(TABULAR_EXTENSIONS):
+                continue
+            try:
+                count += get_cube(os.path.join(root, name)) is not None
+            except Exception as e:
+                logger.warning(f"Cube not built for {os.path.join(root, name)}: {e}")
+    return count
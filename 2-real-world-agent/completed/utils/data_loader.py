@@ -0,0 +1,149 @@
+"""
+Shared loader for the source datasets, backed by a columnar (Arrow/Feather) cache.
+
+Analysis scripts used to re-parse the source CSV in every subprocess, or pickle the whole
+DataFrame to ./artifacts/cache/df_main.pkl and unpickle all of it on the next turn. The
+first load_table() of a file parses it once and writes an uncompressed Feather (Arrow IPC)
+copy keyed by the file's sha256; later loads - from any process - memory-map that copy and
+read only the requested columns.
+
+The module imports nothing from the agent runtime, so generated scripts use it directly
+(the project root is on PYTHONPATH of the execution tools, see kernel_pool.script_env):
+
+    from utils.data_loader import load_table
+    df = load_table('./data/sales.csv', columns=['Date', 'Amount'])
+
+Without pyarrow the source file is parsed on every call, exactly as before.
+
+Environment:
+    DATA_CACHE_ROOT     Root of the on-disk caches (default <project>/.cache)
+    DATA_CACHE_ENABLED  "false" always parses the source file
+"""
+
+import os
+import csv
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # optional: loads fall back to parsing the source
+    pa = feather = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_CACHE_ROOT = os.getenv("DATA_CACHE_ROOT", os.path.join(PROJECT_ROOT, ".cache"))
+DATA_CACHE_ENABLED = os.getenv("DATA_CACHE_ENABLED", "true").lower() == "true"
+TABLE_CACHE_DIR = os.path.join(DATA_CACHE_ROOT, "tables")
+
+CSV_ENCODINGS = ("utf-8-sig", "cp949")
+COLUMNAR_EXTENSIONS = (".parquet", ".feather", ".arrow")
+SNIFF_BYTES = 64 * 1024
+
+stats = {"loads": 0, "conversions": 0, "cache_reads": 0, "source_reads": 0}
+_hash_memo: Dict[tuple, str] = {}  # (path, size, mtime) -> sha256, avoids re-hashing unchanged files
+_convert_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """sha256 of the file contents (memoized per size and mtime)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _hash_memo.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = _hash_memo[key] = sha.hexdigest()
+    return digest
+
+
+def _sniff_delimiter(path: str, encoding: str) -> str:
+    """Delimiter guessed from the head of the file, so the fast C parser can be used (sep=None needs the python engine)."""
+    with open(path, encoding=encoding) as f:
+        sample = f.read(SNIFF_BYTES)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def read_source(path: str, columns: Optional[Sequence[str]] = None) -> tuple:
+    """Parse the source file itself: (DataFrame, encoding) - encoding is "" for binary formats."""
+    ext = os.path.splitext(path)[1].lower()
+    columns = list(columns) if columns is not None else None
+    if ext in (".xlsx", ".xls"):
+        return pd.read_excel(path, usecols=columns), ""
+    if ext == ".parquet":
+        return pd.read_parquet(path, columns=columns), ""
+    if ext in (".feather", ".arrow"):
+        return pd.read_feather(path, columns=columns), ""
+    for encoding in CSV_ENCODINGS:
+        try:
+            sep = "\t" if ext == ".tsv" else _sniff_delimiter(path, encoding)
+            return pd.read_csv(path, sep=sep, encoding=encoding, usecols=columns), encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"{path}: not readable as {' / '.join(CSV_ENCODINGS)}")
+
+
+def cache_path(path: str, cache_dir: str = TABLE_CACHE_DIR) -> str:
+    """Location of the columnar copy of `path` (whether or not it exists yet)."""
+    return os.path.join(cache_dir, f"{file_digest(path)}.feather")
+
+
+def _convert(path: str, target: str) -> None:
+    """Parse `path` once and write its uncompressed Feather copy (atomically)."""
+    df, _ = read_source(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        # Uncompressed IPC so reads can memory-map the buffers instead of decoding them
+        feather.write_feather(df, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    stats["conversions"] += 1
+    logger.info(f"Columnar cache written: {path} -> {target} ({len(df):,} rows)")
+
+
+def load_table(path: str, columns: Optional[Sequence[str]] = None, cache_dir: str = TABLE_CACHE_DIR) -> pd.DataFrame:
+    """
+    Load a source dataset as a DataFrame through the columnar cache.
+
+    Args:
+        path: Source file (csv/tsv/xlsx/parquet/feather)
+        columns: Only these columns are read (all if omitted)
+        cache_dir: Directory of the Feather copies, shared by every process
+
+    The result has the same columns and dtypes as a plain pd.read_csv(path) of the file.
+    """
+    stats["loads"] += 1
+    if feather is None or not DATA_CACHE_ENABLED or path.lower().endswith(COLUMNAR_EXTENSIONS):
+        # Already columnar (projection is native), or no Arrow to build the copy with
+        stats["source_reads"] += 1
+        return read_source(path, columns)[0]
+
+    target = cache_path(path, cache_dir)
+    if not os.path.exists(target):
+        with _convert_lock:
+            if not os.path.exists(target):
+                try:
+                    _convert(path, target)
+                except (OSError, pa.ArrowException) as e:
+                    logger.warning(f"Columnar cache not written for {path}: {e}")
+                    stats["source_reads"] += 1
+                    return read_source(path, columns)[0]
+
+    stats["cache_reads"] += 1
+    table = feather.read_table(target, columns=list(columns) if columns is not None else None, memory_map=True)
+    return table.to_pandas()
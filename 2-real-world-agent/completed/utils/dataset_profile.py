@@ -0,0 +1,260 @@
+"""
+Precomputed profiles of the input datasets under ./data.
+
+The coder agent used to spend its first tool turns on `df.dtypes`, `df.head()` and reading
+column_definitions.json before any real analysis. A profile holds what those calls return -
+shape, dtypes, null counts, cardinalities, min/max, top categories and a few sample rows -
+and is injected into the planner and coder prompts (DATA_PROFILE) instead.
+
+Profiles are computed once per file *content* (sha256) and stored as JSON, so they survive
+restarts and a changed file is re-profiled automatically. Column descriptions from a
+column_definitions.json next to the file are merged in when the profile is rendered.
+
+Environment:
+    DATASET_PROFILE_ENABLED      "false" disables profiling and prompt injection
+    DATASET_PROFILE_CACHE_DIR    Where profiles are stored (default <DATA_CACHE_ROOT>/dataset_profiles)
+    DATASET_PROFILE_TOP_VALUES   Top categories listed per column (default 5)
+    DATASET_PROFILE_SAMPLE_ROWS  Sample rows included per file (default 3)
+    DATASET_PROFILE_MAX_FILES    Files profiled per request (default 8)
+"""
+
+import os
+import re
+import json
+import logging
+import warnings
+import threading
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from utils.data_loader import DATA_CACHE_ROOT, file_digest, read_source
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DATASET_PROFILE_ENABLED = os.getenv("DATASET_PROFILE_ENABLED", "true").lower() == "true"
+DATASET_PROFILE_CACHE_DIR = os.getenv("DATASET_PROFILE_CACHE_DIR", os.path.join(DATA_CACHE_ROOT, "dataset_profiles"))
+DATASET_PROFILE_TOP_VALUES = int(os.getenv("DATASET_PROFILE_TOP_VALUES", "5"))
+DATASET_PROFILE_SAMPLE_ROWS = int(os.getenv("DATASET_PROFILE_SAMPLE_ROWS", "3"))
+DATASET_PROFILE_MAX_FILES = int(os.getenv("DATASET_PROFILE_MAX_FILES", "8"))
+
+PROFILE_VERSION = 1  # bump when the profile layout changes; old cache files are then ignored
+TABULAR_EXTENSIONS = (".csv", ".tsv", ".xlsx", ".xls", ".parquet", ".feather")
+COLUMN_DEFINITIONS = "column_definitions.json"
+DATE_PARSE_RATIO = 0.95  # share of values that must parse for a text column to count as a date
+
+# ./data/... paths mentioned in a request (quotes, backticks and trailing globs excluded)
+_DATA_PATH = re.compile(r"(?<![\w/.])(?:\./)?data/[^\s'\"`‘’“”,()<>*]*")
+
+stats = {"profiled": 0, "cache_hits": 0, "errors": 0}
+_lock = threading.Lock()
+
+
+def _scalar(value: Any) -> Any:
+    """JSON-safe version of a pandas/numpy scalar."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 4)
+    return value if isinstance(value, (int, str, bool)) else str(value)
+
+
+def _as_dates(series: pd.Series) -> Optional[pd.Series]:
+    """`series` parsed as dates if nearly all of its values are dates, else None."""
+    values = series.dropna()
+    if values.empty or not values.astype(str).str.contains(r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}", regex=True).all():
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # format inference warnings for M/D/YY style dates
+        parsed = pd.to_datetime(values, errors="coerce")
+    return parsed if parsed.notna().mean() >= DATE_PARSE_RATIO else None
+
+
+def _profile_column(name: str, series: pd.Series, top_values: int) -> Dict[str, Any]:
+    column = {
+        "name": str(name),
+        "dtype": str(series.dtype),
+        "nulls": int(series.isna().sum()),
+        "unique": int(series.nunique(dropna=True)),
+    }
+    if pd.api.types.is_bool_dtype(series):
+        column["top"] = [[_scalar(k), int(v)] for k, v in series.value_counts().head(top_values).items()]
+    elif pd.api.types.is_numeric_dtype(series):
+        column["min"], column["max"] = _scalar(series.min()), _scalar(series.max())
+        column["mean"] = _scalar(series.mean())
+    else:
+        dates = _as_dates(series)
+        if dates is not None:
+            column["dtype"] = f"date (stored as {series.dtype})"
+            column["min"], column["max"] = dates.min().date().isoformat(), dates.max().date().isoformat()
+        else:
+            column["top"] = [[_scalar(k), int(v)] for k, v in series.value_counts().head(top_values).items()]
+    return column
+
+
+def profile_file(path: str, top_values: int = DATASET_PROFILE_TOP_VALUES,
+                 sample_rows: int = DATASET_PROFILE_SAMPLE_ROWS) -> Dict[str, Any]:
+    """Profile of one tabular file (computed from the DataFrame; no caching)."""
+    df, encoding = read_source(path)
+    return {
+        "version": PROFILE_VERSION,
+        "rows": int(len(df)),
+        "encoding": encoding,
+        "columns": [_profile_column(name, df[name], top_values) for name in df.columns],
+        "sample": df.head(sample_rows).to_csv(index=False).strip(),
+    }
+
+
+class DatasetProfileCache:
+    """Content-addressed store of file profiles: `<cache_dir>/<sha256>.json`."""
+
+    def __init__(self, cache_dir: str = DATASET_PROFILE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, path: str) -> Dict[str, Any]:
+        digest = file_digest(path)
+        profile = self._memory.get(digest)
+        if profile is None:
+            profile = self._load(digest)
+        if profile is None:
+            profile = profile_file(path)
+            profile["sha256"] = digest
+            self._store(digest, profile)
+            stats["profiled"] += 1
+            logger.info(f"Dataset profiled: {path} ({profile['rows']:,} rows, {len(profile['columns'])} columns)")
+        else:
+            stats["cache_hits"] += 1
+        self._memory[digest] = profile
+        return profile
+
+    def _load(self, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.cache_dir, f"{digest}.json"), encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return profile if profile.get("version") == PROFILE_VERSION else None
+
+    def _store(self, digest: str, profile: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = os.path.join(self.cache_dir, f"{digest}.json.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(profile, f, ensure_ascii=False)
+            os.replace(tmp, os.path.join(self.cache_dir, f"{digest}.json"))
+        except OSError as e:
+            logger.warning(f"Dataset profile not cached: {e}")
+
+
+profile_cache = DatasetProfileCache()
+
+
+def _column_descriptions(directory: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(directory, COLUMN_DEFINITIONS), encoding="utf-8") as f:
+            return {item["column_name"]: item.get("column_desc", "") for item in json.load(f)}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def find_data_files(request: str, resolve=os.path.abspath, max_files: int = DATASET_PROFILE_MAX_FILES) -> List[str]:
+    """Tabular files under the ./data paths mentioned in `request` (directories are walked).
+
+    Returns the paths as written in prompts (`./data/...`); `resolve` maps them to the filesystem.
+    """
+    files: List[str] = []
+    for mention in dict.fromkeys(match.rstrip("/.") for match in _DATA_PATH.findall(request or "")):
+        relative = "./" + mention.lstrip("./")
+        target = resolve(relative)
+        if os.path.isfile(target):
+            candidates = [relative]
+        elif os.path.isdir(target):
+            candidates = [os.path.join(relative, os.path.relpath(os.path.join(root, name), target))
+                          for root, _, names in sorted(os.walk(target)) for name in sorted(names)]
+        else:
+            continue
+        for candidate in candidates:
+            if candidate.lower().endswith(TABULAR_EXTENSIONS) and candidate not in files:
+                files.append(candidate)
+    return files[:max_files]
+
+
+def _render_column(column: Dict[str, Any], description: str) -> str:
+    if "min" in column:
+        values = f"{column['min']} ~ {column['max']}"
+        if "mean" in column:
+            values += f", mean {column['mean']}"
+    else:
+        values = ", ".join(f"{value} ({count})" for value, count in column.get("top", []))
+    return f"| {column['name']} | {column['dtype']} | {column['nulls']} | {column['unique']} | {values} | {description} |"
+
+
+def render_profile(path: str, profile: Dict[str, Any], descriptions: Dict[str, str]) -> str:
+    encoding = f", encoding {profile['encoding']}" if profile.get("encoding") else ""
+    lines = [
+        f"### {path} ({profile['rows']:,} rows x {len(profile['columns'])} columns{encoding})",
+        "| column | dtype | nulls | unique | range / top values (count) | description |",
+        "|---|---|---|---|---|---|",
+    ]
+    lines.extend(_render_column(column, descriptions.get(column["name"], "")) for column in profile["columns"])
+    if profile.get("sample"):
+        lines.append(f"Sample rows:\n```\n{profile['sample']}\n```")
+    return "\n".join(lines)
+
+
+def build_data_profile(request: str, resolve=os.path.abspath) -> str:
+    """Rendered profiles of the data files a request refers to ("" if there are none)."""
+    if not DATASET_PROFILE_ENABLED:
+        return ""
+    sections = []
+    for path in find_data_files(request, resolve):
+        try:
+            with _lock:
+                profile = profile_cache.get(resolve(path))
+        except Exception as e:  # an unreadable file must not stop the workflow
+            stats["errors"] += 1
+            logger.warning(f"Dataset profile failed for {path}: {e}")
+            continue
+        sections.append(render_profile(path, profile, _column_descriptions(os.path.dirname(resolve(path)))))
+    if not sections:
+        return ""
+    return "<data_profile>\n" + "\n\n".join(sections) + "\n</data_profile>"
+
+
+def warm_up(data_dir: str = "./data") -> int:
+    """Profile every tabular file under `data_dir` ahead of the first request; returns the file count."""
+    if not DATASET_PROFILE_ENABLED:
+        return 0
+    count = 0
+    for root, _, names in sorted(os.walk(data_dir)):
+        for name in sorted(names):
+            if not name.lower().endswith(TABULAR_EXTENSIONS):
+                continue
+            try:
+                with _lock:
+                    profile_cache.get(os.path.join(root, name))
+                count += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning(f"Dataset profile failed for {os.path.join(root, name)}: {e}")
+    return count
+
+
+def get_data_profile(shared_state: Dict[str, Any]) -> str:
+    """The session's rendered data profile, built on first use from the user request.
+
+    The first call may read and profile the data files: async callers run it in a thread
+    (`await asyncio.to_thread(get_data_profile, shared_state)`).
+    """
+    profile = shared_state.get("data_profile")
+    if profile is None:
+        from utils.session import current_session
+
+        request = shared_state.get("request_prompt") or shared_state.get("request", "")
+        profile = build_data_profile(request, current_session().resolve_path)
+        shared_state["data_profile"] = profile
+    return profile
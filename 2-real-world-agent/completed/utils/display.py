@@ -0,0 +1,156 @@
+"""
+Terminal renderer for streamed agent events (strands_utils.process_event_for_display).
+
+Printing every token with print(..., flush=True) costs a write syscall per chunk, and each
+colour switch re-emits escape codes. DisplaySink keeps one buffer for the whole run:
+consecutive chunks of the same colour are coalesced and written out at most once per frame
+interval (or when the buffer grows large), and tool results are split once and capped.
+
+Environment:
+    DISPLAY_ENABLED            "false" turns terminal rendering off (headless runs)
+    DISPLAY_FRAME_MS           Minimum interval between writes of streamed text (default 50)
+    DISPLAY_MAX_BUFFER_CHARS   Buffered text that forces an early write (default 65536)
+    DISPLAY_TOOL_RESULT_CHARS  Characters of a tool result shown in the terminal (default 4000)
+"""
+
+import os
+import sys
+import time
+import atexit
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+COLORS = {
+    'white': '\033[97m',
+    'cyan': '\033[96m',
+    'yellow': '\033[93m',
+}
+RESET = '\033[0m'
+
+DISPLAY_ENABLED = os.getenv("DISPLAY_ENABLED", "true").lower() == "true"
+DISPLAY_FRAME_MS = float(os.getenv("DISPLAY_FRAME_MS", "50"))
+DISPLAY_MAX_BUFFER_CHARS = int(os.getenv("DISPLAY_MAX_BUFFER_CHARS", "65536"))
+DISPLAY_TOOL_RESULT_CHARS = int(os.getenv("DISPLAY_TOOL_RESULT_CHARS", "4000"))
+FILE_READ_PREVIEW_CHARS = 500
+
+
+def _cap(text: str, limit: int) -> str:
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n... ({len(text) - limit:,} more characters)"
+
+
+class DisplaySink:
+    """Process-wide, frame-buffered colour writer for the event stream."""
+
+    def __init__(self, enabled: bool = DISPLAY_ENABLED, frame_ms: float = DISPLAY_FRAME_MS,
+                 max_buffer: int = DISPLAY_MAX_BUFFER_CHARS, tool_result_chars: int = DISPLAY_TOOL_RESULT_CHARS):
+        self.enabled = enabled
+        self.frame = frame_ms / 1000
+        self.max_buffer = max_buffer
+        self.tool_result_chars = tool_result_chars
+        self._buffer = []
+        self._buffered_chars = 0
+        self._color: Optional[str] = None
+        self._last_write = 0.0
+        self._timer = None
+        self._lock = threading.Lock()
+        self.stats = {"chunks": 0, "writes": 0}
+
+    def write(self, text: str, color: str = 'white') -> None:
+        """Queue `text`; it reaches the terminal within one frame interval."""
+        if not self.enabled or not text:
+            return
+        with self._lock:
+            if color != self._color:
+                self._buffer.append(COLORS.get(color, COLORS['white']))
+                self._color = color
+            self._buffer.append(text)
+            self._buffered_chars += len(text)
+            self.stats["chunks"] += 1
+            due = self._buffered_chars >= self.max_buffer or time.monotonic() - self._last_write >= self.frame
+        if due:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        # Text that arrives right before the stream pauses must not wait for the next event
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop: the next write or an explicit flush() emits it
+        self._timer = loop.call_later(self.frame, self.flush)
+
+    def flush(self) -> None:
+        """Write everything buffered so far in one call."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            self._buffer.append(RESET)
+            data = "".join(self._buffer)
+            self._buffer.clear()
+            self._buffered_chars = 0
+            self._color = None
+            self._last_write = time.monotonic()
+            self.stats["writes"] += 1
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+    def render_event(self, event: Optional[Dict[str, Any]]) -> None:
+        """Render one streamed event (text and reasoning are coalesced, tool results capped)."""
+        if not self.enabled or not event:
+            return
+        event_type = event.get("event_type")
+        if event_type == "text_chunk":
+            self.write(event.get('data', ''), 'white')
+        elif event_type == "reasoning":
+            self.write(event.get('reasoning_text', ''), 'cyan')
+        elif event_type == "tool_output":
+            self.write(event.get('data', ''), 'yellow')
+        elif event_type == "tool_result":
+            self._render_tool_result(event.get("tool_name", "unknown"), event.get("output", ""))
+
+    def _render_tool_result(self, tool_name: str, output: str) -> None:
+        self.write(f"\n[TOOL RESULT - {tool_name}]\n", 'white')
+        limit = self.tool_result_chars
+
+        # Parse output based on function name
+        if tool_name in ("python_repl_tool", "bash_tool"):
+            fields = output.split("||")
+            if tool_name == "python_repl_tool" and len(fields) == 3:
+                status, code, stdout = fields
+                self.write(f"Status: {status}\n", 'yellow')
+                if code: self.write(f"Code:\n```python\n{_cap(code, limit)}\n```\n", 'yellow')
+                if stdout and stdout != 'None': self.write(f"Output:\n{_cap(stdout, limit)}\n", 'yellow')
+            elif tool_name == "bash_tool" and len(fields) == 2:
+                cmd, stdout = fields
+                if cmd: self.write(f"CMD:\n```bash\n{cmd}\n```\n", 'yellow')
+                if stdout and stdout != 'None': self.write(f"Output:\n{_cap(stdout, limit)}\n", 'yellow')
+            else:
+                self.write(f"Output: {_cap(output, limit)}\n", 'white')
+
+        elif tool_name == "write_and_execute_tool":
+            # write_and_execute_tool: 작성 결과 + 실행 결과
+            self.write(f"{_cap(output, limit)}\n", 'yellow')
+
+        elif tool_name == "file_read":
+            # file_read 결과는 보통 길어서 앞부분만 표시
+            self.write(f"File content preview:\n{_cap(output, FILE_READ_PREVIEW_CHARS)}\n", 'yellow')
+
+        elif tool_name == "rag_tool":
+            self.write(f"rag response:\n{_cap(output, limit)}\n", 'yellow')
+
+        else: # 기타 모든 툴 결과 표시, 코더 툴, 리포터 툴 결과도 다 출력 (for debug)
+            self.write(f"Output: {_cap(output, limit)}\n", 'white')
+        self.flush()
+
+
+display_sink = DisplaySink()
+atexit.register(display_sink.flush)
@@ -1,34 +1,276 @@
 """
-Global event queue for streaming events across different components.
+Per-session event bus for streaming events across different components.
 Allows coder_agent_tool and other tools to send streaming events to main.py
+
+Consumers (StreamableGraph / StreamableAgent) await events instead of polling.
+Producers may call put_event() from the event loop thread or from tool threads.
 """
 
+import os
+import asyncio
+import logging
 import threading
-from collections import deque
+from contextvars import ContextVar
 from typing import Dict, Any, Optional
 
-# Global event queue
-_global_event_queue = deque()
-_queue_lock = threading.Lock()
+from utils.events import TextChunkEvent
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Overflow policies applied when a bus reaches its capacity
+OVERFLOW_BLOCK = "block"                        # producer waits until the consumer drains (falls back to drop_oldest_text without a consumer)
+OVERFLOW_DROP_OLDEST_TEXT = "drop_oldest_text"  # evict the oldest text_chunk event
+OVERFLOW_COALESCE = "coalesce"                  # merge consecutive text_chunk events, then evict the oldest text_chunk
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST_TEXT, OVERFLOW_COALESCE)
+
+DEFAULT_MAXSIZE = int(os.getenv("EVENT_QUEUE_MAXSIZE", "4096"))
+DEFAULT_OVERFLOW_POLICY = os.getenv("EVENT_QUEUE_OVERFLOW_POLICY", OVERFLOW_COALESCE)
+DEFAULT_SESSION_ID = "default"
+
+
+class _StreamEnd:
+    """Marks the end of a producer task inside the queue (never yielded to consumers)."""
+    __slots__ = ()
+
+
+def _is_text_chunk(event) -> bool:
+    return isinstance(event, TextChunkEvent) or (isinstance(event, dict) and event.get("event_type") == "text_chunk")
+
+
+def _merge_text_chunks(head, tail):
+    """Return a new text_chunk event holding head's text followed by tail's text."""
+    if isinstance(head, TextChunkEvent):
+        return head.merged(tail)
+    data = head.get("data", "") + tail.get("data", "")
+    return {**head, "data": data, "chunk_size": len(data)}
+
+
+class EventBus(asyncio.Queue):
+    """
+    Bounded asyncio.Queue that stays safe for producers running on other threads.
+
+    Capacity is enforced by the overflow policy rather than by asyncio.Queue itself,
+    so events that must not be lost (tool results, usage metadata) are always accepted.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, overflow_policy: str = DEFAULT_OVERFLOW_POLICY, session_id: str = DEFAULT_SESSION_ID):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Use one of {OVERFLOW_POLICIES}")
+        super().__init__()
+        self.capacity = maxsize
+        self.overflow_policy = overflow_policy
+        self.session_id = session_id
+        self.stats = {"put": 0, "dropped": 0, "coalesced": 0, "blocked": 0}
+
+        self._consumer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._consumers = 0
+        self._in_flight = 0                      # events handed to the loop but not yet enqueued
+        self._lock = threading.Lock()            # guards stats and the pre-bind buffer path
+        self._space = threading.Condition()      # wakes blocked producers on other threads
+        self._drained: Optional[asyncio.Event] = None  # wakes blocked producers on the loop thread
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def put_event(self, event: Dict[str, Any]) -> None:
+        """Add an event to the bus. Safe to call from any thread."""
+        loop = self._consumer_loop
+        if loop is None or threading.get_ident() == self._loop_thread_id or loop.is_closed():
+            with self._lock:
+                self._put_local(event)
+            return
+
+        # Producer on a tool thread: wait for capacity (block policy) then hand over to the loop
+        with self._space:
+            if self.overflow_policy == OVERFLOW_BLOCK and self._consumers:
+                if self._pending() >= self.capacity: self.stats["blocked"] += 1
+                while self._pending() >= self.capacity and self._consumers:
+                    self._space.wait(timeout=0.1)
+            self._in_flight += 1
+        try:
+            loop.call_soon_threadsafe(self._put_handed_over, event)
+        except RuntimeError:
+            # Loop closed between the check and the call
+            with self._lock:
+                self._put_handed_over(event)
+
+    def _pending(self) -> int:
+        return self.qsize() + self._in_flight
+
+    def _put_handed_over(self, event) -> None:
+        with self._space:
+            self._in_flight -= 1
+        self._put_local(event)
+
+    async def put_event_async(self, event: Dict[str, Any]) -> None:
+        """Add an event from a coroutine, awaiting capacity when the block policy is active."""
+        if self.overflow_policy == OVERFLOW_BLOCK and self._consumers and self._consumer_loop is asyncio.get_running_loop():
+            if self.qsize() >= self.capacity: self.stats["blocked"] += 1
+            while self.qsize() >= self.capacity and self._consumers:
+                self._drained.clear()
+                await self._drained.wait()
+        self.put_event(event)
+
+    def _put_local(self, event) -> None:
+        """Enqueue on the owning thread, applying the overflow policy when full."""
+        if not isinstance(event, _StreamEnd):
+            self.stats["put"] += 1
+            if self.qsize() >= self.capacity and self._handle_overflow(event):
+                return
+        self.put_nowait(event)
+
+    def _handle_overflow(self, event) -> bool:
+        """Apply the overflow policy. Returns True when the event was absorbed."""
+        buffer = self._queue  # asyncio.Queue keeps its items in a deque
+
+        if self.overflow_policy == OVERFLOW_COALESCE and _is_text_chunk(event) and buffer:
+            last = buffer[-1]
+            if _is_text_chunk(last) and last.get("agent_name") == event.get("agent_name") and last.get("source") == event.get("source"):
+                buffer[-1] = _merge_text_chunks(last, event)
+                self.stats["coalesced"] += 1
+                return True
+
+        # drop_oldest_text, and the fallback for coalesce/block when nothing can be merged or waited on
+        for idx, queued in enumerate(buffer):
+            if _is_text_chunk(queued):
+                del buffer[idx]
+                self.stats["dropped"] += 1
+                return False
+
+        # Only non-droppable events are queued - accept over capacity rather than lose them
+        return False
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Bind the bus to the consumer's event loop so other threads can hand events over."""
+        loop = loop or asyncio.get_running_loop()
+        if loop is not self._consumer_loop:
+            # asyncio.Queue remembers the first loop it waited on; a new consumer loop starts fresh
+            self._loop = None
+            self._drained = asyncio.Event()
+        self._consumer_loop = loop
+        self._loop_thread_id = threading.get_ident()
+
+    def _notify_space(self) -> None:
+        if self._drained is not None: self._drained.set()
+        with self._space:
+            self._space.notify_all()
+
+    def get_event(self) -> Optional[Dict[str, Any]]:
+        """Get an event from the bus (non-blocking)"""
+        while True:
+            try:
+                event = self.get_nowait()
+            except asyncio.QueueEmpty:
+                return None
+            if not isinstance(event, _StreamEnd):
+                if self.overflow_policy == OVERFLOW_BLOCK: self._notify_space()
+                return event
+
+    def has_events(self) -> bool:
+        """Check if there are events in the bus"""
+        return any(not isinstance(event, _StreamEnd) for event in self._queue)
+
+    def clear(self) -> None:
+        """Clear all events from the bus"""
+        self._queue.clear()
+        self._notify_space()
+
+    def drain(self):
+        """Yield every event currently queued (non-blocking)."""
+        while True:
+            event = self.get_event()
+            if event is None: return
+            yield event
+
+    async def stream_until(self, task: asyncio.Future):
+        """
+        Await events until `task` finishes, then drain what is left.
+
+        A done-callback on the task pushes an end marker through the queue, so the
+        consumer sleeps on get() and wakes only for real events or completion.
+        """
+        self.bind_loop()
+        self._consumers += 1
+        end = _StreamEnd()
+        task.add_done_callback(lambda _: self._put_local(end))
+        try:
+            while True:
+                event = await self.get()
+                if event is end:
+                    break
+                if isinstance(event, _StreamEnd):
+                    continue  # left over from an abandoned stream
+                if self.overflow_policy == OVERFLOW_BLOCK: self._notify_space()
+                yield event
+        finally:
+            self._consumers -= 1
+            self._notify_space()
+
+
+# ----------------------------------------------------------------------
+# Session registry and module-level API (kept for existing callers)
+# ----------------------------------------------------------------------
+_event_buses: Dict[str, EventBus] = {}
+_registry_lock = threading.Lock()
+_current_bus: ContextVar[Optional[EventBus]] = ContextVar("current_event_bus", default=None)
+
+
+def get_event_bus(session_id: str = DEFAULT_SESSION_ID, **kwargs) -> EventBus:
+    """Return the bus for a session, creating it on first use."""
+    with _registry_lock:
+        bus = _event_buses.get(session_id)
+        if bus is None:
+            bus = EventBus(session_id=session_id, **kwargs)
+            _event_buses[session_id] = bus
+        return bus
+
+
+def remove_event_bus(session_id: str) -> None:
+    """Drop a session's bus once its stream has finished."""
+    with _registry_lock:
+        _event_buses.pop(session_id, None)
+
+
+def use_event_bus(bus: EventBus):
+    """Make `bus` the target of put_event() in the current context. Returns a reset token."""
+    return _current_bus.set(bus)
+
+
+def reset_event_bus(token) -> None:
+    _current_bus.reset(token)
+
+
+def current_event_bus() -> EventBus:
+    """Bus of the current context, or the default session's bus."""
+    bus = _current_bus.get()
+    return bus if bus is not None else get_event_bus(DEFAULT_SESSION_ID)
+
 
 def put_event(event: Dict[str, Any]) -> None:
-    """Add an event to the global queue"""
-    with _queue_lock:
-        _global_event_queue.append(event)
+    """Add an event to the current session's bus"""
+    current_event_bus().put_event(event)
+
+
+async def put_event_async(event: Dict[str, Any]) -> None:
+    """Add an event to the current session's bus, honouring block backpressure"""
+    await current_event_bus().put_event_async(event)
+
 
 def get_event() -> Optional[Dict[str, Any]]:
-    """Get an event from the global queue (non-blocking)"""
-    with _queue_lock:
-        if _global_event_queue:
-            return _global_event_queue.popleft()
-        return None
+    """Get an event from the current session's bus (non-blocking)"""
+    return current_event_bus().get_event()
+
 
 def has_events() -> bool:
-    """Check if there are events in the queue"""
-    with _queue_lock:
-        return len(_global_event_queue) > 0
+    """Check if there are events in the current session's bus"""
+    return current_event_bus().has_events()
+
 
 def clear_queue() -> None:
-    """Clear all events from the queue"""
-    with _queue_lock:
-        _global_event_queue.clear()
\ No newline at end of file
+    """Clear all events from the current session's bus"""
+    current_event_bus().clear()
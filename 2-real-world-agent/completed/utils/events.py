@@ -0,0 +1,172 @@
+"""
+Slotted records for the events produced by strands_utils._convert_to_agentcore_event.
+
+One record is built per streamed token, so the per-event cost matters: a record is a single
+allocation holding only its own fields, the timestamp is time.monotonic() (converted to an
+ISO string only when somebody asks for it) and `source` is resolved lazily.
+
+Consumers keep using the dict API - event.get("event_type"), event["data"] - and the dict
+form is produced only at the boundary (to_dict(), e.g. when server.py serializes SSE frames).
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+# Wall-clock anchor for turning monotonic timestamps into ISO strings
+_WALL_ANCHOR = time.time()
+_MONO_ANCHOR = time.monotonic()
+
+_MISSING = object()
+
+
+class AgentEvent:
+    """Base record: common header fields plus the per-type FIELDS declared by subclasses."""
+
+    __slots__ = ("created", "session_id", "agent_name", "_source")
+
+    TYPE = ""
+    EVENT_TYPE = ""
+    FIELDS = ()
+
+    def __init__(self, session_id, agent_name, source=None):
+        self.created = time.monotonic()
+        self.session_id = session_id
+        self.agent_name = agent_name
+        self._source = source
+
+    @property
+    def source(self) -> str:
+        return self._source or f"{self.agent_name}_node"
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(_WALL_ANCHOR + (self.created - _MONO_ANCHOR)).isoformat()
+
+    def _lookup(self, key: str):
+        if key == "event_type":
+            return self.EVENT_TYPE
+        if key == "type":
+            return self.TYPE
+        if key in ("timestamp", "session_id", "agent_name", "source") or key in self.FIELDS:
+            return getattr(self, key)
+        return _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def keys(self):
+        return ("timestamp", "session_id", "agent_name", "source", "type", "event_type") + self.FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict in the original AgentCore event layout."""
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class TextChunkEvent(AgentEvent):
+    __slots__ = ("data",)
+    TYPE, EVENT_TYPE, FIELDS = "agent_text_stream", "text_chunk", ("data", "chunk_size")
+
+    def __init__(self, session_id, agent_name, source, data):
+        super().__init__(session_id, agent_name, source)
+        self.data = data
+
+    @property
+    def chunk_size(self) -> int:
+        return len(self.data)
+
+    def merged(self, other: "TextChunkEvent") -> "TextChunkEvent":
+        """New chunk with this chunk's text followed by `other`'s (keeps this creation time)."""
+        event = TextChunkEvent(self.session_id, self.agent_name, self._source, self.data + other.get("data", ""))
+        event.created = self.created
+        return event
+
+
+class ToolUseDeltaEvent(AgentEvent):
+    """Only the new part of a tool's streamed input (not the accumulated input)."""
+    __slots__ = ("tool_name", "tool_id", "input_delta")
+    TYPE, EVENT_TYPE, FIELDS = "agent_tool_stream", "tool_use_delta", ("tool_name", "tool_id", "input_delta")
+
+    def __init__(self, session_id, agent_name, source, tool_name, tool_id, input_delta):
+        super().__init__(session_id, agent_name, source)
+        self.tool_name = tool_name
+        self.tool_id = tool_id
+        self.input_delta = input_delta
+
+
+class ToolUseEvent(AgentEvent):
+    """One per tool call, with the complete input, once the model has finished streaming it."""
+    __slots__ = ("tool_name", "tool_id", "tool_input")
+    TYPE, EVENT_TYPE, FIELDS = "agent_tool_stream", "tool_use", ("tool_name", "tool_id", "tool_input")
+
+    def __init__(self, session_id, agent_name, source, tool_name, tool_id, tool_input):
+        super().__init__(session_id, agent_name, source)
+        self.tool_name = tool_name
+        self.tool_id = tool_id
+        self.tool_input = tool_input
+
+
+class ToolResultEvent(AgentEvent):
+    __slots__ = ("tool_name", "tool_id", "output")
+    TYPE, EVENT_TYPE, FIELDS = "agent_tool_stream", "tool_result", ("tool_name", "tool_id", "output")
+
+    def __init__(self, session_id, agent_name, source, tool_name, tool_id, output):
+        super().__init__(session_id, agent_name, source)
+        self.tool_name = tool_name
+        self.tool_id = tool_id
+        self.output = output
+
+
+class ToolOutputEvent(AgentEvent):
+    """stdout/stderr lines of a running execution tool (see utils/output_stream.py)."""
+    __slots__ = ("tool_name", "stream", "data")
+    TYPE, EVENT_TYPE, FIELDS = "agent_tool_stream", "tool_output", ("tool_name", "stream", "data")
+
+    def __init__(self, session_id, agent_name, source, tool_name, stream, data):
+        super().__init__(session_id, agent_name, source)
+        self.tool_name = tool_name
+        self.stream = stream
+        self.data = data
+
+
+class ReasoningEvent(AgentEvent):
+    __slots__ = ("reasoning_text",)
+    TYPE, EVENT_TYPE, FIELDS = "agent_reasoning_stream", "reasoning", ("reasoning_text",)
+
+    def __init__(self, session_id, agent_name, source, reasoning_text):
+        super().__init__(session_id, agent_name, source)
+        self.reasoning_text = reasoning_text
+
+
+class UsageEvent(AgentEvent):
+    __slots__ = ("model_id", "input_tokens", "output_tokens", "total_tokens",
+                 "cache_read_input_tokens", "cache_write_input_tokens")
+    TYPE, EVENT_TYPE = "agent_usage_stream", "usage_metadata"
+    FIELDS = ("model_id", "input_tokens", "output_tokens", "total_tokens", "cache_read_input_tokens", "cache_write_input_tokens")
+
+    def __init__(self, session_id, agent_name, source, usage, model_id="unknown"):
+        super().__init__(session_id, agent_name, source)
+        self.model_id = model_id
+        self.input_tokens = usage.get("inputTokens", 0)
+        self.output_tokens = usage.get("outputTokens", 0)
+        self.total_tokens = usage.get("totalTokens", 0)
+        self.cache_read_input_tokens = usage.get("cacheReadInputTokens", 0)
+        self.cache_write_input_tokens = usage.get("cacheWriteInputTokens", 0)
+
+
+def event_to_dict(event) -> Dict[str, Any]:
+    """Boundary conversion: records become dicts, dict events pass through."""
+    return event.to_dict() if isinstance(event, AgentEvent) else event
@@ -0,0 +1,183 @@
+"""
+Helpers for running independent plan steps concurrently.
+
+The planner annotates steps with `(depends_on: ...)`; parse_plan_steps() reads those
+annotations, dependency_layers() groups steps into waves that can run at the same time,
+and the artifact helpers let each concurrent step work in its own copy of `./artifacts/`
+before its outputs are merged back in step order.
+"""
+
+import os
+import re
+import json
+import shutil
+import logging
+from typing import Dict, List, Any, Iterable
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# "### 3. Coder: Channel breakdown (depends_on: 1, 2)"
+STEP_HEADER = re.compile(r"^###\s*(\d+)\.\s*([^:]+):\s*(.*)$")
+DEPENDS_ON = re.compile(r"\(\s*depends_on\s*:\s*([^)]*)\)", re.IGNORECASE)
+
+# Files every coder appends to; merged by concatenating each step's additions
+APPEND_ONLY_SUFFIXES = (".txt", ".md", ".log")
+CALCULATION_METADATA = "calculation_metadata.json"
+
+
+def parse_plan_steps(full_plan: str) -> List[Dict[str, Any]]:
+    """
+    Parse `### N. Agent: Title (depends_on: ...)` steps from a plan.
+
+    Steps without an annotation depend on the previous step, which keeps old plans sequential.
+
+    Returns:
+        [{"step", "agent", "title", "depends_on", "done"}] in plan order
+    """
+    steps = []
+    for line in full_plan.splitlines():
+        match = STEP_HEADER.match(line.strip())
+        if match:
+            number, agent, title = int(match.group(1)), match.group(2).strip(), match.group(3).strip()
+            annotation = DEPENDS_ON.search(title)
+            if annotation:
+                title = DEPENDS_ON.sub("", title).strip()
+                depends_on = [int(n) for n in re.findall(r"\d+", annotation.group(1))]
+            else:
+                depends_on = [steps[-1]["step"]] if steps else []
+            steps.append({"step": number, "agent": agent, "title": title, "depends_on": depends_on, "done": True})
+        elif steps and line.strip().startswith("- [ ]"):
+            steps[-1]["done"] = False
+    return steps
+
+
+def dependency_layers(tasks: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group tasks into waves: every task's dependencies are in earlier waves.
+
+    Dependencies on ids outside `tasks` are treated as already satisfied. Tasks inside a
+    wave are sorted by id so merges happen in a deterministic order.
+
+    Raises:
+        ValueError: if the dependencies contain a cycle
+    """
+    pending = {str(task["id"]): task for task in tasks}
+    done, layers = set(), []
+    while pending:
+        ready = [task for task_id, task in pending.items()
+                 if all(str(dep) in done or str(dep) not in pending for dep in task.get("depends_on") or [])]
+        if not ready:
+            raise ValueError(f"Circular dependency between tasks: {sorted(pending)}")
+        ready.sort(key=_task_order)
+        layers.append(ready)
+        for task in ready:
+            done.add(str(task["id"]))
+            del pending[str(task["id"])]
+    return layers
+
+
+def _task_order(task):
+    task_id = str(task["id"])
+    return (0, int(task_id), "") if task_id.isdigit() else (1, 0, task_id)
+
+
+def snapshot_artifacts(artifacts_dir: str) -> Dict[str, tuple]:
+    """Manifest of `{relative path: (size, mtime_ns)}` used to detect what a step changed."""
+    manifest = {}
+    for root, _, files in os.walk(artifacts_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            manifest[os.path.relpath(path, artifacts_dir)] = (stat.st_size, stat.st_mtime_ns)
+    return manifest
+
+
+def fork_artifacts(source_dir: str, target_dir: str) -> Dict[str, tuple]:
+    """Copy the current artifacts into a step's workspace and return the snapshot taken there."""
+    if os.path.isdir(source_dir):
+        shutil.copytree(source_dir, target_dir, dirs_exist_ok=True)
+    else:
+        os.makedirs(target_dir, exist_ok=True)
+    return snapshot_artifacts(target_dir)
+
+
+def merge_artifacts(target_dir: str, forks: List[Dict[str, Any]]) -> List[str]:
+    """
+    Merge files written by concurrent steps back into `target_dir`, in the given order.
+
+    Args:
+        target_dir: The parent session's artifacts directory
+        forks: [{"id", "artifacts_dir", "snapshot"}] sorted by step id
+
+    Rules:
+        - append-only text files (all_results.txt, ...): each step's additions are appended
+        - calculation_metadata.json: calculation lists are concatenated, colliding ids are
+          prefixed with the step id
+        - any other new/changed file is copied; if an earlier step in the same wave already
+          wrote that path, the later one is saved as `<name>_step<id><ext>`
+
+    Returns:
+        Relative paths written into target_dir
+    """
+    written, claimed = [], set()
+    for fork in forks:
+        fork_dir, snapshot = fork["artifacts_dir"], fork["snapshot"]
+        for rel_path, state in sorted(snapshot_artifacts(fork_dir).items()):
+            if snapshot.get(rel_path) == state:
+                continue  # untouched copy of a parent file
+            source, target = os.path.join(fork_dir, rel_path), os.path.join(target_dir, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            if os.path.basename(rel_path) == CALCULATION_METADATA:
+                _merge_calculation_metadata(source, target, fork["id"])
+            elif rel_path.endswith(APPEND_ONLY_SUFFIXES) and rel_path in snapshot:
+                _append_new_text(source, target, snapshot[rel_path][0])
+            elif rel_path.endswith(APPEND_ONLY_SUFFIXES) and rel_path in claimed:
+                _append_new_text(source, target, 0)
+            else:
+                if rel_path in claimed:
+                    stem, ext = os.path.splitext(rel_path)
+                    rel_path = f"{stem}_step{fork['id']}{ext}"
+                    target = os.path.join(target_dir, rel_path)
+                    logger.info(f"Artifact conflict: step {fork['id']} output saved as {rel_path}")
+                shutil.copy2(source, target)
+            claimed.add(rel_path)
+            written.append(rel_path)
+    return written
+
+
+def _append_new_text(source: str, target: str, offset: int) -> None:
+    with open(source, "rb") as f:
+        f.seek(offset)
+        added = f.read()
+    with open(target, "ab") as f:
+        f.write(added)
+
+
+def _load_calculations(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # Both the list format and the {"calculations": [...]} format are in use
+    return data if isinstance(data, list) else data.get("calculations", [])
+
+
+def _merge_calculation_metadata(source: str, target: str, step_id) -> None:
+    merged = _load_calculations(target)
+    seen = {(calc.get("id"), json.dumps(calc, sort_keys=True, default=str)) for calc in merged}
+    ids = {calc.get("id") for calc in merged}
+    for calc in _load_calculations(source):
+        if (calc.get("id"), json.dumps(calc, sort_keys=True, default=str)) in seen:
+            continue  # inherited from the parent snapshot
+        if calc.get("id") in ids:
+            calc = {**calc, "id": f"step{step_id}_{calc.get('id')}"}
+        ids.add(calc.get("id"))
+        merged.append(calc)
+
+    with open(source, encoding="utf-8") as f:
+        data = json.load(f)
+    generated_at = data.get("generated_at") if isinstance(data, dict) else None
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": generated_at, "calculations": merged}, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,250 @@
+"""
+Pool of pre-warmed, per-session Python worker interpreters.
+
+python_repl_tool and write_and_execute_tool used to start a fresh `sys.executable`
+for every snippet, re-importing pandas/matplotlib/seaborn/docx each time. A kernel is a
+long-lived worker (utils/kernel_worker.py) that imports those once. Script files run in
+fresh globals each time; REPL snippets (persistent=True) keep theirs between calls. Each
+session gets its own kernel; idle kernels are started ahead of time.
+
+run_python() returns a subprocess.CompletedProcess and raises subprocess.TimeoutExpired,
+so callers handle it exactly like subprocess.run(). Kernels that time out or crash are
+killed and replaced on the next call. Output lines can be observed while the code runs
+(on_output); the returned stdout/stderr hold a bounded tail (utils/output_stream.py).
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from utils.output_stream import OutputTail, stream_process
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+KERNEL_POOL_ENABLED = os.getenv("PYTHON_KERNEL_POOL", "true").lower() == "true"
+KERNEL_POOL_SIZE = int(os.getenv("KERNEL_POOL_SIZE", "2"))                 # idle pre-warmed kernels kept ready
+KERNEL_MEMORY_LIMIT_MB = int(os.getenv("KERNEL_MEMORY_LIMIT_MB", "0"))     # 0 = no limit
+KERNEL_STARTUP_TIMEOUT = int(os.getenv("KERNEL_STARTUP_TIMEOUT", "120"))
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(WORKER_PATH))
+
+_STDOUT, _STDERR = "stdout", "stderr"
+
+
+def script_env(**extra: str) -> Dict[str, str]:
+    """Environment for agent-run scripts: the project root is importable (utils.data_loader)."""
+    python_path = os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")]))
+    return {**os.environ, "PYTHONPATH": python_path, "PYTHONIOENCODING": "utf-8", **extra}
+
+
+class KernelCrashed(RuntimeError):
+    """The worker process exited while handling a request."""
+
+
+class PythonKernel:
+    """One worker interpreter plus the threads draining its stdout/stderr."""
+
+    def __init__(self, memory_limit_mb: int = KERNEL_MEMORY_LIMIT_MB):
+        self.token = f"\x1e__kernel_{uuid.uuid4().hex}__"
+        self.lock = threading.Lock()  # one request at a time
+        self.calls = 0
+        self._messages = queue.Queue()
+        self._ready = False
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", WORKER_PATH, self.token, str(memory_limit_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=script_env(MPLBACKEND="Agg"),
+        )
+        for name, stream in ((_STDOUT, self.process.stdout), (_STDERR, self.process.stderr)):
+            threading.Thread(target=self._drain, args=(name, stream), daemon=True).start()
+
+    def _drain(self, name, stream):
+        """Split a worker stream into user output and end-of-request markers."""
+        for raw in iter(stream.readline, b""):
+            line = raw.decode("utf-8", errors="replace")
+            idx = line.find(self.token)
+            if idx < 0:
+                self._messages.put((name, "line", line))
+                continue
+            if idx > 0:
+                self._messages.put((name, "line", line[:idx]))
+            self._messages.put((name, "done", json.loads(line[idx + len(self.token):])))
+        self._messages.put((name, "eof", None))
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _collect(self, timeout: Optional[float], on_output: Optional[Callable[[str, str], None]] = None):
+        """Gather output until both streams reported the end of the current request."""
+        output = {_STDOUT: OutputTail(), _STDERR: OutputTail()}
+        status, pending = {}, {_STDOUT, _STDERR}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired("python kernel", timeout, output[_STDOUT].text(), output[_STDERR].text())
+            try:
+                name, kind, payload = self._messages.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if kind == "line":
+                output[name].append(payload)
+                if on_output: on_output(name, payload)
+            elif kind == "done":
+                status = payload
+                pending.discard(name)
+            else:
+                raise KernelCrashed(output[_STDERR].text() or f"kernel exited with code {self.process.wait()}")
+        return status, output[_STDOUT].text(), output[_STDERR].text()
+
+    def run(self, code: str, path: Optional[str] = None, cwd: str = ".", timeout: Optional[float] = None,
+            on_output: Optional[Callable[[str, str], None]] = None, persistent: bool = False) -> subprocess.CompletedProcess:
+        if not self._ready:
+            self._collect(KERNEL_STARTUP_TIMEOUT)  # wait for the pre-warm imports to finish
+            self._ready = True
+        request = {"code": code, "path": path, "cwd": os.path.abspath(cwd), "persistent": persistent}
+        self.process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+        self.process.stdin.flush()
+        self.calls += 1
+        status, stdout, stderr = self._collect(timeout, on_output)
+        return subprocess.CompletedProcess(path or "<kernel>", status.get("exit_code", 1), stdout, stderr)
+
+    def kill(self) -> None:
+        if self.is_alive():
+            self.process.kill()
+            self.process.wait()
+
+
+class KernelPool:
+    """Hands out one kernel per session and keeps `size` idle kernels warming up."""
+
+    def __init__(self, size: int = KERNEL_POOL_SIZE, memory_limit_mb: int = KERNEL_MEMORY_LIMIT_MB):
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self._lock = threading.Lock()
+        self._idle: List[PythonKernel] = []
+        self._sessions: Dict[str, PythonKernel] = {}
+        self._stats = {"calls": 0, "started": 0, "restarts": 0, "timeouts": 0, "fallbacks": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _spawn(self) -> PythonKernel:
+        # Called with self._lock held
+        self._stats["started"] += 1
+        return PythonKernel(self.memory_limit_mb)
+
+    def warm_up(self) -> None:
+        """Start idle kernels so the first tool call does not pay the import cost."""
+        with self._lock:
+            self._idle = [kernel for kernel in self._idle if kernel.is_alive()]
+            while len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def acquire(self, session_id: str) -> PythonKernel:
+        """Kernel bound to `session_id`, taking a warm idle one on first use."""
+        with self._lock:
+            kernel = self._sessions.get(session_id)
+            if kernel is None or not kernel.is_alive():
+                if kernel is not None:
+                    self._stats["restarts"] += 1
+                kernel = None
+                while self._idle and kernel is None:
+                    candidate = self._idle.pop(0)
+                    kernel = candidate if candidate.is_alive() else None
+                self._sessions[session_id] = kernel or self._spawn()
+                kernel = self._sessions[session_id]
+        self.warm_up()
+        return kernel
+
+    def _discard(self, session_id: str, kernel: PythonKernel) -> None:
+        kernel.kill()
+        with self._lock:
+            if self._sessions.get(session_id) is kernel:
+                del self._sessions[session_id]
+
+    def run(self, session_id: str, code: str, path: Optional[str] = None, cwd: str = ".", timeout: Optional[float] = None,
+            on_output: Optional[Callable[[str, str], None]] = None, persistent: bool = False) -> subprocess.CompletedProcess:
+        """Execute code in the session's kernel (or a one-shot interpreter if that kernel is busy)."""
+        self._count("calls")
+        kernel = self.acquire(session_id)
+        if not kernel.lock.acquire(blocking=False):
+            # Concurrent tool calls in one session: do not queue behind the running one
+            self._count("fallbacks")
+            return _run_subprocess(code, path, cwd, timeout, on_output)
+        try:
+            return kernel.run(code, path=path, cwd=cwd, timeout=timeout, on_output=on_output, persistent=persistent)
+        except subprocess.TimeoutExpired:
+            self._count("timeouts")
+            self._discard(session_id, kernel)
+            raise
+        except KernelCrashed as e:
+            self._count("restarts")
+            self._discard(session_id, kernel)
+            logger.warning(f"Python kernel for session {session_id} crashed; it will be restarted on the next call")
+            return subprocess.CompletedProcess(path or "<kernel>", kernel.process.returncode or 1, "", f"Kernel crashed: {e}")
+        finally:
+            kernel.lock.release()
+
+    def release(self, session_id: str) -> None:
+        """Stop the kernel owned by a finished session."""
+        with self._lock:
+            kernel = self._sessions.pop(session_id, None)
+        if kernel is not None:
+            kernel.kill()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            kernels = self._idle + list(self._sessions.values())
+            self._idle, self._sessions = [], {}
+        for kernel in kernels:
+            kernel.kill()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "idle": len(self._idle), "sessions": len(self._sessions)}
+
+
+def _run_subprocess(code: str, path: Optional[str], cwd: str, timeout: Optional[float],
+                    on_output: Optional[Callable[[str, str], None]] = None) -> subprocess.CompletedProcess:
+    """Fresh-interpreter execution (pool disabled or kernel busy)."""
+    args = [sys.executable, "-u", path] if path else [sys.executable, "-u", "-c", code]
+    return stream_process(args, cwd=cwd, timeout=timeout, on_output=on_output, env=script_env())
+
+
+kernel_pool = KernelPool()
+atexit.register(kernel_pool.shutdown)
+
+
+def run_python(code: str, path: Optional[str] = None, cwd: str = ".", timeout: Optional[float] = None,
+               session_id: str = "default", on_output: Optional[Callable[[str, str], None]] = None,
+               persistent: bool = False) -> subprocess.CompletedProcess:
+    """
+    Run Python code for a session, in its warm kernel when the pool is enabled.
+
+    Args:
+        code: Source to execute
+        path: Script path (relative to cwd) the code was written to, used for __file__ and sys.path[0]
+        cwd: Working directory for the execution
+        timeout: Seconds before the run is aborted with subprocess.TimeoutExpired
+        session_id: Kernel owner
+        on_output: Called as on_output(stream, line) for every stdout/stderr line while the code runs
+        persistent: Run in the session's shared globals (REPL) instead of fresh ones (scripts)
+    """
+    if not KERNEL_POOL_ENABLED:
+        return _run_subprocess(code, path, cwd, timeout, on_output)
+    return kernel_pool.run(session_id, code, path=path, cwd=cwd, timeout=timeout, on_output=on_output,
+                           persistent=persistent)
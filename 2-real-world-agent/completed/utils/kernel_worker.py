@@ -0,0 +1,118 @@
+"""
+Worker interpreter for utils/kernel_pool.py. Run as a standalone script (never imported).
+
+Protocol:
+    - Requests arrive on stdin, one JSON object per line: {"code", "path", "cwd", "persistent"}
+    - User output goes to the real stdout/stderr pipes
+    - After each request the worker writes `<token><json status>` as the last line on
+      both stdout and stderr, so the parent knows the output of that request is complete
+
+Requests marked persistent (python_repl_tool) share globals, like a notebook kernel; every
+other request (script files) runs in fresh globals, as in a new interpreter.
+"""
+import os
+import io
+import sys
+import json
+import traceback
+
+TOKEN = sys.argv[1]
+MEMORY_LIMIT_MB = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+# Heavy libraries every analysis script imports - paid once per worker instead of once per script
+PREWARM_MODULES = ["numpy", "pandas", "matplotlib", "matplotlib.pyplot", "seaborn", "docx"]
+
+
+def _apply_memory_limit():
+    if MEMORY_LIMIT_MB <= 0:
+        return
+    try:
+        import resource
+        limit = MEMORY_LIMIT_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _prewarm():
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for name in PREWARM_MODULES:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+
+
+def _finish(status):
+    """Flush user output, then mark the end of this request on both streams."""
+    line = TOKEN + json.dumps(status) + "\n"
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    sys.__stdout__.write(line)
+    sys.__stdout__.flush()
+    sys.__stderr__.write(line)
+    sys.__stderr__.flush()
+
+
+def _forget_local_modules(root):
+    """Drop modules imported from the workdir so edited helper files are re-imported (as in a fresh process)."""
+    root = os.path.abspath(root)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.abspath(path).startswith(root + os.sep) and "site-packages" not in path:
+            sys.modules.pop(name, None)
+
+
+def _reset_plots():
+    module = sys.modules.get("matplotlib.pyplot")
+    if module is not None:
+        try:
+            module.close("all")
+        except Exception:
+            pass
+
+
+def main():
+    _apply_memory_limit()
+    _prewarm()
+
+    # Keep the protocol channel for ourselves; user code sees an empty stdin
+    requests = io.TextIOWrapper(os.fdopen(os.dup(0), "rb"), encoding="utf-8")
+    sys.stdin = open(os.devnull)
+
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    base_path = list(sys.path[1:])  # drop this script's directory
+    _finish({"ready": True})
+
+    for raw in requests:
+        if not raw.strip():
+            continue
+        request = json.loads(raw)
+        cwd = request.get("cwd") or "."
+        path = request.get("path") or "<kernel>"
+        exit_code = 0
+        try:
+            os.chdir(cwd)
+            _forget_local_modules(os.getcwd())
+            sys.path[:] = [os.path.dirname(os.path.abspath(path))] + base_path if request.get("path") else [""] + base_path
+            scope = namespace if request.get("persistent") else {"__name__": "__main__", "__builtins__": __builtins__}
+            scope["__file__"] = path
+            sys.argv = [path]
+            exec(compile(request["code"], path, "exec"), scope)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if e.code is not None and not isinstance(e.code, int):
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            exit_code = 1
+            traceback.print_exc()
+        finally:
+            _reset_plots()
+        _finish({"exit_code": exit_code})
+
+
+if __name__ == "__main__":
+    main()
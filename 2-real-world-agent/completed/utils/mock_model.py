@@ -0,0 +1,299 @@
+"""
+Offline stand-in for BedrockModel: replays scripted or recorded conversations.
+
+strands_utils.get_model returns a MockBedrockModel when a script is active, so build_graph(),
+the graph nodes and the agent tools run end to end without Bedrock (tests, profiling,
+benchmarks/). The mock emits the same Converse stream events as Bedrock - text deltas,
+reasoning deltas, tool_use blocks and usage metadata - paced at a configurable token rate.
+
+Script format (JSON, or the same structure as a dict):
+
+    {
+      "agents": {
+        "coordinator": [                       # one entry per get_agent() call, in order
+          [                                    # one conversation = the turns of that agent
+            {"text": "handoff_to_planner: ..."}
+          ]
+        ],
+        "supervisor": [
+          [
+            {"reasoning": "...", "text": "Tool calling → Coder",
+             "tool_use": [{"name": "coder_agent_tool", "input": {"task": "..."}}]},
+            {"text": "All tasks completed.", "usage": {"inputTokens": 1200, "outputTokens": 40}}
+          ]
+        ]
+      }
+    }
+
+Each model call consumes the next turn of its conversation; a turn with tool_use ends with
+stopReason "tool_use", so the agent runs the tools and calls the model again. Missing usage
+is estimated from the prompt/response size.
+
+Environment:
+    MOCK_BEDROCK_SCRIPT             Script to replay (enables the mock)
+    MOCK_BEDROCK_RECORD             Record real Bedrock conversations into this script file
+    MOCK_BEDROCK_TOKENS_PER_SECOND  Output pacing, 0 = as fast as possible (default)
+    MOCK_BEDROCK_FIRST_TOKEN_MS     Latency before the first event (default 0)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from strands.models.model import Model
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 4  # tokens per streamed delta
+DEFAULT_FINAL_TURN = {"text": "Done."}
+
+
+class MockScript:
+    """Per-agent queues of scripted conversations."""
+
+    def __init__(self, script: Dict[str, Any], tokens_per_second: float = 0.0, first_token_ms: float = 0.0):
+        self.agents: Dict[str, List[List[Dict[str, Any]]]] = script.get("agents", {})
+        self.tokens_per_second = tokens_per_second
+        self.first_token_ms = first_token_ms
+        self._lock = threading.Lock()
+        self._next_conversation: Dict[str, int] = {}
+        self._cached_prefixes: set = set()
+        self.stats = {"calls": 0, "output_tokens": 0, "exhausted": 0}
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "MockScript":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def next_conversation(self, agent_name: str) -> List[Dict[str, Any]]:
+        """Turns for the next agent instance named `agent_name` (deterministic in creation order)."""
+        with self._lock:
+            conversations = self.agents.get(agent_name, [])
+            index = self._next_conversation.get(agent_name, 0)
+            self._next_conversation[agent_name] = index + 1
+        if index < len(conversations):
+            return list(conversations[index])
+        # Fewer recorded conversations than agent calls: repeat the last one
+        self.stats["exhausted"] += 1
+        logger.warning(f"Mock script has no conversation #{index + 1} for '{agent_name}'")
+        return list(conversations[-1]) if conversations else [DEFAULT_FINAL_TURN]
+
+    def cache_usage(self, system_prompt_content) -> Dict[str, int]:
+        """Prompt-cache accounting like Bedrock's: the longest system prefix ending at a cachePoint
+        is read from cache if an earlier call wrote it, otherwise written."""
+        usage = {"cacheReadInputTokens": 0, "cacheWriteInputTokens": 0}
+        prefix, cached = "", None
+        for block in system_prompt_content or []:
+            if "cachePoint" in block:
+                cached = prefix
+            prefix += block.get("text", "")
+        if cached:
+            tokens = len(cached) // CHARS_PER_TOKEN
+            with self._lock:
+                hit = cached in self._cached_prefixes
+                self._cached_prefixes.add(cached)
+            usage["cacheReadInputTokens" if hit else "cacheWriteInputTokens"] = tokens
+        return usage
+
+
+class MockBedrockModel(Model):
+    """Strands Model replaying one scripted conversation."""
+
+    def __init__(self, agent_name: str, script: MockScript, model_id: str = "mock-bedrock", **model_config: Any):
+        self.agent_name = agent_name
+        self.script = script
+        self.turns = script.next_conversation(agent_name)
+        self.config = {"model_id": model_id, **model_config}
+        self._tool_counter = 0
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        turn = self._next_turn()
+        yield {"output": output_model(**turn.get("structured", {}))}
+
+    def _next_turn(self) -> Dict[str, Any]:
+        # The last turn repeats if the agent calls the model more often than scripted
+        return self.turns.pop(0) if len(self.turns) > 1 else self.turns[0]
+
+    async def _pace(self, tokens: int) -> None:
+        if self.script.tokens_per_second > 0:
+            await asyncio.sleep(tokens / self.script.tokens_per_second)
+
+    async def _stream_deltas(self, text: str, delta_key: str):
+        size = CHUNK_TOKENS * CHARS_PER_TOKEN
+        for start in range(0, len(text), size):
+            chunk = text[start:start + size]
+            await self._pace(CHUNK_TOKENS)
+            if delta_key == "reasoningContent":
+                yield {"contentBlockDelta": {"delta": {"reasoningContent": {"text": chunk}}}}
+            else:
+                yield {"contentBlockDelta": {"delta": {"text": chunk}}}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, *, tool_choice=None,
+                     system_prompt_content=None, **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        started = time.monotonic()
+        turn = self._next_turn()
+        self.script.stats["calls"] += 1
+        if self.script.first_token_ms:
+            await asyncio.sleep(self.script.first_token_ms / 1000)
+
+        yield {"messageStart": {"role": "assistant"}}
+
+        if turn.get("reasoning"):
+            async for event in self._stream_deltas(turn["reasoning"], "reasoningContent"):
+                yield event
+            yield {"contentBlockDelta": {"delta": {"reasoningContent": {"signature": "mock-signature"}}}}
+            yield {"contentBlockStop": {}}
+
+        if turn.get("text"):
+            async for event in self._stream_deltas(turn["text"], "text"):
+                yield event
+            yield {"contentBlockStop": {}}
+
+        for tool_use in turn.get("tool_use", []):
+            self._tool_counter += 1
+            tool_use_id = tool_use.get("toolUseId") or f"tooluse_{self.agent_name}_{id(self):x}_{self._tool_counter}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": tool_use["name"]}}}}
+            # Tool input arrives in partial-JSON deltas like Bedrock's
+            payload = json.dumps(tool_use.get("input", {}), ensure_ascii=False)
+            size = CHUNK_TOKENS * CHARS_PER_TOKEN
+            for start in range(0, len(payload), size):
+                await self._pace(CHUNK_TOKENS)
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": payload[start:start + size]}}}}
+            yield {"contentBlockStop": {}}
+
+        yield {"messageStop": {"stopReason": "tool_use" if turn.get("tool_use") else "end_turn"}}
+
+        output_chars = len(turn.get("text", "")) + len(turn.get("reasoning", "")) + \
+            sum(len(json.dumps(t.get("input", {}), ensure_ascii=False)) for t in turn.get("tool_use", []))
+        prompt_chars = len(json.dumps(messages, ensure_ascii=False, default=str)) + len(system_prompt or "")
+        cache = self.script.cache_usage(system_prompt_content)
+        usage = {
+            "inputTokens": max(0, prompt_chars // CHARS_PER_TOKEN - cache["cacheReadInputTokens"] - cache["cacheWriteInputTokens"]),
+            "outputTokens": max(1, output_chars // CHARS_PER_TOKEN),
+            **cache,
+            **turn.get("usage", {}),
+        }
+        usage["totalTokens"] = usage["inputTokens"] + usage["outputTokens"]
+        self.script.stats["output_tokens"] += usage["outputTokens"]
+        yield {"metadata": {"usage": usage, "metrics": {"latencyMs": int((time.monotonic() - started) * 1000)}}}
+
+
+class ScriptRecorder:
+    """Collects real model conversations into the mock script format."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.agents: Dict[str, List[List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def new_conversation(self, agent_name: str) -> List[Dict[str, Any]]:
+        conversation: List[Dict[str, Any]] = []
+        with self._lock:
+            self.agents.setdefault(agent_name, []).append(conversation)
+        return conversation
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps({"agents": self.agents}, ensure_ascii=False, indent=2)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+
+class RecordingModel(Model):
+    """Passes a real model's stream through unchanged and records each turn."""
+
+    def __init__(self, model: Model, agent_name: str, recorder: ScriptRecorder):
+        self.model = model
+        self.recorder = recorder
+        self.conversation = recorder.new_conversation(agent_name)
+
+    @property
+    def config(self):
+        return self.model.config
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        turn: Dict[str, Any] = {}
+        tool_uses: List[Dict[str, Any]] = []
+        async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            if "contentBlockStart" in event and "toolUse" in event["contentBlockStart"].get("start", {}):
+                start = event["contentBlockStart"]["start"]["toolUse"]
+                tool_uses.append({"name": start["name"], "input": ""})
+            elif "contentBlockDelta" in event:
+                delta = event["contentBlockDelta"]["delta"]
+                if "text" in delta:
+                    turn["text"] = turn.get("text", "") + delta["text"]
+                elif "text" in delta.get("reasoningContent", {}):
+                    turn["reasoning"] = turn.get("reasoning", "") + delta["reasoningContent"]["text"]
+                elif "toolUse" in delta and tool_uses:
+                    tool_uses[-1]["input"] += delta["toolUse"]["input"]
+            elif "metadata" in event:
+                turn["usage"] = event["metadata"].get("usage", {})
+            yield event
+
+        for tool_use in tool_uses:
+            tool_use["input"] = json.loads(tool_use["input"] or "{}")
+        if tool_uses:
+            turn["tool_use"] = tool_uses
+        self.conversation.append(turn)
+        self.recorder.save()
+
+
+_active_script: Optional[MockScript] = None
+_recorder: Optional[ScriptRecorder] = None
+
+
+def use_mock_script(script, tokens_per_second: float = 0.0, first_token_ms: float = 0.0) -> MockScript:
+    """Activate a script (dict or path) for every subsequent get_model call; None deactivates."""
+    global _active_script
+    if script is None:
+        _active_script = None
+    elif isinstance(script, MockScript):
+        _active_script = script
+    elif isinstance(script, dict):
+        _active_script = MockScript(script, tokens_per_second, first_token_ms)
+    else:
+        _active_script = MockScript.load(script, tokens_per_second=tokens_per_second, first_token_ms=first_token_ms)
+    return _active_script
+
+
+def active_mock_model(agent_name: str, model_id: str) -> Optional[MockBedrockModel]:
+    """A MockBedrockModel if a script is active (programmatically or via MOCK_BEDROCK_SCRIPT)."""
+    if _active_script is None and os.getenv("MOCK_BEDROCK_SCRIPT"):
+        use_mock_script(os.getenv("MOCK_BEDROCK_SCRIPT"),
+                        tokens_per_second=float(os.getenv("MOCK_BEDROCK_TOKENS_PER_SECOND", "0")),
+                        first_token_ms=float(os.getenv("MOCK_BEDROCK_FIRST_TOKEN_MS", "0")))
+    if _active_script is None:
+        return None
+    return MockBedrockModel(agent_name, _active_script, model_id=model_id or "mock-bedrock")
+
+
+def maybe_record(model: Model, agent_name: str) -> Model:
+    """Wrap a real model in a RecordingModel when MOCK_BEDROCK_RECORD is set."""
+    global _recorder
+    path = os.getenv("MOCK_BEDROCK_RECORD")
+    if not path:
+        return model
+    if _recorder is None or _recorder.path != path:
+        _recorder = ScriptRecorder(path)
+    return RecordingModel(model, agent_name, _recorder)
@@ -0,0 +1,123 @@
+"""
+Process-wide pool of BedrockModel instances and bedrock-runtime clients.
+
+strands_utils.get_model used to build a new BedrockModel (and with it a boto3 session,
+client and connection pool) for every agent. The pool keeps one model per configuration
+and one client per (region, boto config), so agents created by the supervisor and the
+agent tools reuse warm HTTPS connections. Safe to use from tool threads.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Any, Tuple
+
+import boto3
+from botocore.config import Config
+from strands.models import BedrockModel
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Connections per shared client; concurrent sessions and sub-agents share these
+MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+# Same timeouts/retries get_model has always used
+DEFAULT_BOTO_CONFIG = {
+    "read_timeout": 900,
+    "connect_timeout": 900,
+    "retries": {"max_attempts": 50, "mode": "adaptive"},
+    "max_pool_connections": MAX_POOL_CONNECTIONS,
+}
+
+
+def _freeze(value):
+    """Turn nested dicts/lists into a hashable key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ModelPool:
+    """Keyed cache of BedrockModel instances sharing bedrock-runtime clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._models: Dict[Tuple, BedrockModel] = {}
+        self._clients: Dict[Tuple, Any] = {}
+        self._stats = {"hits": 0, "misses": 0, "clients_created": 0}
+
+    def _boto_session(self):
+        # boto3.Session is not thread-safe; only touched while holding the lock
+        if self._session is None:
+            self._session = boto3.Session()
+        return self._session
+
+    def get_model(self, model_id: str, enable_reasoning: bool, tool_cache: bool, streaming: bool = True,
+                  boto_config: Dict[str, Any] = None) -> BedrockModel:
+        """Return a pooled BedrockModel for this configuration, building it on first use."""
+        boto_config = boto_config or DEFAULT_BOTO_CONFIG
+        config_key = _freeze(boto_config)
+        key = (model_id, enable_reasoning, tool_cache, streaming, config_key)
+
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is not None:
+                self._stats["hits"] += 1
+                return llm
+            self._stats["misses"] += 1
+
+            ## BedrockModel params: https://strandsagents.com/latest/api-reference/models/?h=bedrockmodel#strands.models.bedrock.BedrockModel
+            # max_tokens: Claude 3.5/4 models support up to 8192 output tokens by default, extended to 64K for Sonnet
+            # Increased from 8192*5 (40,960) to 8192*8 (65,536) to prevent MaxTokensReachedException
+            llm = BedrockModel(
+                model_id=model_id,
+                streaming=streaming,
+                cache_tools="default" if tool_cache else None,
+                max_tokens=64000,
+                stop_sequences=["\n\nHuman"],
+                temperature=1 if enable_reasoning else 0.01,
+                additional_request_fields={
+                    "thinking": {
+                        "type": "enabled" if enable_reasoning else "disabled",
+                        **({"budget_tokens": 8192} if enable_reasoning else {}),
+                    }
+                },
+                boto_session=self._boto_session(),
+                boto_client_config=Config(**boto_config),
+            )
+
+            # Share one client (and its connection pool) per region + boto config
+            client_key = (llm.client.meta.region_name, config_key)
+            shared_client = self._clients.get(client_key)
+            if shared_client is None:
+                self._clients[client_key] = llm.client
+                self._stats["clients_created"] += 1
+            else:
+                llm.client = shared_client
+
+            self._models[key] = llm
+            logger.debug(f"Model pool miss: {model_id} (reasoning={enable_reasoning}, tool_cache={tool_cache})")
+            return llm
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus pool sizes."""
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "models": len(self._models),
+                "clients": len(self._clients),
+                "hit_rate": round(self._stats["hits"] / total, 3) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._clients.clear()
+
+
+model_pool = ModelPool()
@@ -0,0 +1,154 @@
+"""
+Incremental stdout/stderr handling for the execution tools.
+
+write_and_execute_tool and bash_tool used to return nothing until the process exited and then
+hand the complete output to the model. Output is now consumed line by line:
+
+    - OutputTail keeps a bounded tail of each stream for the tool result
+    - ToolOutputStreamer forwards lines to the session's event bus as `tool_output` events,
+      batched per flush interval, so long analyses show live progress
+    - stream_process() runs a command with both, in place of subprocess.run(capture_output=True)
+
+Environment:
+    TOOL_OUTPUT_TAIL_CHARS         Characters of each stream kept for the tool result (default 20000)
+    TOOL_OUTPUT_FLUSH_MS           Batching interval of streamed lines (default 100)
+    TOOL_OUTPUT_STREAM_MAX_CHARS   Output streamed per call before the rest is only counted (default 1000000)
+"""
+
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Optional
+
+from utils.events import ToolOutputEvent
+
+TOOL_OUTPUT_TAIL_CHARS = int(os.getenv("TOOL_OUTPUT_TAIL_CHARS", "20000"))
+TOOL_OUTPUT_FLUSH_MS = float(os.getenv("TOOL_OUTPUT_FLUSH_MS", "100"))
+TOOL_OUTPUT_STREAM_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_STREAM_MAX_CHARS", "1000000"))
+
+STDOUT, STDERR = "stdout", "stderr"
+
+
+class OutputTail:
+    """Ring buffer of the last `max_chars` characters of a stream, in whole lines."""
+
+    def __init__(self, max_chars: int = TOOL_OUTPUT_TAIL_CHARS):
+        self.max_chars = max_chars
+        self._lines = deque()
+        self._chars = 0
+        self.total_lines = 0
+        self.total_chars = 0
+        self.omitted_lines = 0
+
+    def append(self, line: str) -> None:
+        self._lines.append(line)
+        self._chars += len(line)
+        self.total_lines += 1
+        self.total_chars += len(line)
+        # Always keep the newest line, even if it alone exceeds the budget
+        while self._chars > self.max_chars and len(self._lines) > 1:
+            self._chars -= len(self._lines.popleft())
+            self.omitted_lines += 1
+
+    def text(self) -> str:
+        tail = "".join(self._lines)
+        if self.omitted_lines:
+            omitted_chars = self.total_chars - self._chars
+            return f"... [{self.omitted_lines:,} earlier lines ({omitted_chars:,} chars) omitted]\n{tail}"
+        return tail
+
+    def __bool__(self) -> bool:
+        return self.total_lines > 0
+
+
+class ToolOutputStreamer:
+    """Forwards a tool's output lines to the current session's event bus in batches.
+
+    Safe to call from tool threads; call close() when the process has finished.
+    """
+
+    def __init__(self, tool_name: str, flush_ms: float = TOOL_OUTPUT_FLUSH_MS,
+                 max_chars: int = TOOL_OUTPUT_STREAM_MAX_CHARS):
+        from utils.session import current_session
+        from utils.event_queue import current_event_bus
+
+        self.tool_name = tool_name
+        self.session_id = current_session().session_id
+        self.bus = current_event_bus()  # resolved now: reader threads do not carry the context
+        self.interval = flush_ms / 1000
+        self.max_chars = max_chars
+        self.streamed_chars = 0
+        self.suppressed_chars = 0
+        self._pending = {STDOUT: [], STDERR: []}
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def line(self, stream: str, line: str) -> None:
+        with self._lock:
+            if self.streamed_chars >= self.max_chars:
+                self.suppressed_chars += len(line)
+                return
+            self.streamed_chars += len(line)
+            self._pending[stream].append(line)
+            due = time.monotonic() - self._last_flush >= self.interval
+            if not due and self._timer is None:
+                # A line printed right before a long quiet stretch still shows up within one interval
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batches = [(stream, "".join(lines)) for stream, lines in self._pending.items() if lines]
+            self._pending = {STDOUT: [], STDERR: []}
+            self._last_flush = time.monotonic()
+        for stream, data in batches:
+            self.bus.put_event(ToolOutputEvent(self.session_id, self.tool_name, None, self.tool_name, stream, data))
+
+    def close(self) -> None:
+        if self.suppressed_chars:
+            with self._lock:
+                self._pending[STDERR].append(f"... [{self.suppressed_chars:,} more chars not streamed]\n")
+        self.flush()
+
+
+def stream_process(args, cwd: str = ".", timeout: Optional[float] = None, shell: bool = False,
+                   on_output: Optional[Callable[[str, str], None]] = None, env: Optional[dict] = None,
+                   tail_chars: int = TOOL_OUTPUT_TAIL_CHARS) -> subprocess.CompletedProcess:
+    """subprocess.run(capture_output=True, text=True) with line callbacks and bounded output.
+
+    stdout/stderr of the returned CompletedProcess (and of TimeoutExpired) are OutputTail texts.
+    """
+    process = subprocess.Popen(args, cwd=cwd, shell=shell, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, encoding="utf-8", errors="replace", bufsize=1)
+    tails = {STDOUT: OutputTail(tail_chars), STDERR: OutputTail(tail_chars)}
+
+    def drain(name, stream):
+        for line in iter(stream.readline, ""):
+            tails[name].append(line)
+            if on_output: on_output(name, line)
+        stream.close()
+
+    readers = [threading.Thread(target=drain, args=(name, stream), daemon=True)
+               for name, stream in ((STDOUT, process.stdout), (STDERR, process.stderr))]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        for reader in readers:
+            reader.join(timeout=1)
+        raise subprocess.TimeoutExpired(args, timeout, tails[STDOUT].text(), tails[STDERR].text())
+    for reader in readers:
+        reader.join()
+    return subprocess.CompletedProcess(args, returncode, tails[STDOUT].text(), tails[STDERR].text())
@@ -0,0 +1,169 @@
+"""
+Token budgets for tool results returned to the sub-agents.
+
+A `df.describe()` on a wide frame or a file_read of a CSV used to go back to the model
+verbatim, filling the context and triggering SummarizingConversationManager. Results over
+their tool's budget are shaped before the model sees them:
+
+    1. table compaction   long runs of table rows with the same shape (same number of tab, pipe
+                          or comma delimiters, or of whitespace-aligned columns) keep the
+                          header and a few rows from each end; prose is never compacted
+    2. head/tail sampling if still too long, the beginning and end of the output are kept
+    3. spill              the complete output is written to ./artifacts/tool_outputs/ and the
+                          model gets the path, so nothing is lost if it needs more (file_read
+                          results are not spilled: the file itself can be read by line range)
+
+Environment:
+    TOOL_RESULT_BUDGETS         JSON per-tool token budgets, e.g. {"bash_tool": 1500}
+    TOOL_RESULT_DEFAULT_BUDGET  Budget of tools not listed (default 4000 tokens, 0 = unlimited)
+    TOOL_RESULT_TABLE_ROWS      Rows kept at each end of a compacted table (default 8)
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+import functools
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.clues import estimate_tokens
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_BUDGETS = {
+    "write_and_execute_tool": 3000,
+    "python_repl_tool": 3000,
+    "bash_tool": 2000,
+    "file_read": 4000,
+}
+TOOL_RESULT_BUDGETS = {**DEFAULT_BUDGETS, **json.loads(os.getenv("TOOL_RESULT_BUDGETS", "{}"))}
+TOOL_RESULT_DEFAULT_BUDGET = int(os.getenv("TOOL_RESULT_DEFAULT_BUDGET", "4000"))
+TOOL_RESULT_TABLE_ROWS = int(os.getenv("TOOL_RESULT_TABLE_ROWS", "8"))
+TABLE_MIN_ROWS = 2 * TOOL_RESULT_TABLE_ROWS + 4
+HEAD_SHARE = 0.6  # of the sampled characters, the rest comes from the tail
+SPILL_DIR = os.path.join("artifacts", "tool_outputs")
+
+# CSV delimiters: a comma followed by a space is prose punctuation, not a cell boundary
+_CSV_COMMA = re.compile(r",(?! )")
+_ALIGNED = re.compile(r"\S {2,}\S")  # pandas-style column alignment
+
+stats = {"results": 0, "shaped": 0, "tables_compacted": 0, "chars_in": 0, "chars_out": 0, "spilled": 0}
+
+
+def budget_for(tool_name: str) -> int:
+    return TOOL_RESULT_BUDGETS.get(tool_name, TOOL_RESULT_DEFAULT_BUDGET)
+
+
+def _row_shape(line: str) -> Optional[tuple]:
+    """Delimiter and cell count of a table-like line, or None for anything else."""
+    for delimiter in ("\t", "|"):
+        if delimiter in line:
+            return delimiter, line.count(delimiter)
+    commas = len(_CSV_COMMA.findall(line))
+    if commas:
+        return ",", commas
+    if _ALIGNED.search(line):
+        return " ", len(line.split())
+    return None
+
+
+def compact_tables(text: str, keep: int = TOOL_RESULT_TABLE_ROWS) -> str:
+    """Shorten every run of at least TABLE_MIN_ROWS same-shaped table rows to header + `keep` rows per end."""
+    lines = text.split("\n")
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        shape = _row_shape(lines[i])
+        j = i + 1
+        while shape is not None and j < len(lines) and _row_shape(lines[j]) == shape:
+            j += 1
+        if shape is not None and j - i >= TABLE_MIN_ROWS:
+            rows = lines[i:j]
+            omitted = len(rows) - 1 - 2 * keep
+            out.extend(rows[:1 + keep])
+            out.append(f"... [{omitted:,} rows omitted] ...")
+            out.extend(rows[-keep:])
+            stats["tables_compacted"] += 1
+            i = j
+        else:
+            out.append(lines[i])
+            i += 1
+    return "\n".join(out)
+
+
+def sample_head_tail(text: str, max_chars: int) -> str:
+    """Beginning and end of `text` within `max_chars`, cut at line boundaries where possible."""
+    if len(text) <= max_chars:
+        return text
+    head_chars = int(max_chars * HEAD_SHARE)
+    tail_chars = max_chars - head_chars
+    head = text[:head_chars]
+    head = head[:head.rfind("\n") + 1] or head
+    tail = text[-tail_chars:]
+    tail = tail[tail.find("\n") + 1:] or tail
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n... [{omitted:,} chars omitted] ...\n{tail}"
+
+
+def _spill(tool_name: str, text: str) -> str:
+    """Write the complete output next to the session's artifacts; returns the ./-relative path."""
+    from utils.session import current_session
+
+    session = current_session()
+    relative = os.path.join(SPILL_DIR, f"{tool_name}_{uuid.uuid4().hex[:8]}.txt")
+    path = session.resolve_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    stats["spilled"] += 1
+    return "./" + relative
+
+
+def shape_text(tool_name: str, text: str, spill: bool = True) -> str:
+    """Fit one tool result into its tool's token budget."""
+    budget = budget_for(tool_name)
+    stats["results"] += 1
+    stats["chars_in"] += len(text)
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        stats["chars_out"] += len(text)
+        return text
+
+    shaped = compact_tables(text)
+    max_chars = budget * 3  # inverse of estimate_tokens
+    shaped = sample_head_tail(shaped, max_chars)
+    if not spill:
+        reference = f"Output shortened from {len(text):,} chars - use file_read with mode 'lines' and start_line/end_line for the omitted part."
+    else:
+        try:
+            reference = f"Full output ({len(text):,} chars) saved to {_spill(tool_name, text)} - read it with file_read only if the omitted part is needed."
+        except OSError as e:
+            reference = f"Full output ({len(text):,} chars) could not be saved: {e}"
+    shaped = f"{shaped}\n[{reference}]"
+
+    stats["shaped"] += 1
+    stats["chars_out"] += len(shaped)
+    logger.info(f"Tool result of {tool_name} shaped: {len(text):,} -> {len(shaped):,} chars (budget {budget} tokens)")
+    return shaped
+
+
+def shape_tool_result(tool_name: str, spill: bool = True, exempt: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Callable:
+    """Decorate a PythonAgentTool function so the text content of its ToolResult is budgeted.
+
+    `exempt(tool_use)` returning True passes that call's result through unshaped.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(tool, **kwargs: Any) -> Dict[str, Any]:
+            result = func(tool, **kwargs)
+            content = result.get("content") if isinstance(result, dict) else None
+            if content and not (exempt and exempt(tool)):
+                result["content"] = [{**item, "text": shape_text(tool_name, item["text"], spill)} if "text" in item else item
+                                     for item in content]
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,167 @@
+"""
+Session-scoped state for graph executions.
+
+Each research request runs inside its own GraphSession. Nodes and agent tools read the
+active session from a contextvar, so one process can run many workflows concurrently
+without sharing `messages`, `full_plan`, `clues` or `history` between them.
+
+Environment:
+    SESSIONS_ROOT        Where isolated session workspaces are created (default ./sessions)
+    SESSIONS_MAX_KEPT    Finished workspaces kept by prune_sessions (default 50)
+    SESSIONS_TTL_HOURS   Finished workspaces older than this are removed (default 24)
+"""
+
+import os
+import time
+import uuid
+import shutil
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Sequence
+
+from utils.kernel_pool import kernel_pool
+from utils.tool_use_map import ToolUseMap
+from utils.event_queue import EventBus, get_event_bus, remove_event_bus, use_event_bus, reset_event_bus, DEFAULT_SESSION_ID
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SESSIONS_ROOT = os.getenv("SESSIONS_ROOT", "./sessions")
+SESSIONS_MAX_KEPT = int(os.getenv("SESSIONS_MAX_KEPT", "50"))
+SESSIONS_TTL_HOURS = float(os.getenv("SESSIONS_TTL_HOURS", "24"))
+
+
+class GraphSession:
+    """State shared by the nodes and agent tools of one graph execution.
+
+    Args:
+        session_id: Identifier used for event tagging and the workspace name (random if omitted)
+        event_bus: Event bus for this session (created on demand if omitted)
+        workdir: Directory tools execute in; agents write to `<workdir>/artifacts/`
+        interactive: Whether nodes may prompt on stdin (plan review). Servers run non-interactive.
+        checkpointed: Whether the run writes checkpoints for --resume (utils/checkpoint.py)
+    """
+
+    def __init__(self, session_id: Optional[str] = None, event_bus: Optional[EventBus] = None,
+                 workdir: str = ".", interactive: bool = True, checkpointed: bool = True):
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.shared: Dict[str, Any] = {}
+        self.event_bus = event_bus or get_event_bus(self.session_id)
+        self.workdir = workdir
+        self.interactive = interactive
+        self.checkpointed = checkpointed
+        self.node_timings: List[Dict[str, Any]] = []  # [{"node", "elapsed", "cached", "execution"}] appended by DagGraph
+        self.node_memo: Dict[str, Dict[str, Any]] = {}  # input hash -> {"response", "outputs"} of memoized nodes
+        self.tool_uses = ToolUseMap()  # toolUseId -> tool name for tool_result events
+
+    @classmethod
+    def isolated(cls, root: str = SESSIONS_ROOT, data_dir: str = "./data", **kwargs) -> "GraphSession":
+        """Create a session with its own workspace: `<root>/<session_id>/{artifacts,data}`.
+
+        `data` is a symlink to the shared input directory, so prompts that refer to
+        `./data/...` and `./artifacts/...` keep working unchanged inside the workspace.
+        """
+        session = cls(**kwargs)
+        session.workdir = os.path.join(root, session.session_id)
+        os.makedirs(os.path.join(session.workdir, "artifacts"), exist_ok=True)
+        data_link = os.path.join(session.workdir, "data")
+        if os.path.isdir(data_dir) and not os.path.exists(data_link):
+            os.symlink(os.path.abspath(data_dir), data_link, target_is_directory=True)
+        return session
+
+    def fork(self, name: str, root: str = SESSIONS_ROOT) -> "GraphSession":
+        """Child session for one concurrent plan step.
+
+        It has its own workspace (and Python kernel) but streams into this session's event
+        bus and shares its token_usage, so display and accounting stay in one place.
+        """
+        child = GraphSession.isolated(root=root, data_dir=self.resolve_path("./data"),
+                                      session_id=f"{self.session_id}-{name}", event_bus=self.event_bus,
+                                      interactive=self.interactive, checkpointed=self.checkpointed)
+        child.shared = {key: value for key, value in self.shared.items() if key not in ("messages", "history")}
+        child.shared["history"] = []
+        return child
+
+    @property
+    def artifacts_dir(self) -> str:
+        return os.path.join(self.workdir, "artifacts")
+
+    def resolve_path(self, path: str) -> str:
+        """Resolve a tool-supplied path against the session workdir."""
+        return path if os.path.isabs(path) else os.path.normpath(os.path.join(self.workdir, path))
+
+    def close(self) -> None:
+        """Release per-session resources once the workflow has finished."""
+        kernel_pool.release(self.session_id)
+        self.tool_uses.clear()
+        if self.session_id != DEFAULT_SESSION_ID:
+            remove_event_bus(self.session_id)
+
+    def __repr__(self):
+        return f"GraphSession(session_id={self.session_id!r})"
+
+
+def prune_sessions(root: str = SESSIONS_ROOT, active: Sequence[str] = (), max_kept: int = SESSIONS_MAX_KEPT,
+                   ttl_hours: float = SESSIONS_TTL_HOURS) -> List[str]:
+    """Remove finished workspaces under `root`: those idle for more than `ttl_hours`, and the
+    oldest beyond the newest `max_kept`. Workspaces of `active` sessions and of their forks
+    (`<session_id>-<step>`) are left alone. Returns the removed paths.
+    """
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    finished = []
+    for name in names:
+        path = os.path.join(root, name)
+        if os.path.islink(path) or not os.path.isdir(path):
+            continue
+        if any(name == session_id or name.startswith(f"{session_id}-") for session_id in active):
+            continue
+        artifacts = os.path.join(path, "artifacts")
+        finished.append((max(os.path.getmtime(path), os.path.getmtime(artifacts) if os.path.isdir(artifacts) else 0), path))
+    finished.sort(reverse=True)
+    cutoff = time.time() - ttl_hours * 3600
+    removed = []
+    for position, (modified, path) in enumerate(finished):
+        if position >= max_kept or modified < cutoff:
+            shutil.rmtree(path, ignore_errors=True)  # the data/ symlink is unlinked, not followed
+            removed.append(path)
+    if removed:
+        logger.info(f"Removed {len(removed)} finished session workspaces from {root}")
+    return removed
+
+
+# Fallback for single-run CLI usage (main.py) where no session is activated explicitly
+_default_session = GraphSession(session_id=DEFAULT_SESSION_ID)
+_current_session: ContextVar[Optional[GraphSession]] = ContextVar("current_graph_session", default=None)
+
+
+def current_session() -> GraphSession:
+    """Session of the current context, or the process-wide default session."""
+    session = _current_session.get()
+    return session if session is not None else _default_session
+
+
+def get_shared_state() -> Dict[str, Any]:
+    """Shared state dict of the current session (replaces _global_node_states['shared'])."""
+    return current_session().shared
+
+
+@contextmanager
+def activate_session(session: GraphSession):
+    """
+    Make `session` (and its event bus) current for the enclosed block.
+
+    Tasks created inside the block copy the context, so graph nodes, tool threads and
+    sub-agent streams started from them keep seeing this session.
+    """
+    session_token = _current_session.set(session)
+    bus_token = use_event_bus(session.event_bus)
+    try:
+        yield session
+    finally:
+        reset_event_bus(bus_token)
+        _current_session.reset(session_token)
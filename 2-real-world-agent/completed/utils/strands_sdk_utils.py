@@ -2,20 +2,20 @@
 import logging
 import traceback
 import asyncio
-from datetime import datetime
 from strands import Agent
-from strands.models import BedrockModel
-from botocore.config import Config
 from botocore.exceptions import ClientError
 from langchain_core.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from strands.types.exceptions import EventLoopException
 
-from strands.agent.agent_result import AgentResult
-from strands.types.content import ContentBlock, Message, SystemContentBlock
-from strands.multiagent.base import MultiAgentBase, NodeResult, MultiAgentResult, Status
+from strands.types.content import SystemContentBlock
 
 from strands.agent.conversation_manager import SummarizingConversationManager
-from prompts.template import apply_prompt_template
+from prompts.template import apply_prompt_template, PromptBlocks
+from utils.model_pool import model_pool
+from utils import mock_model
+from utils.bedrock_scheduler import scheduled, bedrock_scheduler
+from utils.display import display_sink
+from utils.events import TextChunkEvent, ToolUseDeltaEvent, ToolUseEvent, ToolResultEvent, ReasoningEvent, UsageEvent
 
 # Simple logger setup
 logger = logging.getLogger(__name__)
@@ -77,17 +77,9 @@ class StreamableAgent:
                 try: await agent_task
                 except asyncio.CancelledError: pass
 
-    async def _yield_pending_events(self):
-        """Yield any pending events from global queue."""
-        from utils.event_queue import get_event, has_events
-
-        while has_events():
-            event = get_event()
-            if event: yield event
-
     async def stream_async_with_queue(self, message, agent_name=None, source=None):
         """
-        Stream agent response using background task + event queue pattern.
+        Stream agent response using background task + event bus pattern.
         Following pattern from StreamableGraph.stream_async()
 
         Args:
@@ -96,18 +88,19 @@ class StreamableAgent:
             source: Source identifier for the event (optional)
 
         Yields:
-            Events from global queue (formatted for display)
+            Events from the session's event bus (formatted for display)
         """
-        from utils.event_queue import clear_queue
+        from utils.event_queue import current_event_bus
 
         # Use agent's name if not provided
         if agent_name is None: agent_name = getattr(self.agent, 'name', 'agent')
         if source is None: source = agent_name
 
-        # Clear queue before starting
-        clear_queue()
+        # Clear bus before starting
+        bus = current_event_bus()
+        bus.clear()
 
-        # Step 1: Run agent in background - events go to global queue
+        # Step 1: Run agent in background - events go to the event bus
         async def run_agent():
             try:
                 full_text = ""
@@ -122,15 +115,13 @@ class StreamableAgent:
 
         agent_task = asyncio.create_task(run_agent())
 
-        # Step 2: Consume events from global queue
+        # Step 2: Await events from the bus until the agent finishes
         try:
-            while not agent_task.done():
-                async for event in self._yield_pending_events():
-                    yield event
-                await asyncio.sleep(0.005)
+            async for event in bus.stream_until(agent_task):
+                yield event
         finally:
             await self._cleanup_agent(agent_task)
-            async for event in self._yield_pending_events():
+            for event in bus.drain():
                 yield event
 
         yield {"type": "agent_complete", "event_type": "complete", "message": f"{agent_name} processing complete"}
@@ -143,31 +134,33 @@ class strands_utils():
         model_id = kwargs["llm_type"]  # Now receives full model ID directly from env
         enable_reasoning = kwargs["enable_reasoning"]
         tool_cache = kwargs["tool_cache"]
+        streaming = kwargs.get("streaming", True)
+        agent_name = kwargs.get("agent_name", "agent")
 
-        ## BedrockModel params: https://strandsagents.com/latest/api-reference/models/?h=bedrockmodel#strands.models.bedrock.BedrockModel
-        # max_tokens: Claude 3.5/4 models support up to 8192 output tokens by default, extended to 64K for Sonnet
-        # Increased from 8192*5 (40,960) to 8192*8 (65,536) to prevent MaxTokensReachedException
-        llm = BedrockModel(
+        # Offline runs (tests, benchmarks/) replay a scripted conversation instead of calling Bedrock
+        # Both paths go through the Bedrock admission scheduler (see utils/bedrock_scheduler.py)
+        mock = mock_model.active_mock_model(agent_name, model_id)
+        if mock is not None:
+            return scheduled(mock, agent_name)
+
+        # Models and bedrock-runtime clients are pooled per configuration (see utils/model_pool.py)
+        llm = model_pool.get_model(
             model_id=model_id,
-            streaming=True,
-            cache_tools="default" if tool_cache else None,
-            max_tokens=64000,
-            stop_sequences=["\n\nHuman"],
-            temperature=1 if enable_reasoning else 0.01,
-            additional_request_fields={
-                "thinking": {
-                    "type": "enabled" if enable_reasoning else "disabled",
-                    **({"budget_tokens": 8192} if enable_reasoning else {}),
-                }
-            },
-            boto_client_config=Config(
-                read_timeout=900,
-                connect_timeout=900,
-                retries=dict(max_attempts=50, mode="adaptive"),
-            )
+            enable_reasoning=enable_reasoning,
+            tool_cache=tool_cache,
+            streaming=streaming,
         )
+        return scheduled(mock_model.maybe_record(llm, agent_name), agent_name)
 
-        return llm
+    @staticmethod
+    def get_model_pool_stats():
+        """Hit/miss statistics of the shared model pool."""
+        return model_pool.stats()
+
+    @staticmethod
+    def get_scheduler_stats():
+        """Queue depth and RPM/TPM window usage of the Bedrock scheduler, per model."""
+        return bedrock_scheduler.stats()
 
     @staticmethod
     def get_agent(**kwargs):
@@ -185,20 +178,29 @@ class strands_utils():
         context_overflow_preserve_recent_messages = kwargs.get("context_overflow_preserve_recent_messages", 10)  # Keep recent 10 messages
 
         prompt_cache, cache_type = prompt_cache_info
-        llm = strands_utils.get_model(llm_type=model_id, enable_reasoning=enable_reasoning, tool_cache=tool_cache)
-        llm.config["streaming"] = streaming
+        llm = strands_utils.get_model(llm_type=model_id, enable_reasoning=enable_reasoning, tool_cache=tool_cache, streaming=streaming, agent_name=agent_name)
 
         # Convert system_prompt to SystemContentBlock array with cachePoint if caching is enabled
-        if prompt_cache:
+        if prompt_cache and isinstance(system_prompts, PromptBlocks) and system_prompts.static:
+            # Static instructions are shared by every request, so their cache entry survives new
+            # USER_REQUEST / FULL_PLAN / CURRENT_TIME values; the second point covers this agent's loop
+            logger.info(f"{Colors.GREEN}{agent_name.upper()} - Prompt Cache Enabled (static prefix){Colors.END}")
+            system_prompt_with_cache = [
+                SystemContentBlock(text=system_prompts.static),
+                SystemContentBlock(cachePoint={"type": cache_type}),
+                SystemContentBlock(text=system_prompts.dynamic),
+                SystemContentBlock(cachePoint={"type": cache_type})
+            ]
+        elif prompt_cache:
             logger.info(f"{Colors.GREEN}{agent_name.upper()} - Prompt Cache Enabled{Colors.END}")
             system_prompt_with_cache = [
-                SystemContentBlock(text=system_prompts),
+                SystemContentBlock(text=str(system_prompts)),
                 SystemContentBlock(cachePoint={"type": cache_type})
             ]
         else:
             # If caching is disabled, pass the string as-is
             logger.info(f"{Colors.GREEN}{agent_name.upper()} - Prompt Cache Disabled{Colors.END}")
-            system_prompt_with_cache = system_prompts
+            system_prompt_with_cache = str(system_prompts)
         
         if tool_cache: logger.info(f"{Colors.GREEN}{agent_name.upper()} - Tool Cache Enabled{Colors.END}")
         else: logger.info(f"{Colors.GREEN}{agent_name.upper()} - Tool Cache Disabled{Colors.END}")
@@ -343,17 +345,18 @@ class strands_utils():
         Yields:
             AgentCore formatted events
         """
-        from utils.event_queue import put_event
+        from utils.event_queue import put_event_async
+        from utils.session import current_session
 
-        session_id = "ABC"
+        session = current_session()
+        session_id = session.session_id
 
         # Use retry helper for robust streaming
         async for event in strands_utils._retry_agent_streaming(agent, message):
             # Convert Strands events to AgentCore format
-            agentcore_event = await strands_utils._convert_to_agentcore_event(event, agent_name, session_id, source)
-            if agentcore_event:
-                # Put event in global queue for unified processing
-                put_event(agentcore_event)
+            for agentcore_event in strands_utils._convert_to_agentcore_events(event, agent_name, session_id, source, session.tool_uses):
+                # Put event in the session's event bus for unified processing
+                await put_event_async(agentcore_event)
                 yield agentcore_event
 
         # After streaming completes, extract usage info from agent's metrics (에이전트 응답이 종료된 이후 최종적으로 한번만 보낸다)
@@ -372,113 +375,82 @@ class strands_utils():
                 # Extract model ID from agent
                 model_id = agent.model.config.get('model_id', 'unknown')
 
-                usage_event = {
-                    "timestamp": datetime.now().isoformat(),
-                    "session_id": session_id,
-                    "agent_name": agent_name,
-                    "model_id": model_id,
-                    "source": source or f"{agent_name}_node",
-                    "type": "agent_usage_stream",
-                    "event_type": "usage_metadata",
-                    "input_tokens": usage_info.get("inputTokens", 0),
-                    "output_tokens": usage_info.get("outputTokens", 0),
-                    "total_tokens": usage_info.get("totalTokens", 0),
-                    "cache_read_input_tokens": usage_info.get("cacheReadInputTokens", 0),
-                    "cache_write_input_tokens": usage_info.get("cacheWriteInputTokens", 0)
-                }
-                put_event(usage_event)
+                usage_event = UsageEvent(session_id, agent_name, source, usage_info, model_id=model_id)
+                await put_event_async(usage_event)
                 yield usage_event
 
         except Exception as e:
             logger.warning(f"Could not extract usage info from {agent_name}: {e}")
 
-    # 툴 사용 ID와 툴 이름 매핑을 위한 클래스 변수
-    _tool_use_mapping = {}
+    @staticmethod
+    def _session_tool_uses(tool_uses=None):
+        if tool_uses is not None: return tool_uses
+        from utils.session import current_session
+        return current_session().tool_uses
 
     @staticmethod
-    async def _convert_to_agentcore_event(strands_event, agent_name, session_id, source=None):
-        """Strands 이벤트를 AgentCore 스트리밍 형식으로 변환"""
+    def _convert_to_agentcore_event(strands_event, agent_name, session_id, source=None, tool_uses=None):
+        """Strands 이벤트를 AgentCore 스트리밍 형식으로 변환 (slotted record, dict는 to_dict()에서만 생성)
 
-        base_event = {
-            "timestamp": datetime.now().isoformat(),
-            "session_id": session_id,
-            "agent_name": agent_name,
-            "source": source or f"{agent_name}_node",
-        }
+        tool_uses: toolUseId → tool name map of the session (defaults to the current session's)
+        """
 
         # 텍스트 데이터 이벤트
         if "data" in strands_event:
-            return {
-                **base_event,
-                "type": "agent_text_stream",
-                "event_type": "text_chunk",
-                "data": strands_event["data"],
-                "chunk_size": len(strands_event["data"])
-            }
+            return TextChunkEvent(session_id, agent_name, source, strands_event["data"])
 
-        # 도구 사용 이벤트
+        # 도구 사용 이벤트: partial input마다 오는 current_tool_use는 새로 추가된 input만 전달
+        # (완성된 input은 message 이벤트에서 ToolUseEvent로 한 번만 전달)
         elif "current_tool_use" in strands_event:
             tool_info = strands_event["current_tool_use"]
             tool_id = tool_info.get("toolUseId")
             tool_name = tool_info.get("name", "unknown")
 
-            # toolUseId와 tool_name 매핑 저장
-            if tool_id and tool_name: strands_utils._tool_use_mapping[tool_id] = tool_name
+            # toolUseId와 tool_name 매핑 저장 (세션별, 크기/TTL 제한)
+            if tool_id and tool_name: strands_utils._session_tool_uses(tool_uses).record(tool_id, tool_name)
 
-            return {
-                **base_event,
-                "type": "agent_tool_stream",
-                "event_type": "tool_use",
-                "tool_name": tool_name,
-                "tool_id": tool_id,
-                "tool_input": tool_info.get("input", {})
-            }
-
-        # message 래퍼 안의 tool result 처리
-        if "message" in strands_event:
-            message = strands_event["message"]
-            if isinstance(message, dict) and "content" in message and isinstance(message["content"], list):
-                for content_item in message["content"]:
-                    if isinstance(content_item, dict) and "toolResult" in content_item:
-                        tool_result = content_item["toolResult"]
-                        tool_id = tool_result.get("toolUseId")
-
-                        # 저장된 매핑에서 툴 이름 찾기
-                        tool_name = strands_utils._tool_use_mapping.get(tool_id, "external_tool")
-                        output = str(tool_result.get("content", [{}])[0].get("text", "")) if tool_result.get("content") else ""
-
-                        return {
-                            **base_event,
-                            "type": "agent_tool_stream",
-                            "event_type": "tool_result", 
-                            "tool_name": tool_name,
-                            "tool_id": tool_id,
-                            "output": output
-                        }
+            input_delta = strands_event.get("delta", {}).get("toolUse", {}).get("input", "")
+            return ToolUseDeltaEvent(session_id, agent_name, source, tool_name, tool_id, input_delta)
 
         # 추론 이벤트
         elif "reasoning" in strands_event and strands_event.get("reasoning"):
-            return {
-                **base_event,
-                "type": "agent_reasoning_stream",
-                "event_type": "reasoning",
-                "reasoning_text": strands_event.get("reasoningText", "")[:200]
-            }
+            return ReasoningEvent(session_id, agent_name, source, strands_event.get("reasoningText", "")[:200])
 
         # 사용량/메타데이터 이벤트
         elif "metadata" in strands_event and "usage" in strands_event["metadata"]:
-            usage = strands_event["metadata"]["usage"]
-            return {
-                **base_event,
-                "type": "agent_usage_stream",
-                "event_type": "usage_metadata",
-                "input_tokens": usage.get("inputTokens", 0),
-                "output_tokens": usage.get("outputTokens", 0),
-                "total_tokens": usage.get("totalTokens", 0)
-            }
+            return UsageEvent(session_id, agent_name, source, strands_event["metadata"]["usage"])
 
         return None
 
+    @staticmethod
+    def _convert_to_agentcore_events(strands_event, agent_name, session_id, source=None, tool_uses=None):
+        """_convert_to_agentcore_event + message 이벤트 처리 (한 message에 toolUse/toolResult가 여러 개일 수 있음)"""
+
+        message = strands_event.get("message")
+        if not (isinstance(message, dict) and isinstance(message.get("content"), list)):
+            event = strands_utils._convert_to_agentcore_event(strands_event, agent_name, session_id, source, tool_uses)
+            if event: yield event
+            return
+
+        for content_item in message["content"]:
+            if not isinstance(content_item, dict): continue
+
+            # 모델 응답 message: 완성된 tool input을 툴 호출당 한 번만 전달
+            if "toolUse" in content_item:
+                tool_use = content_item["toolUse"]
+                yield ToolUseEvent(session_id, agent_name, source, tool_use.get("name", "unknown"), tool_use.get("toolUseId"), tool_use.get("input", {}))
+
+            # message 래퍼 안의 tool result 처리
+            elif "toolResult" in content_item:
+                tool_result = content_item["toolResult"]
+                tool_id = tool_result.get("toolUseId")
+
+                # 저장된 매핑에서 툴 이름 찾기 (결과가 도착했으므로 매핑 제거)
+                tool_name = strands_utils._session_tool_uses(tool_uses).resolve(tool_id)
+                output = str(tool_result.get("content", [{}])[0].get("text", "")) if tool_result.get("content") else ""
+
+                yield ToolResultEvent(session_id, agent_name, source, tool_name, tool_id, output)
+
     @staticmethod
     def parsing_text_from_response(response):
 
@@ -500,95 +472,8 @@ class strands_utils():
 
     @staticmethod
     def process_event_for_display(event):
-        """Process events for colored terminal output"""
-        # Initialize colored callbacks for terminal display
-        callback_default = ColoredStreamingCallback('white')
-        callback_reasoning = ColoredStreamingCallback('cyan')        
-        callback_tool = ColoredStreamingCallback('yellow')
-
-        if event:
-            if event.get("event_type") == "text_chunk":
-                callback_default.on_llm_new_token(event.get('data', ''))
-
-            elif event.get("event_type") == "reasoning":
-                callback_reasoning.on_llm_new_token(event.get('reasoning_text', ''))
-
-            elif event.get("event_type") == "tool_use": 
-                pass
-
-            elif event.get("event_type") == "tool_result":
-                tool_name = event.get("tool_name", "unknown")
-                output = event.get("output", "")
-                print(f"\n[TOOL RESULT - {tool_name}]", flush=True)
-
-                # Parse output based on function name
-                if tool_name == "python_repl_tool" and len(output.split("||")) == 3:
-                    status, code, stdout = output.split("||")
-                    callback_tool.on_llm_new_token(f"Status: {status}\n")
-
-                    if code: callback_tool.on_llm_new_token(f"Code:\n```python\n{code}\n```\n")
-                    if stdout and stdout != 'None': callback_tool.on_llm_new_token(f"Output:\n{stdout}\n")
-
-                elif tool_name == "bash_tool" and len(output.split("||")) == 2:
-                    cmd, stdout = output.split("||")
-                    if cmd: callback_tool.on_llm_new_token(f"CMD:\n```bash\n{cmd}\n```\n")
-                    if stdout and stdout != 'None': callback_tool.on_llm_new_token(f"Output:\n{stdout}\n")
-
-                elif tool_name == "write_and_execute_tool":
-                    # write_and_execute_tool: 작성 결과 + 실행 결과 (전체 출력)
-                    callback_tool.on_llm_new_token(f"{output}\n")
-
-                elif tool_name == "file_read":
-                    # file_read 결과는 보통 길어서 앞부분만 표시
-                    truncated_output = output[:500] + "..." if len(output) > 500 else output
-                    callback_tool.on_llm_new_token(f"File content preview:\n{truncated_output}\n")
-                
-                elif tool_name == "rag_tool":
-                    callback_tool.on_llm_new_token(f"rag response:\n{output}\n")
-
-                else: # 기타 모든 툴 결과 표시, 코더 툴, 리포터 툴 결과도 다 출력 (for debug)
-                    #callback_tool.on_llm_new_token(f"Output: pass - you can see that in debug mode\n")
-                    callback_default.on_llm_new_token(f"Output: {output}\n")
-                    #pass
-
-class FunctionNode(MultiAgentBase):
-    """Execute deterministic Python functions as graph nodes."""
-
-    def __init__(self, func, name: str = None):
-        super().__init__()
-        self.func = func
-        self.name = name or func.__name__
-
-    def __call__(self, task=None, **kwargs):
-        """Synchronous execution for compatibility with MultiAgentBase"""
-        # Pass task and kwargs directly to function
-        if asyncio.iscoroutinefunction(self.func): 
-            return asyncio.run(self.func(task=task, **kwargs))
-        else: 
-            return self.func(task=task, **kwargs)
-
-    # Execute function and return standard MultiAgentResult
-    async def invoke_async(self, task=None, invocation_state=None, **kwargs):
-        # Execute function (nodes now use global state for data sharing)  
-        # Pass task and kwargs directly to function
-        if asyncio.iscoroutinefunction(self.func): 
-            response = await self.func(task=task, **kwargs)
-        else: 
-            response = self.func(task=task, **kwargs)
-
-        agent_result = AgentResult(
-            stop_reason="end_turn",
-            message=Message(role="assistant", content=[ContentBlock(text=str(response["text"]))]),
-            metrics={},
-            state={}
-        )
-
-        # Return wrapped in MultiAgentResult
-        return MultiAgentResult(
-            status=Status.COMPLETED,
-            results={self.name: NodeResult(result=agent_result)}
-        )
-
+        """Process events for colored terminal output (buffered, see utils/display.py)"""
+        display_sink.render_event(event)
 
 # ============================================================================
 # Token Tracking Helper Class
@@ -654,6 +539,24 @@ class TokenTracker:
                 usage['by_agent'][agent_name]['cache_write'] += cache_write
                 usage['by_agent'][agent_name]['model_id'] = model_id  # Update model_id (in case it changes)
 
+    @staticmethod
+    def cache_ratios(shared_state):
+        """Per-agent prompt cache efficiency.
+
+        read_ratio is the share of prompt tokens served from cache, write_ratio the share
+        written to it; a stable prefix shows a high read_ratio after each agent's first call.
+        """
+        ratios = {}
+        for agent_name, usage in shared_state.get('token_usage', {}).get('by_agent', {}).items():
+            prompt_tokens = usage.get('input', 0) + usage.get('cache_read', 0) + usage.get('cache_write', 0)
+            if prompt_tokens:
+                ratios[agent_name] = {
+                    'read_ratio': usage.get('cache_read', 0) / prompt_tokens,
+                    'write_ratio': usage.get('cache_write', 0) / prompt_tokens,
+                    'read_per_write': usage.get('cache_read', 0) / usage['cache_write'] if usage.get('cache_write') else None,
+                }
+        return ratios
+
     @staticmethod
     def print_current(shared_state):
         """Print current cumulative token usage with model information."""
@@ -771,5 +674,9 @@ class TokenTracker:
                 print(f"    - Cache Read:     {agent_cache_read:>8,} (10% cost - 90% discount)")
                 print(f"    - Cache Write:    {agent_cache_write:>8,} (125% cost - 25% extra)")
                 print(f"    - Output:         {output_tokens:>8,}")
+                ratios = TokenTracker.cache_ratios(shared_state).get(agent_name)
+                if ratios and (agent_cache_read or agent_cache_write):
+                    read_per_write = f"{ratios['read_per_write']:.1f}x" if ratios['read_per_write'] is not None else "n/a"
+                    print(f"    - Cache Ratio:    read {ratios['read_ratio']:.0%} / write {ratios['write_ratio']:.0%} of prompt (read/write {read_per_write})")
 
         print("="*60)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+toolUseId → tool name lookup for streamed events.
+
+Tool results only carry the toolUseId, so _convert_to_agentcore_event remembers the name from
+the tool_use events and resolves it when the result arrives. Each GraphSession owns one map;
+entries are removed when their result is consumed and are otherwise bounded by size (LRU)
+and age (TTL), so abandoned tool calls cannot grow a long-lived server process.
+
+Environment:
+    TOOL_USE_MAP_MAX_ENTRIES   Entries kept per session (default 1024)
+    TOOL_USE_MAP_TTL_SECONDS   Age after which an unresolved entry is dropped (default 3600)
+"""
+
+import os
+import time
+import weakref
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+TOOL_USE_MAP_MAX_ENTRIES = int(os.getenv("TOOL_USE_MAP_MAX_ENTRIES", "1024"))
+TOOL_USE_MAP_TTL_SECONDS = float(os.getenv("TOOL_USE_MAP_TTL_SECONDS", "3600"))
+
+_live_maps: "weakref.WeakSet[ToolUseMap]" = weakref.WeakSet()
+_totals = {"resolved": 0, "missed": 0, "evicted": 0, "expired": 0}
+_totals_lock = threading.Lock()
+
+
+class ToolUseMap:
+    """Bounded LRU/TTL mapping of toolUseId to tool name for one session."""
+
+    def __init__(self, max_entries: int = TOOL_USE_MAP_MAX_ENTRIES, ttl: float = TOOL_USE_MAP_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # tool_id -> (tool_name, recorded_at)
+        self._lock = threading.Lock()
+        self.stats = {"resolved": 0, "missed": 0, "evicted": 0, "expired": 0}
+        _live_maps.add(self)
+
+    def _count(self, key: str, n: int = 1) -> None:
+        self.stats[key] += n
+        with _totals_lock:
+            _totals[key] += n
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in recording order, so expired ones are at the front
+        expired = 0
+        while self._entries:
+            _, recorded_at = next(iter(self._entries.values()))
+            if now - recorded_at < self.ttl:
+                break
+            self._entries.popitem(last=False)
+            expired += 1
+        if expired:
+            self._count("expired", expired)
+
+    def record(self, tool_id: str, tool_name: str) -> None:
+        """Remember the name of a tool call (repeated events for the same call refresh it)."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[tool_id] = (tool_name, now)
+            self._entries.move_to_end(tool_id)
+            self._expire(now)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            if evicted:
+                self._count("evicted", evicted)
+
+    def resolve(self, tool_id: Optional[str], default: str = "external_tool") -> str:
+        """Name of `tool_id`'s tool, consuming the entry (its result has arrived)."""
+        with self._lock:
+            entry = self._entries.pop(tool_id, None) if tool_id else None
+            self._count("resolved" if entry else "missed")
+        return entry[0] if entry else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "max_entries": self.max_entries, **self.stats}
+
+
+def tool_use_map_stats() -> Dict[str, Any]:
+    """Process-wide totals across sessions plus the entries currently held."""
+    maps = list(_live_maps)
+    with _totals_lock:
+        totals = dict(_totals)
+    return {"sessions": len(maps), "size": sum(len(m) for m in maps), **totals}
@@ -0,0 +1,368 @@
+"""
+Deterministic, vectorized re-verification of the Coder's calculation_metadata.json.
+
+Formulas written in the tracked form are parsed into specs and evaluated without a model:
+
+    SUM(매출액)                                   aggregate of one column
+    SUM(매출액) WHERE 매체=쿠빵 AND 카테고리=간편식   filtered aggregate
+    SUM(클릭수) / SUM(노출수) * 100 WHERE 매체=쿠빵   ratio (optionally scaled)
+
+Aggregates: SUM, MEAN/AVG/AVERAGE, MEDIAN, MIN, MAX, STD, COUNT, COUNT(*), NUNIQUE/COUNT(DISTINCT x).
+Conditions: =, !=, >, >=, <, <= and IN (a, b), joined with AND.
+
+All specs of one source file are evaluated in a single pass: aggregates without filters are
+computed once per (column, function), and specs filtered by equality on the same set of
+columns share one groupby over all the (column, function) pairs they need. SUM and COUNT(*)
+specs filtered by equality on cube dimensions are looked up in the dataset's precomputed
+cube (utils.cube) first, so they need no pass over the rows at all. Anything the parser
+does not understand is returned as unparsed and left to the validator agent.
+
+Environment:
+    VALIDATION_ABS_TOL  Absolute tolerance of a match (default 0.01)
+    VALIDATION_REL_TOL  Relative tolerance of a match (default 1e-6)
+"""
+
+import os
+import re
+import time
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import cube as cubes
+from utils.data_loader import load_table
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+VALIDATION_ABS_TOL = float(os.getenv("VALIDATION_ABS_TOL", "0.01"))
+VALIDATION_REL_TOL = float(os.getenv("VALIDATION_REL_TOL", "1e-6"))
+
+# Formula aggregate name -> pandas aggregation
+AGGREGATES = {
+    "SUM": "sum", "MEAN": "mean", "AVG": "mean", "AVERAGE": "mean", "MEDIAN": "median",
+    "MIN": "min", "MAX": "max", "STD": "std", "COUNT": "count", "NUNIQUE": "nunique",
+}
+ROWS = "*"  # column of COUNT(*)
+
+_TERM = re.compile(r"^(?P<agg>[A-Za-z]+)\s*\(\s*(?P<distinct>DISTINCT\s+)?(?P<column>[^()]+?)\s*\)$", re.IGNORECASE)
+_WHERE = re.compile(r"\s+WHERE\s+", re.IGNORECASE)
+_AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_SCALE = re.compile(r"^(?P<expr>.+?)\s*\*\s*(?P<scale>\d+(?:\.\d+)?)$")
+_CONDITION = re.compile(r"^(?P<column>.+?)\s*(?P<op>==|!=|>=|<=|=|>|<|\s+IN\s+)\s*(?P<value>.+)$", re.IGNORECASE)
+_NUMBER = re.compile(r"^-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?$")
+
+
+class CalcSpec:
+    """One parsed calculation: aggregate terms (1, or 2 for a ratio), filters and the reported value."""
+
+    __slots__ = ("calc_id", "terms", "scale", "filters", "source_file", "reported", "formula", "index")
+
+    def __init__(self, calc_id: str, terms: List[Tuple[str, str]], scale: float,
+                 filters: List[Tuple[str, str, Any]], source_file: str, reported: float, formula: str):
+        self.calc_id = calc_id
+        self.terms = terms          # [(column, pandas aggregation)]
+        self.scale = scale
+        self.filters = filters      # [(column, op, literal or tuple of literals for IN)]
+        self.source_file = source_file
+        self.reported = reported
+        self.formula = formula
+        self.index = None           # position in the list given to validate_batch
+
+    def equality_only(self) -> bool:
+        return all(op == "=" for _, op, _ in self.filters)
+
+
+def _strip_quotes(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"`":
+        return text[1:-1]
+    return text
+
+
+def _parse_term(text: str) -> Optional[Tuple[str, str]]:
+    text = text.strip()
+    match = _TERM.match(text)
+    if not match:
+        # "(SUM(a))" - redundant parentheses around a term
+        return _parse_term(text[1:-1]) if text.startswith("(") and text.endswith(")") else None
+    agg = match["agg"].upper()
+    column = _strip_quotes(match["column"])
+    if agg not in AGGREGATES:
+        return None
+    if agg == "COUNT" and match["distinct"]:
+        return column, "nunique"
+    if agg == "COUNT" and column == ROWS:
+        return ROWS, "size"
+    return (column, AGGREGATES[agg]) if column != ROWS else None
+
+
+def _parse_condition(text: str) -> Optional[Tuple[str, str, Any]]:
+    match = _CONDITION.match(text.strip())
+    if not match:
+        return None
+    op = match["op"].strip().upper()
+    op = "=" if op == "==" else op
+    value = match["value"].strip()
+    if op == "IN":
+        if not (value.startswith("(") and value.endswith(")")):
+            return None
+        value = tuple(_strip_quotes(item) for item in value[1:-1].split(","))
+    else:
+        value = _strip_quotes(value)
+    return _strip_quotes(match["column"]), op, value
+
+
+def _reported_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip().replace(",", "").rstrip("%").strip()
+        if _NUMBER.match(text):
+            return float(text)
+    return None
+
+
+def parse_calculation(calc: Dict[str, Any]) -> Optional[CalcSpec]:
+    """CalcSpec for a calculation_metadata entry, or None if its formula is not in the tracked form."""
+    formula = str(calc.get("formula") or "").strip()
+    reported = _reported_number(calc.get("value"))
+    if not formula or reported is None or not calc.get("source_file"):
+        return None
+
+    parts = _WHERE.split(formula, maxsplit=1)
+    expression, filters = parts[0].strip(), []
+    if len(parts) == 2:
+        for text in _AND.split(parts[1].strip()):
+            condition = _parse_condition(text)
+            if condition is None:
+                return None
+            filters.append(condition)
+
+    scale = 1.0
+    scaled = _SCALE.match(expression)
+    if scaled:
+        expression, scale = scaled["expr"].strip(), float(scaled["scale"])
+    # Split a ratio on the top-level "/" only (column names may contain "/")
+    depth, split_at = 0, None
+    for i, char in enumerate(expression):
+        depth += (char == "(") - (char == ")")
+        if char == "/" and depth == 0:
+            split_at = i
+    pieces = [expression] if split_at is None else [expression[:split_at], expression[split_at + 1:]]
+    terms = [_parse_term(piece) for piece in pieces]
+    if any(term is None for term in terms):
+        return None
+    return CalcSpec(str(calc.get("id", "")), terms, scale, filters, calc["source_file"], reported, formula)
+
+
+def _literal_for(series: pd.Series, value: Any) -> Any:
+    """Cast a formula literal to the column's type (numbers for numeric columns, text otherwise)."""
+    if isinstance(value, tuple):
+        return tuple(_literal_for(series, item) for item in value)
+    if pd.api.types.is_numeric_dtype(series) and _NUMBER.match(str(value)):
+        number = float(value)
+        return int(number) if number.is_integer() and pd.api.types.is_integer_dtype(series) else number
+    return str(value)
+
+
+def _mask(df: pd.DataFrame, filters: List[Tuple[str, str, Any]]) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column] if pd.api.types.is_numeric_dtype(df[column]) else df[column].astype(str)
+        literal = _literal_for(df[column], value)
+        if op == "IN":
+            mask &= series.isin(literal)
+        elif op == "=":
+            mask &= series == literal
+        elif op == "!=":
+            mask &= series != literal
+        elif op == ">":
+            mask &= series > literal
+        elif op == ">=":
+            mask &= series >= literal
+        elif op == "<":
+            mask &= series < literal
+        else:
+            mask &= series <= literal
+    return mask
+
+
+def _aggregate(frame: pd.DataFrame, column: str, func: str) -> float:
+    if column == ROWS:
+        return float(len(frame))
+    return float(frame[column].agg(func))
+
+
+def _matches(reported: float, actual: float) -> bool:
+    if np.isnan(actual):
+        return False
+    diff = abs(reported - actual)
+    if diff <= VALIDATION_ABS_TOL or diff <= VALIDATION_REL_TOL * abs(actual):
+        return True
+    # Values reported rounded (e.g. 3.57 for 3.5742) match at the precision they were given in
+    text = repr(reported)
+    decimals = len(text.split(".")[1]) if "." in text and "e" not in text else 0
+    return round(actual, decimals) == reported
+
+
+def _cube_value(cube: "cubes.Cube", spec: CalcSpec) -> Optional[float]:
+    """The spec's value from the cube, or None when the cube cannot answer it exactly."""
+    if not spec.equality_only() or any(column not in cube.dimensions for column, _, _ in spec.filters):
+        return None
+    where = dict((column, value) for column, _, value in spec.filters)
+    if len(where) != len(spec.filters):  # the same column pinned twice
+        return None
+    if not cube.precomputed([d for d in cube.dimensions if d in where]):  # the row pass groups it as cheaply
+        return None
+    values = []
+    for column, func in spec.terms:
+        if column == ROWS and func == "size":
+            values.append(cube.value(cubes.ROWS, where))
+        elif func == "sum" and column in cube.measures:
+            values.append(cube.value(column, where))
+        else:
+            return None
+    result = values[0] if len(values) == 1 else values[0] / values[1]
+    return result * spec.scale
+
+
+def _result(spec: CalcSpec, actual: float) -> Dict[str, Any]:
+    status = "verified" if _matches(spec.reported, actual) else "mismatch"
+    return {"id": spec.calc_id, "index": spec.index, "status": status, "reported": spec.reported,
+            "actual": None if np.isnan(actual) else round(actual, 6), "formula": spec.formula}
+
+
+def _error(spec: CalcSpec, error: Exception) -> Dict[str, Any]:
+    return {"id": spec.calc_id, "index": spec.index, "status": "error", "reported": spec.reported, "actual": None,
+            "formula": spec.formula, "error": str(error)}
+
+
+class _DatasetPass:
+    """Evaluates every spec of one DataFrame with shared aggregate and groupby results."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.totals: Dict[Tuple[str, str], float] = {}
+        self.groups: Dict[Tuple[str, ...], Dict[tuple, Dict[tuple, float]]] = {}
+        self.masks: Dict[tuple, pd.Series] = {}
+
+    def prepare(self, specs: List[CalcSpec]) -> None:
+        """One groupby per set of equality-filter columns, over all the aggregates its specs need."""
+        needs: Dict[Tuple[str, ...], set] = defaultdict(set)
+        for spec in specs:
+            if spec.filters and spec.equality_only():
+                needs[tuple(sorted({column for column, _, _ in spec.filters}))].update(spec.terms)
+        for keys, terms in needs.items():
+            plan = defaultdict(list)
+            for column, func in terms:
+                plan[keys[0] if column == ROWS else column].append("size" if column == ROWS else func)
+            table = self.df.groupby(list(keys), dropna=False, observed=True).agg(
+                {column: sorted(set(funcs)) for column, funcs in plan.items()})
+            # Keyed like the literals of _literal_for: numbers stay numbers, everything else is text
+            self.groups[keys] = {
+                tuple(k if isinstance(k, (int, float, np.number)) else str(k) for k in (key if isinstance(key, tuple) else (key,))): row
+                for key, row in table.to_dict("index").items()
+            }
+
+    def value(self, spec: CalcSpec) -> float:
+        values = [self._term(spec, column, func) for column, func in spec.terms]
+        result = values[0] if len(values) == 1 else values[0] / values[1]
+        return result * spec.scale
+
+    def _term(self, spec: CalcSpec, column: str, func: str) -> float:
+        if not spec.filters:
+            key = (column, func)
+            if key not in self.totals:
+                self.totals[key] = _aggregate(self.df, column, func)
+            return self.totals[key]
+        if spec.equality_only():
+            keys = tuple(sorted({c for c, _, _ in spec.filters}))
+            literals = {c: _literal_for(self.df[c], v) for c, _, v in spec.filters}
+            row = self.groups[keys].get(tuple(literals[c] for c in keys))
+            if row is None:  # no rows match the filter
+                return 0.0 if func in ("sum", "count", "size", "nunique") else float("nan")
+            return float(row[(keys[0], "size") if column == ROWS else (column, func)])
+        mask_key = tuple((c, op, v) for c, op, v in spec.filters)
+        if mask_key not in self.masks:
+            self.masks[mask_key] = _mask(self.df, spec.filters)
+        return _aggregate(self.df[self.masks[mask_key]], column, func)
+
+
+def validate_batch(calculations: List[Dict[str, Any]], resolve: Callable[[str], str] = os.path.abspath,
+                   load: Callable[..., pd.DataFrame] = load_table,
+                   use_cube: bool = True) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Re-compute every parseable calculation from its source data.
+
+    Args:
+        calculations: Entries of calculation_metadata.json
+        resolve: Maps a calculation's source_file to a readable path
+        load: DataFrame loader, called as load(path, columns=[...])
+        use_cube: Answer SUM / COUNT(*) specs from the dataset's cube where possible
+
+    Returns:
+        (results, unparsed) - one result dict per parsed calculation with status "verified",
+        "mismatch" or "error" and its position in `calculations` as "index" (ids may be missing
+        or repeated), and the original entries the engine could not evaluate.
+    """
+    started = time.perf_counter()
+    by_source: Dict[str, List[CalcSpec]] = defaultdict(list)
+    unparsed = []
+    for index, calc in enumerate(calculations):
+        spec = parse_calculation(calc)
+        if spec is None:
+            unparsed.append(calc)
+        else:
+            spec.index = index
+            by_source[spec.source_file].append(spec)
+
+    results = []
+    from_cube = 0
+    for source_file, specs in by_source.items():
+        if use_cube:
+            try:
+                cube = cubes.get_cube(resolve(source_file))
+            except Exception as e:  # the row pass below still evaluates everything
+                logger.warning(f"Cube unavailable for {source_file}: {e}")
+                cube = None
+            if cube is not None:
+                remaining = []
+                for spec in specs:
+                    try:
+                        actual = _cube_value(cube, spec)
+                    except (KeyError, ZeroDivisionError):  # left to the row pass, which reports it
+                        actual = None
+                    if actual is None:
+                        remaining.append(spec)
+                    else:
+                        results.append(_result(spec, actual))
+                from_cube += len(specs) - len(remaining)
+                specs = remaining
+                if not specs:
+                    continue
+        columns = sorted({column for spec in specs for column, _ in spec.terms if column != ROWS}
+                         | {column for spec in specs for column, _, _ in spec.filters})
+        try:
+            df = load(resolve(source_file), columns=columns)
+            evaluator = _DatasetPass(df)
+            evaluator.prepare(specs)
+        except Exception as e:  # missing file or column: every spec of this source goes back to the agent
+            logger.warning(f"Batch validation skipped {source_file}: {e}")
+            results.extend(_error(spec, e) for spec in specs)
+            continue
+        for spec in specs:
+            try:
+                results.append(_result(spec, evaluator.value(spec)))
+            except Exception as e:
+                results.append(_error(spec, e))
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"Batch validation: {len(results)} calculations evaluated in {elapsed:.1f} ms "
+                f"({sum(r['status'] == 'verified' for r in results)} verified, {from_cube} from cube, {len(unparsed)} unparsed)")
+    return results, unparsed